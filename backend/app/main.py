@@ -1,11 +1,21 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.middleware.rate_limit_middleware import RateLimitMiddleware
+from app.middleware.compression_middleware import CompressionMiddleware
 from app.routes.base_routes import router_v1
 from app.config import current_config
 from app.scheduler import start_scheduler_async_io, start_scheduler_background, shutdown_scheduler
 from app.kafka.config import KafkaConfig
 from app.kafka.producer import get_kafka_producer
 from app.kafka.consumer import consume
+from app.routes.v1.services.redis_service import init_redis, close_redis, RedisValueType
+from app.routes.v1.services.redis_pubsub_service import redis_subscriber
+from app.routes.v1.services.redis_lock_service import start_lock_notifier, stop_lock_notifier
+from app.routes.v1.services.redis_near_cache_service import start_near_cache
+from app.routes.v1.services.s3_service import shutdown_s3_executor
+from app.routes.v1.services.s3_cache_service import close_s3_cache
+from app.routes.v1.services.crypto_pool_service import start_crypto_executor, shutdown_crypto_executor
+from app.routes.v1.routes import cryptography_routes_v1
 import asyncio
 
 app = FastAPI()
@@ -14,6 +24,9 @@ app = FastAPI()
 # Add middleware
 # =========================================================
 
+# The middleware added last is the outermost: compression wraps the routes only, and 429 responses still get the CORS headers
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(RateLimitMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=current_config.ORIGIN.split(","),
@@ -57,6 +70,15 @@ async def startup_event():
     else:
         print("Schedulers are deactivated")
     
+    # Create Redis Connection Pool
+    redis_client = await init_redis()
+    await redis_subscriber.start()
+    await start_lock_notifier()
+    await start_near_cache(redis_client, [value_type.key_prefix for value_type in RedisValueType])
+
+    # Start the Crypto Process Pool (the processes import the crypto routes module before the first request)
+    await start_crypto_executor(cryptography_routes_v1.__name__)
+
     # Create Kafka Consumer
     if KafkaConfig.ON.value:
         await get_kafka_producer()
@@ -66,4 +88,16 @@ async def startup_event():
 async def shutdown_event():
     if current_config.SCHEDULER:
         shutdown_scheduler()
-        print("Shutdown schedulers")
\ No newline at end of file
+        print("Shutdown schedulers")
+
+    # Close Redis Connection Pool
+    await stop_lock_notifier()
+    await redis_subscriber.stop()
+    await close_redis()
+
+    # Shutdown S3 Executor and remove the S3 disk cache
+    shutdown_s3_executor()
+    close_s3_cache()
+
+    # Shutdown Crypto Process Pool
+    shutdown_crypto_executor()
\ No newline at end of file
@@ -0,0 +1,145 @@
+import os
+import zlib
+from enum import Enum
+from typing import Optional
+import zstandard
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+'''
+**Response Compression (gzip / zstd, streamed)**
+- The encoding is negotiated with `Accept-Encoding` (q-values are honored; zstd is preferred when both are accepted)
+- Every body chunk goes through an incremental compressor as it's sent, so memory stays bounded for streams of any size
+- Only full 200 responses are compressed
+    - partial content (206), responses that already have a `Content-Encoding` and small responses (`MIN_SIZE`) are sent as they are
+    - content types in `SKIP_CONTENT_TYPES` (already compressed formats, event streams) are sent as they are
+        - `application/octet-stream` is only used for unknown types: downloads send the media type of the file name (e.g. text/csv)
+- `Content-Length` is dropped (the compressed size isn't known up front) and `Vary: Accept-Encoding` is added
+- The compressed body is another representation: its ETag is made weak (`W/`) and `Accept-Ranges` is dropped
+    - a client resuming with `If-Range` and that ETag gets the full (identity) content back, never identity bytes to splice into a compressed copy
+- Chunks over `INLINE_MAX_SIZE` are compressed in a thread, so large bodies don't hold the event loop
+'''
+
+
+# =========================================================
+# Settings
+# =========================================================
+
+class CompressionConfig(Enum):
+    ON = True if os.getenv('COMPRESSION_ON', 'True').lower() == 'true' else False
+    MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))  # Bytes (responses with a smaller Content-Length aren't compressed)
+    GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', 6))
+    ZSTD_LEVEL = int(os.getenv('COMPRESSION_ZSTD_LEVEL', 3))
+    INLINE_MAX_SIZE = int(os.getenv('COMPRESSION_INLINE_MAX_SIZE', 64 * 1024))  # Bytes per chunk compressed on the event loop (larger: in a thread)
+    # Comma separated content type prefixes
+    SKIP_CONTENT_TYPES = os.getenv(
+        'COMPRESSION_SKIP_CONTENT_TYPES',
+        'image/,video/,audio/,text/event-stream,multipart/byteranges,application/octet-stream,'
+        'application/zip,application/gzip,application/zstd,application/x-7z-compressed,application/x-bzip2,'
+        'application/vnd.openxmlformats-officedocument,application/vnd.apache.parquet'
+    )
+
+skip_content_types = tuple(
+    content_type.strip().lower() for content_type in CompressionConfig.SKIP_CONTENT_TYPES.value.split(",") if content_type.strip()
+)
+SUPPORTED_ENCODINGS = ("zstd", "gzip")  # In order of preference
+
+
+# =========================================================
+# Compressors
+# =========================================================
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    if not accept_encoding:
+        return None
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+    wildcard = weights.get("*", 0.0)
+    candidates = [(weights.get(encoding, wildcard), -index, encoding) for index, encoding in enumerate(SUPPORTED_ENCODINGS)]
+    weight, _, encoding = max(candidates)
+    return encoding if weight > 0 else None
+
+
+def create_compressor(encoding: str):
+    # return: object with `compress(data)` and `flush()`
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=CompressionConfig.ZSTD_LEVEL.value).compressobj()
+    return zlib.compressobj(CompressionConfig.GZIP_LEVEL.value, zlib.DEFLATED, zlib.MAX_WBITS | 16)  # gzip container
+
+
+def should_compress(headers: Headers, status: int) -> bool:
+    if status != 200 or "content-encoding" in headers or "content-range" in headers:
+        return False
+    content_length = headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) < CompressionConfig.MIN_SIZE.value:
+        return False
+    content_type = headers.get("content-type", "").lower()
+    return not content_type.startswith(skip_content_types)
+
+
+# =========================================================
+# Middleware (ASGI)
+# =========================================================
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not CompressionConfig.ON.value:
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        # A compressed body has to go through `send`: hide the zero-copy extension from the app
+        extensions = {name: value for name, value in scope.get("extensions", {}).items() if name != "http.response.zerocopysend"}
+        scope = {**scope, "extensions": extensions}
+        compressor = None
+        started = False
+
+        async def send_compressed(message: Message):
+            nonlocal compressor, started
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=list(message["headers"]))
+                if should_compress(headers, message["status"]):
+                    compressor = create_compressor(encoding)
+                    del headers["content-length"]
+                    del headers["accept-ranges"]  # Ranges of the compressed body aren't served
+                    etag = headers.get("etag")
+                    if etag and not etag.startswith("W/"):
+                        headers["etag"] = f"W/{etag}"  # Not byte-identical to the identity representation
+                    headers["content-encoding"] = encoding
+                    headers.add_vary_header("Accept-Encoding")
+                    message = {**message, "headers": headers.raw}
+                started = True
+                await send(message)
+                return
+            if message["type"] != "http.response.body" or compressor is None or not started:
+                await send(message)
+                return
+
+            more_body = message.get("more_body", False)
+            body = message.get("body", b"")
+            if len(body) > CompressionConfig.INLINE_MAX_SIZE.value:
+                body = await run_in_threadpool(compressor.compress, body)
+            else:
+                body = compressor.compress(body)
+            if not more_body:
+                body += compressor.flush()
+            if body or not more_body:
+                await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
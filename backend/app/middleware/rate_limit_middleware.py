@@ -0,0 +1,223 @@
+import os
+import time
+import uuid
+from collections import OrderedDict
+from enum import Enum
+from starlette.responses import JSONResponse
+from starlette.routing import Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.routes.v1.services.redis_service import get_redis_client, get_redis_script
+
+log_prefix = "[RATE LIMIT]"
+
+'''
+**Rate Limiting / Load Shedding (Redis sliding window + local token lease)**
+- Limits are per route AND per client: `<limit>` requests per `<window>` seconds
+    - Routes with a rule (longest matching path prefix) share its bucket; every other route has its own `DEFAULT_RULE` bucket
+        - keyed by the route template (e.g. `/v1/redis/string/{key}`), so path parameters don't open new buckets
+        - paths that match no route share one bucket (`*`)
+- Redis: sliding window log (ZSET of request timestamps), checked and updated atomically by a Lua script
+    - The script uses Redis `TIME`, so the window is consistent across workers regardless of their clocks
+- Local pre-check (token lease): one Redis call reserves up to `LEASE_SIZE` slots of the window for this worker
+    - The following requests of the same client/route consume the leased tokens locally (no Redis call)
+    - Once denied, the client/route is rejected locally until `Retry-After` passes (no Redis call either)
+    - Leased tokens expire with the window they were reserved in
+- Over-limit requests get 429 from this ASGI middleware, before routing and before any body is read/parsed
+- Redis errors fail open (the request is allowed) so a Redis outage doesn't take the API down
+'''
+
+
+# =========================================================
+# Settings
+# =========================================================
+
+class RateLimitConfig(Enum):
+    ON = True if os.getenv('RATE_LIMIT_ON', 'False').lower() == 'true' else False
+    DEFAULT_RULE = os.getenv('RATE_LIMIT_DEFAULT', '100/1')  # <limit>/<window seconds> per client and route, for routes without a rule
+    # Comma separated `<path prefix>=<limit>/<window seconds>` per client (the longest matching prefix wins)
+    ROUTE_RULES = os.getenv(
+        'RATE_LIMIT_ROUTES',
+        '/v1/cryptography/hash/bcrypt=10/1,'
+        '/v1/cryptography/compare/bcrypt=10/1,'
+        '/v1/file/upload-to-s3=5/1,'
+        '/v1/file/multipart-upload-to-s3=2/1,'
+        '/v1/file/download-from-s3=10/1,'
+        '/v1/file/stream-download-from-s3=10/1'
+    )
+    EXEMPT_PATHS = os.getenv('RATE_LIMIT_EXEMPT_PATHS', '/health_check,/docs,/redoc,/openapi.json')
+    LEASE_SIZE = int(os.getenv('RATE_LIMIT_LEASE_SIZE', 10))  # Max slots reserved per Redis call (capped to 1/10 of the limit)
+    LOCAL_MAX_ENTRIES = int(os.getenv('RATE_LIMIT_LOCAL_MAX_ENTRIES', 10000))  # Local buckets kept per worker (LRU)
+    TRUST_FORWARDED_FOR = True if os.getenv('RATE_LIMIT_TRUST_FORWARDED_FOR', 'False').lower() == 'true' else False  # Behind a proxy/ALB
+    KEY_PREFIX = "rate_limit:"
+
+
+def parse_rule(rule: str) -> tuple[int, float]:
+    limit, window = rule.strip().split("/")
+    return int(limit), float(window)
+
+default_rule = parse_rule(RateLimitConfig.DEFAULT_RULE.value)
+route_rules = sorted(
+    (
+        (path.strip(), parse_rule(rule))
+        for path, rule in (item.split("=") for item in RateLimitConfig.ROUTE_RULES.value.split(",") if item.strip())
+    ),
+    key=lambda item: len(item[0]),
+    reverse=True
+)
+exempt_paths = {path.strip() for path in RateLimitConfig.EXEMPT_PATHS.value.split(",") if path.strip()}
+
+
+# =========================================================
+# Lua Script (Sliding Window)
+# =========================================================
+
+# KEYS: window zset / ARGV: window_ms, limit, requested, member prefix
+# return: {granted, retry_after_ms}
+LUA_SLIDING_WINDOW = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local window = tonumber(ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+local granted = math.min(tonumber(ARGV[3]), tonumber(ARGV[2]) - redis.call('ZCARD', KEYS[1]))
+if granted > 0 then
+    local args = {}
+    for i = 1, granted do
+        args[#args + 1] = now
+        args[#args + 1] = ARGV[4] .. i
+    end
+    redis.call('ZADD', KEYS[1], unpack(args))
+    redis.call('PEXPIRE', KEYS[1], window)
+    return {granted, 0}
+end
+local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+if oldest[2] then
+    return {0, math.max(1, tonumber(oldest[2]) + window - now)}
+end
+return {0, window}
+"""
+
+
+# =========================================================
+# Local Bucket (Token Lease)
+# =========================================================
+
+class LocalBucket:
+    def __init__(self):
+        self.tokens = 0
+        self.expires_at = 0.0
+        self.denied_until = 0.0
+
+worker_id = uuid.uuid4().hex[:8]
+local_buckets: OrderedDict = OrderedDict()  # rate limit key -> LocalBucket
+rate_limit_metrics = {"allowed_local": 0, "allowed_redis": 0, "denied_local": 0, "denied_redis": 0, "redis_errors": 0}
+request_seq = 0
+
+def get_rate_limit_metrics() -> dict:
+    checks = sum(rate_limit_metrics[name] for name in ("allowed_local", "allowed_redis", "denied_local", "denied_redis"))
+    return {
+        **rate_limit_metrics,
+        "on": RateLimitConfig.ON.value,
+        "local_ratio": (rate_limit_metrics["allowed_local"] + rate_limit_metrics["denied_local"]) / checks if checks else 0.0,
+        "local_buckets": len(local_buckets),
+    }
+
+def get_local_bucket(key: str) -> LocalBucket:
+    bucket = local_buckets.get(key)
+    if bucket is None:
+        bucket = LocalBucket()
+        local_buckets[key] = bucket
+        if len(local_buckets) > RateLimitConfig.LOCAL_MAX_ENTRIES.value:
+            local_buckets.popitem(last=False)
+    else:
+        local_buckets.move_to_end(key)
+    return bucket
+
+
+async def check_rate_limit(key: str, limit: int, window: float) -> float:
+    # return: 0 if allowed, otherwise seconds until the client may retry
+    global request_seq
+    bucket = get_local_bucket(key)
+    now = time.monotonic()
+    if bucket.denied_until > now:
+        rate_limit_metrics["denied_local"] += 1
+        return bucket.denied_until - now
+    if bucket.tokens > 0 and bucket.expires_at > now:
+        bucket.tokens -= 1
+        rate_limit_metrics["allowed_local"] += 1
+        return 0
+
+    request_seq += 1
+    lease_size = max(1, min(RateLimitConfig.LEASE_SIZE.value, limit // 10))
+    try:
+        redis_client = await get_redis_client()
+        granted, retry_after_ms = await get_redis_script(redis_client, LUA_SLIDING_WINDOW)(
+            keys=[key],
+            args=[int(window * 1000), limit, lease_size, f"{worker_id}:{request_seq}:"]
+        )
+    except Exception as e:
+        rate_limit_metrics["redis_errors"] += 1
+        print(f"{log_prefix} Redis check failed, allowing the request - error: {e}")
+        return 0
+
+    if granted > 0:
+        bucket.tokens = granted - 1
+        bucket.expires_at = now + window
+        rate_limit_metrics["allowed_redis"] += 1
+        return 0
+    bucket.denied_until = now + retry_after_ms / 1000
+    rate_limit_metrics["denied_redis"] += 1
+    return retry_after_ms / 1000
+
+
+# =========================================================
+# Middleware (ASGI)
+# =========================================================
+
+def get_client_id(scope: Scope) -> str:
+    if RateLimitConfig.TRUST_FORWARDED_FOR.value:
+        for name, value in scope.get("headers", []):
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def get_route_template(scope: Scope) -> str:
+    # Runs before routing: matches the app's routes the same way the router will (a method mismatch still names the route)
+    partial = "*"
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial == "*":
+            partial = route.path
+    return partial
+
+
+class RateLimitMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not RateLimitConfig.ON.value or scope["path"] in exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        rule_path, (limit, window) = next(
+            ((rule_path, rule) for rule_path, rule in route_rules if path.startswith(rule_path)),
+            (None, default_rule)
+        )
+        if rule_path is None:
+            rule_path = get_route_template(scope)
+        key = f"{RateLimitConfig.KEY_PREFIX.value}{rule_path}:{get_client_id(scope)}"
+        retry_after = await check_rate_limit(key, limit, window)
+        if retry_after > 0:
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "Too Many Requests"},
+                headers={"Retry-After": str(max(1, round(retry_after)))}
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
@@ -8,6 +8,9 @@ import base64
 import os
 import bcrypt
 from pydantic import BaseModel, Field
+from typing import Optional
+from ..services.key_registry_service import UnknownKeyIdError, key_registry
+from ..services.crypto_pool_service import CryptoPoolConfig, CryptoPoolFullError, run_crypto, get_crypto_pool_metrics
 
 
 router = APIRouter()
@@ -52,9 +55,24 @@ router = APIRouter()
         - If you remove the OAEP padding, the encryption will no longer have randomness, and the encrypted value will always be the same for the same input. This is because, without padding, the encryption is deterministic.
         - However, removing padding reduces security, as it makes the encryption vulnerable to attacks, so it's not recommended.
 
+4. CPU-heavy work (bcrypt, RSA private key operations) runs in a process pool (`crypto_pool_service`)
+    - The event loop stays free for other requests; when the pool's queue is full the request is rejected right away with 503.
+
 '''
     
 
+# =========================================================
+# Settings
+# =========================================================
+
+class CryptographyConfig(Enum):
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))  # Cost factor (4-31): every +1 doubles the hashing time
+
+# Checked on import (startup): out of range, every bcrypt hash would fail in `bcrypt.gensalt` (500)
+if not 4 <= CryptographyConfig.BCRYPT_ROUNDS.value <= 31:
+    raise ValueError(f"BCRYPT_ROUNDS must be between 4 and 31, got {CryptographyConfig.BCRYPT_ROUNDS.value}")
+
+
 # =========================================================
 # API Request
 # =========================================================
@@ -77,7 +95,7 @@ class EncryptSymmetricRequest(EncryptRequest):
 class EncryptSymmetricWithSaltRequest(EncryptSymmetricRequest):
     salt: str = Field(..., min_length=1)
 class EncryptAsymmetricRequest(EncryptRequest):
-    pass
+    kid: Optional[str] = Field(default=None)  # Key ID (default: the default key)
 
 # Decrpyt Request Params
 class DecryptRequest(BaseModel):
@@ -87,7 +105,7 @@ class DecryptSymmetricRequest(DecryptRequest):
 class DecryptSymmetricWithSaltRequest(DecryptSymmetricRequest):
     salt: str = Field(..., min_length=1)
 class DecryptAsymmetricRequest(DecryptRequest):
-    pass
+    kid: Optional[str] = Field(default=None)  # Key ID (default: the default key)
 
 
 # =========================================================
@@ -109,7 +127,7 @@ def sha256_hash(value: str) -> str:
 # Bcrypt uses salting by default. Every time you hash a password with Bcrypt, it automatically generates a unique salt and appends it to the hash.
 # Bcrypt internally uses the Blowfish encryption algorithm to generate the hash.
 def bcrypt_hash(value: str) -> str:
-    hashed_value = bcrypt.hashpw(value.encode(), bcrypt.gensalt())
+    hashed_value = bcrypt.hashpw(value.encode(), bcrypt.gensalt(rounds=CryptographyConfig.BCRYPT_ROUNDS.value))
     return hashed_value.decode()
 
 
@@ -135,19 +153,28 @@ async def sha256_endpoint(request: HashSha256Request):
 @router.post("/hash/bcrypt")
 async def bcrypt_endpoint(request: HashBryptRequest):
     try:
-        hashed_value = bcrypt_hash(request.value)
+        hashed_value = await run_crypto(bcrypt_hash, request.value)
         return {"hashed_value": hashed_value}
+    except CryptoPoolFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(CryptoPoolConfig.RETRY_AFTER.value)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/compare/bcrypt")
 async def bcrypt_compare_endpoint(request: HashBryptCompareRequest):
     try:
-        is_valid = bcrypt_compare(request.value, request.hashed_value)
+        is_valid = await run_crypto(bcrypt_compare, request.value, request.hashed_value)
         return {"is_valid": is_valid}
+    except CryptoPoolFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(CryptoPoolConfig.RETRY_AFTER.value)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Crypto Process Pool Metrics (queue depth, latency)
+@router.get("/pool/metrics", response_model=dict)
+async def crypto_pool_metrics_endpoint():
+    return get_crypto_pool_metrics()
+
 
 
 # =========================================================
@@ -265,14 +292,13 @@ async def aes256_decrypt_with_salt_endpoint(request: DecryptSymmetricWithSaltReq
 # =========================================================
 
 # RS256 Encryption
-# Params: value
+# Params: value, kid
 # return: encrypted_value
-def rs256_encrypt(value: str) -> str:
+def rs256_encrypt(value: str, kid: Optional[str] = None) -> str:
 
     # -------------------------------------
-    # Opt #1) With Public Key
-    with open("keys/public.pem", "rb") as key_file:
-        public_key = serialization.load_pem_public_key(key_file.read())
+    # Opt #1) With Public Key (parsed once by the key registry - 'keys/public.pem', 'keys/<kid>.public.pem')
+    public_key = key_registry.get_public_key(kid)
     encrypted = public_key.encrypt(
         value.encode(),
         asymmetric_padding.OAEP(
@@ -308,26 +334,20 @@ def rs256_encrypt(value: str) -> str:
 
 
 # RS256 Get Public Key
-# return: RS256 public key (from a file - 'key/private.pem')
-def rs256_get_public_key() -> str:
-    with open("keys/public.pem", "rb") as key_file:
-        public_key = key_file.read()
-    return public_key.decode()  # Return the public key as a string
+# Params: kid
+# return: RS256 public key (PEM - from a file 'keys/public.pem', 'keys/<kid>.public.pem')
+def rs256_get_public_key(kid: Optional[str] = None) -> str:
+    return key_registry.get(kid).public_pem  # Return the public key as a string
 
 
 # RS256 Decryption (encrypted with public key)
-# Params: encrypted_value
+# Params: encrypted_value, kid
 # return: decrypted_value
-def rs256_decrypt(encrypted_value: str) -> str:
+def rs256_decrypt(encrypted_value: str, kid: Optional[str] = None) -> str:
     encrypted_value = base64.b64decode(encrypted_value)
-    
-    with open("keys/private.pem", "rb") as key_file:
-        private_key = serialization.load_pem_private_key(key_file.read(), password=None)
-        '''
-         The password parameter is used to decrypt the private key if it is password-protected.
-            - If the private key is not protected by a password, you can pass None.
-            - If it is protected, provide the password as a bytes object (e.g., b"mypassword").
-        '''
+
+    # Parsed once by the key registry - 'keys/private.pem', 'keys/<kid>.private.pem' (RSA_PRIVATE_KEY_PASSWORD if password-protected)
+    private_key = key_registry.get_private_key(kid)
 
     decrypted_value = private_key.decrypt(
         encrypted_value,
@@ -347,23 +367,40 @@ def rs256_decrypt(encrypted_value: str) -> str:
 @router.post("/encrypt/rs256")
 async def rs256_encrypt_endpoint(request: EncryptAsymmetricRequest):
     try:
-        encrypted_value = rs256_encrypt(request.value)
+        encrypted_value = await run_crypto(rs256_encrypt, request.value, request.kid)
         return {"encrypted_value": encrypted_value}
+    except UnknownKeyIdError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except CryptoPoolFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(CryptoPoolConfig.RETRY_AFTER.value)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/public-key/rs256")
-async def rs256_get_public_key_endpoint():
+async def rs256_get_public_key_endpoint(kid: Optional[str] = None):
     try:
-        public_key = rs256_get_public_key()
+        public_key = rs256_get_public_key(kid)
         return {"public_key": public_key}
+    except UnknownKeyIdError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/kids/rs256")
+async def rs256_get_kids_endpoint():
+    try:
+        return {"kids": key_registry.kids()}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/decrypt/rs256")
 async def rs256_decrypt_endpoint(request: DecryptAsymmetricRequest):
     try:
-        decrypted_value = rs256_decrypt(request.encrypted_value)
+        decrypted_value = await run_crypto(rs256_decrypt, request.encrypted_value, request.kid)
         return {"decrypted_value": decrypted_value}
+    except UnknownKeyIdError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except CryptoPoolFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(CryptoPoolConfig.RETRY_AFTER.value)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -1,14 +1,21 @@
-import boto3
-import codecs
-import csv
-import io
 import os
-import pandas as pd
 from enum import Enum
-from fastapi import Path, APIRouter, HTTPException, UploadFile, File, Depends, Form
+from fastapi import Path, APIRouter, BackgroundTasks, HTTPException, UploadFile, File, Depends, Form, Request
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
+from typing import Optional
 import pathlib
+import uuid
+from starlette.datastructures import UploadFile as StarletteUploadFile
+from app.util.http_range_util import range_response, guess_media_type, file_etag, file_range_reader, open_file_range_reader
+from app.routes.v1.services.file_upload_service import receive_form, close_form, sanitize_filename, save_upload
+from app.routes.v1.services.csv_ingest_service import CsvIngestConfig, CsvIngestJob, ingest_jobs, add_ingest_job, ingest_csv
+from app.routes.v1.services.export_service import ExportConfig, ExportSource, ExportCompression, StreamReader, demo_source, mongodb_source, redis_source, encode_csv, encode_xlsx, encode_parquet, encode_arrow
+from app.routes.v1.services.redis_service import RedisValueType
+from app.routes.v1.services.s3_cache_service import S3CacheConfig, s3_cache
+from app.routes.v1.services.s3_dedup_service import upload_deduplicated
+from app.routes.v1.services.s3_presign_service import S3PresignConfig, presign_put, presign_get, create_presigned_multipart, complete_presigned_multipart, record_object, get_object_record
+from app.routes.v1.services.s3_service import S3Config, s3_client, bucket_name, run_s3, iter_s3_object, iter_s3_ranges, upload_multipart, is_s3_not_found, is_s3_upload_not_found, is_s3_invalid_part
 
 router = APIRouter()
 
@@ -17,21 +24,20 @@ router = APIRouter()
 # Settings
 # =========================================================
 
-# S3 Client Setting
-s3_client = boto3.client('s3')
-bucket_name = os.getenv("AWS_S3_BUCKET_NAME", 'jonas-fastapi-master')  # Replace it to your real bucket 
-
 # File Type
 class FileType(Enum):
-    CSV         = ("CSV",           ".csv")
-    EXCEL       = ("EXCEL",         ".xlsx")
-    POWERPOINT  = ("POWERPOINT",    ".pptx")
+    CSV         = ("CSV",           ".csv",     "text/csv")
+    EXCEL       = ("EXCEL",         ".xlsx",    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    POWERPOINT  = ("POWERPOINT",    ".pptx",    "application/vnd.openxmlformats-officedocument.presentationml.presentation")
+    PARQUET     = ("PARQUET",       ".parquet", "application/vnd.apache.parquet")
+    ARROW       = ("ARROW",         ".arrow",   "application/vnd.apache.arrow.file")
 
-    def __new__(cls, key, extension):
+    def __new__(cls, key, extension, media_type):
         obj = object.__new__(cls)
         obj._value_ = key  # Use _value_ for the key
         obj.key = key
         obj.extension = extension
+        obj.media_type = media_type
         return obj
     
 
@@ -48,8 +54,43 @@ class FileDownloadChunkFromS3Request(FileDownloadChunkRequest):
 class FileStreamingDownloadChunkFromS3Request(FileDownloadChunkRequest):
     pass
 
-class FileGenerateCsvRequest(FileDownloadChunkRequest):
-    pandas: bool = Field(default=False)
+class FileGenerateRequest(FileDownloadChunkRequest):
+    pandas: bool = Field(default=False)  # CSV only
+    source: ExportSource = Field(default=ExportSource.DEMO)
+    rows: int = Field(default=3, ge=0, le=10_000_000)  # DEMO only
+    value_type: RedisValueType = Field(default=RedisValueType.STRING)  # REDIS only
+    compression: Optional[ExportCompression] = Field(default=None)  # PARQUET (default: SNAPPY), ARROW (default: NONE; LZ4, ZSTD only)
+
+class FileGenerateCsvRequest(FileGenerateRequest):
+    pass
+
+class FileGenerateToS3Request(FileGenerateRequest):
+    s3_path: str = Field(..., min_length=1, max_length=500)
+
+class FilePresignedUploadRequest(BaseModel):
+    s3_path: str = Field(..., min_length=1, max_length=500)
+    content_type: Optional[str] = Field(default=None, max_length=255)  # The client has to send the same Content-Type
+    expires_in: int = Field(default=S3PresignConfig.EXPIRES_IN.value, ge=1, le=S3PresignConfig.MAX_EXPIRES_IN.value)
+
+class FilePresignedMultipartUploadRequest(FilePresignedUploadRequest):
+    size: int = Field(..., ge=0)  # Bytes of the whole file
+    part_size: int = Field(default=8 * 1024 * 1024, ge=S3Config.MULTIPART_MIN_PART_SIZE.value, le=S3Config.MULTIPART_MAX_PART_SIZE.value)
+
+class FilePresignedPart(BaseModel):
+    part_number: int = Field(..., ge=1, le=S3Config.MULTIPART_MAX_PARTS.value)
+    etag: str = Field(..., min_length=1)  # ETag header of the part upload
+
+class FilePresignedUploadCompleteRequest(BaseModel):
+    s3_path: str = Field(..., min_length=1, max_length=500)
+    upload_id: Optional[str] = Field(default=None)  # Multipart only
+    parts: list[FilePresignedPart] = Field(default=[])  # Multipart only
+
+class FilePresignedMultipartAbortRequest(BaseModel):
+    s3_path: str = Field(..., min_length=1, max_length=500)
+    upload_id: str = Field(..., min_length=1)
+
+class FilePresignedDownloadRequest(BaseModel):
+    expires_in: int = Field(default=S3PresignConfig.EXPIRES_IN.value, ge=1, le=S3PresignConfig.MAX_EXPIRES_IN.value)
 
 
 # =========================================================
@@ -60,288 +101,493 @@ class FileUploadResponse(BaseModel):
     status: str
     filename: str
 
+class FileUploadToDiskResponse(FileUploadResponse):
+    size: int
+    sha256: str
+
 class FileUploadToS3Response(FileUploadResponse):
     s3_path: str
 
+class FileUploadToS3DedupResponse(FileUploadToS3Response):
+    sha256: str
+    deduplicated: bool  # The content was already in S3: copied server-side instead of uploaded
+
+class FileIngestCsvError(BaseModel):
+    row: int  # 1-based data row (the header isn't counted)
+    error: str
+
+class FileIngestCsvResponse(BaseModel):
+    job_id: str
+    filename: str
+    status: str
+    bytes_total: int
+    bytes_read: int
+    progress: float
+    rows_read: int
+    inserted: int
+    failed: int
+    errors: list[FileIngestCsvError]
+    errors_truncated: bool
+    detail: Optional[str]
+    started_at: float
+    finished_at: Optional[float]
+
+class FilePresignedUrlResponse(BaseModel):
+    s3_path: str
+    method: str
+    url: str
+    expires_in: int
+
+class FilePresignedPartUrl(BaseModel):
+    part_number: int
+    url: str
+
+class FilePresignedMultipartUploadResponse(BaseModel):
+    s3_path: str
+    upload_id: str
+    part_size: int
+    parts: list[FilePresignedPartUrl]  # PUT each part to its URL and keep the ETag response header
+    expires_in: int
+
+class FileS3ObjectResponse(BaseModel):
+    s3_path: str
+    size: int
+    etag: str
+    content_type: Optional[str]
+    recorded_at: float
+
 
 # =========================================================
 # File Upload
 # =========================================================
 
+MULTIPART_FILE_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"multipart/form-data": {"schema": {
+            "type": "object",
+            "required": ["file"],
+            "properties": {"file": {"type": "string", "format": "binary"}}
+        }}}
+    }
+}
+
 # Common File Upload
-@router.post("/upload", response_model=FileUploadResponse)
-async def file_upload(file: UploadFile = File(...)):
+# The body is parsed in the route (not with `File(...)`) so the size limit applies while it's being received
+@router.post("/upload", response_model=FileUploadToDiskResponse, openapi_extra=MULTIPART_FILE_REQUEST_BODY)
+async def file_upload(request: Request):
+    form = await receive_form(request)
     try:
-        with open(file.filename, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        return FileUploadResponse(
+        file = form.get("file")
+        if not isinstance(file, StarletteUploadFile):
+            raise HTTPException(status_code=400, detail="The `file` field is required.")
+        filename = sanitize_filename(file.filename)
+        size, sha256 = await save_upload(file.file, filename)
+        return FileUploadToDiskResponse(
             status="File uploaded successfully",
-            filename=file.filename
+            filename=filename,
+            size=size,
+            sha256=sha256
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        await form.close()
 
 # File Upload to S3
-@router.post("/upload-to-s3", response_model=FileUploadToS3Response)
+@router.post("/upload-to-s3", response_model=FileUploadToS3DedupResponse)
 async def file_upload_to_s3(file: UploadFile = File(...), s3_path: str = Form(..., min_length=1, max_length=500)):
     try:
-        # Upload Files to S3
-        s3_client.upload_fileobj(Fileobj=file.file, Bucket=bucket_name, Key=s3_path)
-        return FileUploadToS3Response(
+        # Upload Files to S3 (skipped if the same content is already there)
+        deduplicated, sha256 = await upload_deduplicated(
+            file.file,
+            s3_path,
+            lambda metadata: run_s3(s3_client.upload_fileobj, Fileobj=file.file, Bucket=bucket_name, Key=s3_path, ExtraArgs={"Metadata": metadata})
+        )
+        s3_cache.invalidate(s3_path)  # Overwritten: drop the local copy
+        return FileUploadToS3DedupResponse(
             status="File uploaded to S3 successfully",
             filename=file.filename,
-            s3_path=s3_path
+            s3_path=s3_path,
+            sha256=sha256,
+            deduplicated=deduplicated
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # File Multipart Upload to S3
-@router.post("/multipart-upload-to-s3", response_model=FileUploadToS3Response)
+@router.post("/multipart-upload-to-s3", response_model=FileUploadToS3DedupResponse)
 async def file_multipart_upload_to_s3(file: UploadFile = File(...), s3_path: str = Form(..., min_length=1, max_length=500), chunk_size: int = 5 * 1024 * 1024):
+    # validate chunk size (S3 rejects parts smaller than 5MiB, except the last one)
+    if chunk_size < S3Config.MULTIPART_MIN_PART_SIZE.value:
+        raise HTTPException(status_code=400, detail=f"chunk_size must be at least {S3Config.MULTIPART_MIN_PART_SIZE.value} bytes (5MiB).")
+    # a part is read into memory: at most the in-flight memory cap (and the S3 maximum of 5GiB)
+    max_chunk_size = min(S3Config.MULTIPART_MAX_IN_FLIGHT_BYTES.value, S3Config.MULTIPART_MAX_PART_SIZE.value)
+    if chunk_size > max_chunk_size:
+        raise HTTPException(status_code=400, detail=f"chunk_size must be at most {max_chunk_size} bytes.")
+    if file.size is not None and file.size > chunk_size * S3Config.MULTIPART_MAX_PARTS.value:
+        raise HTTPException(status_code=400, detail=f"chunk_size is too small for the file. S3 allows up to {S3Config.MULTIPART_MAX_PARTS.value} parts.")
+
     try:
-        # Initiate Multipart Upload
-        response = s3_client.create_multipart_upload(Bucket=bucket_name, Key=s3_path)
-        upload_id = response["UploadId"]
-
-        parts = []
-        part_number = 1
-
-        while True:
-            # Read the file in chunks
-            chunk = await file.read(chunk_size)
-            if not chunk:
-                break
-
-            # Upload the chunk as a part
-            response = s3_client.upload_part(
-                Bucket=bucket_name,
-                Key=s3_path,
-                PartNumber=part_number,
-                UploadId=upload_id,
-                Body=io.BytesIO(chunk)  # Convert chunk to stream
-            )
-
-            # Store part information
-            parts.append({"ETag": response["ETag"], "PartNumber": part_number})
-            part_number += 1
-
-        # Complete Multipart Upload
-        s3_client.complete_multipart_upload(
-            Bucket=bucket_name,
-            Key=s3_path,
-            UploadId=upload_id,
-            MultipartUpload={"Parts": parts}
+        # Upload the chunks as parts concurrently (aborted on failure), skipped if the same content is already there
+        deduplicated, sha256 = await upload_deduplicated(
+            file.file,
+            s3_path,
+            lambda metadata: upload_multipart(file.read, s3_path, chunk_size, metadata=metadata)
         )
+        s3_cache.invalidate(s3_path)  # Overwritten: drop the local copy
 
-        return FileUploadToS3Response(
+        return FileUploadToS3DedupResponse(
             status="File uploaded to S3 successfully",
             filename=file.filename,
-            s3_path=s3_path
+            s3_path=s3_path,
+            sha256=sha256,
+            deduplicated=deduplicated
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# =========================================================
+# CSV Ingest (MongoDB)
+# =========================================================
+
+# Ingest a CSV into the `items` collection: the rows are loaded by a background task (progress: `/ingest-csv/{job_id}`)
+@router.post("/ingest-csv", response_model=FileIngestCsvResponse, status_code=202, openapi_extra=MULTIPART_FILE_REQUEST_BODY)
+async def file_ingest_csv(request: Request, background_tasks: BackgroundTasks):
+    form = await receive_form(request, CsvIngestConfig.MAX_SIZE.value)
+    job = None
+    try:
+        file = form.get("file")
+        if not isinstance(file, StarletteUploadFile):
+            raise HTTPException(status_code=400, detail="The `file` field is required.")
+        filename = sanitize_filename(file.filename)
+        if pathlib.Path(filename).suffix.casefold() != FileType.CSV.extension:
+            raise HTTPException(status_code=400, detail="Invalid file extension. Only .csv files are allowed.")
+
+        if file.size > CsvIngestConfig.MAX_SIZE.value:
+            raise HTTPException(status_code=413, detail=f"File too large. The limit is {CsvIngestConfig.MAX_SIZE.value} bytes.")
+
+        # The job takes over the spooled form file (no copy): it isn't closed when this request ends
+        job = CsvIngestJob(str(uuid.uuid4()), filename, file.file, file.size)
+        add_ingest_job(job)
+        background_tasks.add_task(ingest_csv, job)
+        return job.to_dict()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        await close_form(form, keep=form.get("file") if job is not None else None)
+
+# CSV Ingest Progress
+@router.get("/ingest-csv/{job_id}", response_model=FileIngestCsvResponse)
+async def file_ingest_csv_progress(job_id: str):
+    job = ingest_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
 # =========================================================
 # File Download
 # =========================================================
 
 # Common File Download
 @router.get("/download/{filename}")
-async def file_download(filename: str):
-    try:
-        def iter_file():
-            with open(filename, "rb") as file:
-                yield from file
-
-        return StreamingResponse(
-            iter_file(),
-            media_type="application/octet-stream"
-        )
-    except FileNotFoundError:
+async def file_download(filename: str, request: Request):
+    if not os.path.isfile(filename):
         raise HTTPException(status_code=404, detail="File not found")
+    stat_result = os.stat(filename)
+    return range_response(
+        request.headers,
+        stat_result.st_size,
+        file_etag(stat_result),
+        file_range_reader(filename),
+        media_type=guess_media_type(filename),
+        file_path=filename
+    )
 
 
 # Chunk File Download
 @router.get("/download-in-chunk/{filename}")
-async def file_download_in_chunk(filename: str, query: FileDownloadChunkRequest = Depends()): # 1MB chunks
-    try:
-        def iter_file():
-            with open(filename, "rb") as file:
-                while chunk := file.read(query.chunk_size):
-                    yield chunk
-
-        return StreamingResponse(iter_file(), media_type="application/octet-stream")
-    except FileNotFoundError:
+async def file_download_in_chunk(filename: str, request: Request, query: FileDownloadChunkRequest = Depends()): # 1MB chunks
+    if not os.path.isfile(filename):
         raise HTTPException(status_code=404, detail="File not found")
+    stat_result = os.stat(filename)
+    return range_response(
+        request.headers,
+        stat_result.st_size,
+        file_etag(stat_result),
+        file_range_reader(filename, query.chunk_size),
+        media_type=guess_media_type(filename),
+        file_path=filename,
+        chunk_size=query.chunk_size
+    )
 
 
 # File Download from S3
 @router.get("/download-from-s3/{filename}")
-async def file_download_from_s3(filename: str):
+async def file_download_from_s3(filename: str, request: Request):
     try:
-        # Get Files from S3
-        s3_object = s3_client.get_object(Bucket=bucket_name, Key=filename)
-        return StreamingResponse(s3_object['Body'], media_type="application/octet-stream")
-    except s3_client.exceptions.NoSuchKey:
-        raise HTTPException(status_code=404, detail="File not found in S3")
+        if S3CacheConfig.ON.value:
+            # Served from the local disk cache (filled on a miss); objects too large to be cached go to S3 as below
+            cached = await s3_cache.open_entry(filename)
+            if cached is not None:
+                entry, file, hit = cached
+                response = range_response(
+                    request.headers, entry.size, entry.etag, open_file_range_reader(file), media_type=guess_media_type(filename), file=file
+                )
+                if hit:
+                    s3_cache.record_served(int(response.headers.get("content-length", 0)))
+                return response
+        # Get the size and ETag of the object (Ranges are mapped onto a ranged `get_object`)
+        head_response = await run_s3(s3_client.head_object, Bucket=bucket_name, Key=filename)
+        etag = head_response['ETag']
+        return range_response(
+            request.headers,
+            head_response['ContentLength'],
+            etag,
+            lambda start, end: iter_s3_object(filename, start, end, etag=etag),
+            media_type=guess_media_type(filename)
+        )
+    except HTTPException:
+        raise
     except Exception as e:
+        if is_s3_not_found(e):
+            raise HTTPException(status_code=404, detail="File not found in S3")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # Download File from S3 in chunks
 @router.get("/download-from-s3-in-chunk/{filename}")
-async def file_download_from_s3_in_chunk(filename: str, query: FileDownloadChunkFromS3Request = Depends()):
+async def file_download_from_s3_in_chunk(filename: str, request: Request, query: FileDownloadChunkFromS3Request = Depends()):
     try:
-        # Get Files from S3
-        s3_object = s3_client.get_object(Bucket=bucket_name, Key=filename)
+        head_response = await run_s3(s3_client.head_object, Bucket=bucket_name, Key=filename)
+        etag = head_response['ETag']
         # Stream the file in chunks
-        def iterfile():
-            for chunk in s3_object['Body'].iter_chunks(query.chunk_size):
-                yield chunk
-        return StreamingResponse(iterfile(), media_type="application/octet-stream")
-    except s3_client.exceptions.NoSuchKey:
-        raise HTTPException(status_code=404, detail="File not found in S3")
+        return range_response(
+            request.headers,
+            head_response['ContentLength'],
+            etag,
+            lambda start, end: iter_s3_object(filename, start, end, query.chunk_size, etag),
+            media_type=guess_media_type(filename)
+        )
+    except HTTPException:
+        raise
     except Exception as e:
+        if is_s3_not_found(e):
+            raise HTTPException(status_code=404, detail="File not found in S3")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # File Streaming Download from S3 in chunks
 @router.get("/stream-download-from-s3-in-chunk/{filename}")
-async def file_stream_download_from_s3_in_chunk(filename: str, query: FileStreamingDownloadChunkFromS3Request = Depends()):
+async def file_stream_download_from_s3_in_chunk(filename: str, request: Request, query: FileStreamingDownloadChunkFromS3Request = Depends()):
+    try:
+        # Get the size of the object (before the response starts, so a missing file is still a 404)
+        head_response = await run_s3(s3_client.head_object, Bucket=bucket_name, Key=filename)
+        etag = head_response['ETag']
+
+        # Stream ranges of the object with several ranged requests in flight (yielded in order)
+        return range_response(
+            request.headers,
+            head_response['ContentLength'],
+            etag,
+            lambda start, end: iter_s3_ranges(filename, start, end, query.chunk_size, etag),
+            media_type=guess_media_type(filename)
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        if is_s3_not_found(e):
+            raise HTTPException(status_code=404, detail="File not found in S3")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# =========================================================
+# Presigned Direct-to-S3 Transfer
+# =========================================================
+
+# Presigned URL to upload a file to S3 with a single PUT (report it to `/presigned-upload/complete` when done)
+@router.post("/presigned-upload-url", response_model=FilePresignedUrlResponse)
+async def file_presigned_upload_url(body: FilePresignedUploadRequest):
+    try:
+        url = presign_put(body.s3_path, body.content_type, body.expires_in)
+        return FilePresignedUrlResponse(s3_path=body.s3_path, method="PUT", url=url, expires_in=body.expires_in)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Presigned multipart upload: a URL per part (complete it with `/presigned-upload/complete`)
+@router.post("/presigned-multipart-upload", response_model=FilePresignedMultipartUploadResponse)
+async def file_presigned_multipart_upload(body: FilePresignedMultipartUploadRequest):
+    if body.size > body.part_size * S3Config.MULTIPART_MAX_PARTS.value:
+        raise HTTPException(status_code=400, detail=f"part_size is too small for the size. S3 allows up to {S3Config.MULTIPART_MAX_PARTS.value} parts.")
+    try:
+        upload_id, parts = await create_presigned_multipart(body.s3_path, body.size, body.part_size, body.content_type, body.expires_in)
+        return FilePresignedMultipartUploadResponse(
+            s3_path=body.s3_path,
+            upload_id=upload_id,
+            part_size=body.part_size,
+            parts=parts,
+            expires_in=body.expires_in
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Abort a presigned multipart upload (the uploaded parts are deleted)
+@router.post("/presigned-multipart-upload/abort")
+async def file_presigned_multipart_abort(body: FilePresignedMultipartAbortRequest):
+    try:
+        await run_s3(s3_client.abort_multipart_upload, Bucket=bucket_name, Key=body.s3_path, UploadId=body.upload_id)
+        return {"status": "Multipart upload aborted", "s3_path": body.s3_path}
+    except Exception as e:
+        if is_s3_upload_not_found(e):
+            raise HTTPException(status_code=404, detail="Multipart upload not found")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Completion callback of a presigned upload: completes a multipart upload, verifies the object and records it
+@router.post("/presigned-upload/complete", response_model=FileS3ObjectResponse)
+async def file_presigned_upload_complete(body: FilePresignedUploadCompleteRequest):
+    if body.upload_id is not None and not body.parts:
+        raise HTTPException(status_code=400, detail="parts are required to complete a multipart upload.")
     try:
-        def stream_s3_file(bucket_name: str, object_key: str):
-            # Get the size of the object
-            head_response = s3_client.head_object(Bucket=bucket_name, Key=object_key)
-            file_size = head_response['ContentLength']
-
-            # Set the chunk size (e.g., 5MB)
-            chunk_size = query.chunk_size
-
-            # Start position
-            start = 0
-
-            while start < file_size:
-                # Calculate the end position
-                end = min(start + chunk_size - 1, file_size - 1)
-
-                # Request only the specific range from S3
-                range_header = f"bytes={start}-{end}"
-                response = s3_client.get_object(Bucket=bucket_name, Key=object_key, Range=range_header)
-                
-                # Get the response body
-                body = response['Body']
-                chunk = body.read()  # Read chunk data
-                
-                # Stream the data to the client
-                yield chunk
-
-                # Update the start position for the next chunk
-                start += chunk_size
-
-        return StreamingResponse(stream_s3_file(bucket_name=bucket_name, object_key=filename), media_type="application/octet-stream")
-    except s3_client.exceptions.NoSuchKey:
-        raise HTTPException(status_code=404, detail="File not found in S3")
+        if body.upload_id is not None:
+            await complete_presigned_multipart(body.s3_path, body.upload_id, [part.dict() for part in body.parts])
+        record = await record_object(body.s3_path)
+        s3_cache.invalidate(body.s3_path)  # Overwritten: drop the local copy
+        return FileS3ObjectResponse(**record)
     except Exception as e:
+        if is_s3_not_found(e):
+            raise HTTPException(status_code=404, detail="File not found in S3. Upload it before reporting completion.")
+        if is_s3_upload_not_found(e):
+            raise HTTPException(status_code=404, detail="Multipart upload not found")
+        if is_s3_invalid_part(e):
+            raise HTTPException(status_code=400, detail=str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
+# Recorded object (reported with `/presigned-upload/complete`)
+@router.get("/s3-object/{s3_path:path}", response_model=FileS3ObjectResponse)
+async def file_s3_object(s3_path: str):
+    record = await get_object_record(s3_path)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Object not recorded")
+    return FileS3ObjectResponse(**record)
+
+# Presigned URL to download a file from S3 directly (Range requests are served by S3)
+@router.get("/presigned-download-url/{filename}", response_model=FilePresignedUrlResponse)
+async def file_presigned_download_url(filename: str, query: FilePresignedDownloadRequest = Depends()):
+    try:
+        # A missing object is a 404 here rather than an error from S3 later
+        await run_s3(s3_client.head_object, Bucket=bucket_name, Key=filename)
+        url = presign_get(filename, os.path.basename(filename), query.expires_in)
+        return FilePresignedUrlResponse(s3_path=filename, method="GET", url=url, expires_in=query.expires_in)
+    except Exception as e:
+        if is_s3_not_found(e):
+            raise HTTPException(status_code=404, detail="File not found in S3")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# =========================================================
+# S3 Disk Cache API
+# =========================================================
+
+@router.get("/s3-cache/metrics", response_model=dict)
+async def get_s3_cache_metrics():
+    return s3_cache.get_metrics()
+
 
 # =========================================================
 # Generate Files
 # =========================================================
 
+GENERATE_FILENAME_REGEX = r"^[\w,\s-]+\.[A-Za-z]{3,7}$"
+
+def validate_generate_filename(filename: str, file_types: tuple[FileType, ...]) -> FileType:
+    # validate filename length
+    file_extension = pathlib.Path(filename).suffix.casefold()
+    if len(filename) <= len(file_extension):
+        raise HTTPException(status_code=400, detail="Filename too short. It must be longer than the extension.")
+
+    # validate file extension name
+    file_type = next((file_type for file_type in file_types if file_type.extension == file_extension), None)
+    if file_type is None:
+        extensions = ", ".join(file_type.extension for file_type in file_types)
+        raise HTTPException(status_code=400, detail=f"Invalid file extension. Only {extensions} files are allowed.")
+    return file_type
+
+def generate_file(file_type: FileType, query: FileGenerateRequest):
+    # return: stream of the encoded file
+    if query.source == ExportSource.MONGODB:
+        data = mongodb_source()
+    elif query.source == ExportSource.REDIS:
+        data = redis_source(query.value_type)
+    else:
+        data = demo_source(query.rows)
+
+    if file_type == FileType.EXCEL:
+        return encode_xlsx(data, query.chunk_size)
+    if file_type == FileType.PARQUET:
+        return encode_parquet(data, query.compression or ExportCompression.SNAPPY)
+    if file_type == FileType.ARROW:
+        return encode_arrow(data, query.compression or ExportCompression.NONE)
+    return encode_csv(data, query.pandas)
+
+def validate_compression(file_type: FileType, compression: Optional[ExportCompression]):
+    if compression is None:
+        return
+    if file_type not in (FileType.PARQUET, FileType.ARROW):
+        raise HTTPException(status_code=400, detail="compression is only supported for .parquet and .arrow files.")
+    if file_type == FileType.ARROW and compression not in (ExportCompression.NONE, ExportCompression.LZ4, ExportCompression.ZSTD):
+        raise HTTPException(status_code=400, detail="Arrow files only support NONE, LZ4 and ZSTD compression.")
+
+GENERATE_FILE_TYPES = (FileType.CSV, FileType.EXCEL, FileType.PARQUET, FileType.ARROW)
+
+
 # File Generate CSV
 @router.get("/generate-csv/{filename}")
 async def file_generate_csv(
-    filename: str = Path(..., regex=r"^[\w,\s-]+\.[A-Za-z]{3}$"),
+    filename: str = Path(..., regex=GENERATE_FILENAME_REGEX),
     query: FileGenerateCsvRequest = Depends()
 ):
-    # validate filename length
-    if len(filename) <= 4:
-        raise HTTPException(status_code=400, detail="Filename too short. It must be longer than the extension.")
+    file_type = validate_generate_filename(filename, (FileType.CSV,))
+    validate_compression(file_type, query.compression)
+    return StreamingResponse(generate_file(file_type, query), media_type=file_type.media_type)
 
-    # validate file extension name
-    file_extension = pathlib.Path(filename).suffix.casefold()
-    if file_extension != FileType.CSV.extension:
-        raise HTTPException(status_code=400, detail="Invalid file extension. Only .csv files are allowed.")
-    
-    # writer
-    output = io.BytesIO()
-    # writer = csv.writer(io.TextIOWrapper(output, newline='', encoding='utf-8')) # This doesn't work for all characters "WHEN YOU OPEN THE FILE USING EXCEL"
-    StreamWriter = codecs.getwriter('utf-8-sig')
-    wrapper_file = StreamWriter(output)
-    writer = csv.writer(wrapper_file)
-
-    # chunk read generator
-    def iter_file_chunks():
-        
-        # chunk read generator) data
-        headers = ["이름", "Age", "City"] # "이름" means "Name" to see if the utf-8 character works "WHEN YOU OPEN THE FILE USING EXCEL"
-        rows = [
-            {
-                headers[0]: "A",
-                headers[1]: 30,
-                headers[2]: "Los Angeles"
-            },
-            {
-                headers[0]: "B",
-                headers[1]: 24,
-                headers[2]: "Seoul"
-            },
-            {
-                headers[0]: "C",
-                headers[1]: 40,
-                headers[2]: "Paris"
-            }
-        ]
-        
-        # Max read line cnt
-        max_read_line_cnt = 2
-
-        # csv
-        if not query.pandas:
-
-            # The `output` using StringIO doesn't work for all characters "WHEN YOU OPEN THE FILE USING EXCEL"
-            # output = io.StringIO()
-            # writer = csv.writer(output)
-
-            print("[CSV - `csv`] generating a csv file with csv lib ...")
-            data = [headers]
-
-            for row in rows:
-                data_row = []
-                for header in headers:
-                    data_row.append(row.get(header))
-                data.append(data_row)
-            
-            for i in range(0, len(data), max_read_line_cnt):
-                writer.writerows(data[i:i+max_read_line_cnt])
-                output.seek(0)
-                yield output.read(query.chunk_size)
-                output.seek(0)
-                output.truncate(0)
-        
-        # pandas
-        else:
-            print("[CSV - `pandas`] generating a csv file with pandas lib ...")
-            data = {}
-            
-            for header in headers:
-                data_row = []
-                for row in rows:
-                    data_row.append(row.get(header))
-                data[header] = data_row
-            
-            df = pd.DataFrame(data)
-
-            for i in range(0, len(df), max_read_line_cnt):
-                df.iloc[i:i+max_read_line_cnt].to_csv(output, index=False, header=i==0, encoding='utf-8-sig') # headers only for the first chunk
-                output.seek(0)
-                yield output.read(query.chunk_size)
-                output.seek(0)
-                output.truncate(0)
+
+# File Generate (CSV, XLSX, PARQUET, ARROW)
+@router.get("/generate/{filename}")
+async def file_generate(
+    filename: str = Path(..., regex=GENERATE_FILENAME_REGEX),
+    query: FileGenerateRequest = Depends()
+):
+    file_type = validate_generate_filename(filename, GENERATE_FILE_TYPES)
+    validate_compression(file_type, query.compression)
+    return StreamingResponse(
+        generate_file(file_type, query),
+        media_type=file_type.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+# File Generate (CSV, XLSX, PARQUET, ARROW) to S3
+@router.post("/generate-to-s3/{filename}", response_model=FileUploadToS3Response)
+async def file_generate_to_s3(
+    filename: str = Path(..., regex=GENERATE_FILENAME_REGEX),
+    query: FileGenerateToS3Request = Depends()
+):
+    file_type = validate_generate_filename(filename, GENERATE_FILE_TYPES)
+    validate_compression(file_type, query.compression)
     try:
-        return StreamingResponse(iter_file_chunks(), media_type="text/csv")
-    except FileNotFoundError:
-        raise HTTPException(status_code=500, detail="Internal Server Error")
\ No newline at end of file
+        # Encoded bytes go to S3 part by part (bounded by the parts in flight)
+        await upload_multipart(StreamReader(generate_file(file_type, query)).read, query.s3_path, ExportConfig.S3_PART_SIZE.value)
+        s3_cache.invalidate(query.s3_path)  # Overwritten: drop the local copy
+        return FileUploadToS3Response(
+            status="File generated to S3 successfully",
+            filename=filename,
+            s3_path=query.s3_path
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -3,8 +3,10 @@ from typing import Tuple
 from fastapi import APIRouter, HTTPException, Depends, Header
 from pydantic import BaseModel, Field
 from typing import Optional
-from jose import jwt
+from jose import jwk, jwt
 import datetime
+import os
+from ..services.key_registry_service import KeyRegistryConfig, UnknownKeyIdError, key_registry
 
 router = APIRouter()
 
@@ -30,12 +32,29 @@ class JwtApiResponseParams(Enum):
     STATUS = "status"
     DETAIL = "detail"
 
-# Read the private key and public key from files
-with open('keys/private.pem') as f:
-    PRIVATE_KEY = f.read()
-
-with open('keys/public.pem') as f:
-    PUBLIC_KEY = f.read()
+# The private key and public key come from the key registry ('keys/private.pem', 'keys/<kid>.private.pem', ...)
+# - parsed once (not per token), reloaded when the files change
+# - the key ID is in the token header (`kid`), so tokens signed with a rotated-out key are still verified while its file exists
+JWT_SIGNING_KID = os.getenv('JWT_SIGNING_KID') or KeyRegistryConfig.DEFAULT_KID.value
+
+jwt_signing_keys: dict = {}  # kid -> (RsaKey, python-jose key): python-jose takes the private key as PEM, parsed once per key
+
+def get_signing_key():
+    rsa_key = key_registry.get(JWT_SIGNING_KID)
+    cached = jwt_signing_keys.get(rsa_key.kid)
+    if cached is None or cached[0] is not rsa_key:  # Reloaded
+        if rsa_key.private_pem is None:
+            raise UnknownKeyIdError(f"No private key for key ID: '{rsa_key.kid}'")
+        cached = (rsa_key, jwk.construct(rsa_key.private_pem, JwtAlgorithmType.RS256.value))
+        jwt_signing_keys[rsa_key.kid] = cached
+    return cached[1]
+
+def get_verification_key(token: str):
+    kid = jwt.get_unverified_header(token).get("kid")
+    try:
+        return key_registry.get_public_key(kid)
+    except UnknownKeyIdError:
+        raise jwt.JWTError("Unknown key ID.")
     
 
 # =========================================================
@@ -64,7 +83,12 @@ def generate_token_logic(id: str, exp: datetime) -> str:
         JwtParams.USER_ID.value: id,
         JwtParams.EXP.value: exp
     }
-    return jwt.encode(payload, PRIVATE_KEY, algorithm=JwtAlgorithmType.RS256.value)
+    return jwt.encode(
+        payload,
+        get_signing_key(),
+        algorithm=JwtAlgorithmType.RS256.value,
+        headers={"kid": JWT_SIGNING_KID}
+    )
     
 
 
@@ -77,7 +101,7 @@ def verify_token(request:VerifyTokenRequest):
 
 def verify_token_logic(token: str):
     try:
-        decoded_payload = jwt.decode(token, PUBLIC_KEY, algorithms=[JwtAlgorithmType.RS256.value])
+        decoded_payload = jwt.decode(token, get_verification_key(token), algorithms=[JwtAlgorithmType.RS256.value])
         return {JwtApiResponseParams.DECODED_PAYLOAD.value: decoded_payload}
     except jwt.ExpiredSignatureError:
         raise HTTPException(status=401, detail="Signature has expired.")
@@ -88,7 +112,7 @@ def verify_token_logic(token: str):
 
 def verify_token_logic_for_websocket(token: str) -> Tuple[bool, dict]:
     try:
-        decoded_payload = jwt.decode(token, PUBLIC_KEY, algorithms=[JwtAlgorithmType.RS256.value])
+        decoded_payload = jwt.decode(token, get_verification_key(token), algorithms=[JwtAlgorithmType.RS256.value])
         return True, decoded_payload
     except jwt.ExpiredSignatureError:
         return False, {JwtApiResponseParams.STATUS.value: 401, JwtApiResponseParams.DETAIL.value: "Signature has expired."}
@@ -1,31 +1,15 @@
-import os
 from fastapi import APIRouter, HTTPException, Path
-from pydantic import BaseModel, Field
-from typing import Optional
-from motor.motor_asyncio import AsyncIOMotorClient
+from pydantic import Field
 from bson import ObjectId
+from app.routes.v1.services.mongodb_service import ItemModel, collection
 
 router = APIRouter()
 
-# =========================================================
-# MongoDB Settings
-# =========================================================
-
-MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017')
-client = AsyncIOMotorClient(MONGO_URI)
-db = client["jonas-fastapi-master"]  # Replace with your DB name
-collection = db["items"]  # Replace with your collection name
-
 
 # =========================================================
 # Pydantic Models
 # =========================================================
 
-class ItemModel(BaseModel):
-    name: str = Field(...)
-    description: Optional[str] = Field(None)
-    price: float = Field(...)
-
 class ItemResponse(ItemModel):
     id: str = Field(...)
 
@@ -1,10 +1,18 @@
-import os
-import redis
+import base64
+import binascii
+import json
+import redis.asyncio as aioredis
 from enum import Enum
-from fastapi import APIRouter, HTTPException, Path, Depends
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, HTTPException, Path, Depends, Query, Header
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, constr, validator
 from typing import Optional
-import threading
+from ..services.redis_service import get_redis_client, get_redis_script, read_values, RedisValueType
+from ..services.redis_lock_service import get_lock_metrics
+from ..services.redis_pubsub_service import redis_subscriber, RedisPubSubConfig
+from ..services.redis_near_cache_service import near_cache, read_through
+from ..services.redis_codec_service import encode_value, decode_value, RAW_READ
+from app.middleware.rate_limit_middleware import get_rate_limit_metrics
 
 router = APIRouter()
 log_prefix = "[REDIS]"
@@ -14,29 +22,95 @@ log_prefix = "[REDIS]"
 # Settings
 # =========================================================
 
-redis_client = redis.StrictRedis(
-    host=os.getenv('REDIS_HOST', 'host.docker.internal'), # replace to the host of Redis service
-    # host=os.getenv('REDIS_HOST', '127.0.0.1'), # If it's local
-    port=int(os.getenv('REDIS_PORT', 6379)),
-    db=int(os.getenv('REDIS_DB_INDEX', 0)), # db index (up to 15)
-    decode_responses=True if os.getenv('REDIS_DECODE_RESPONSES', 'True') == 'True' else False # True: string to UTF-8 (str type in python)
-)
+# Redis Client (asyncio, shared bounded connection pool): See `services/redis_service.py`
 
-LOCK_TIMEOUT = 5
+LUA_BATCH_SIZE = 1000 # Max arguments unpacked per Redis call inside Lua scripts (Lua has a limited C stack for `unpack`)
+BATCH_MAX_KEYS = 1000 # Max keys per value type in a single batch request
+PUBSUB_KEEPALIVE_INTERVAL = 15 # Seconds between keep-alive comments on idle streams
+SCAN_COUNT = 100 # Default SCAN COUNT hint (keys examined per call, NOT a page size guarantee)
+SCAN_MAX_COUNT = 1000
+EXPORT_SCAN_COUNT = 500 # Keys fetched per pipelined batch in the export stream
 
-# Redis Value Type
-class RedisValueType(Enum):
-    STRING      = ("STRING",    "string:",      "lock_string_")
-    SET         = ("SET",       "set:",         "lock_set_")
-    HASH        = ("HASH",      "hash:",        "lock_hash")
+# Opaque cursor (clients must pass back `next_cursor` as is, never build one)
+def encode_cursor(cursor: int) -> str:
+    return base64.urlsafe_b64encode(str(cursor).encode()).decode()
 
-    def __new__(cls, key, key_prefix, lock_prefix):
-        obj = object.__new__(cls)
-        obj._value_ = key  # Use _value_ for the key
-        obj.key = key
-        obj.key_prefix = key_prefix
-        obj.lock_prefix = lock_prefix
-        return obj
+def decode_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+# =========================================================
+# Lua Scripts (Atomic Writes)
+# =========================================================
+'''
+- Create/Update of a set or hash used to take 5+ round trips: EXISTS -> lock acquire -> SADD/HSET (per member) -> EXPIRE -> lock release
+- Each script below runs the existence check, the write and the TTL atomically on the Redis server in one round trip (no client-side lock)
+    - KEYS[1]: actual key
+    - ARGV[1]: mode ('NX': create only if the key doesn't exist, 'XX': replace only if the key exists)
+    - ARGV[2]: ttl in seconds (0: no expiration)
+    - ARGV[3]: batch size (members/fields per SADD/HSET call)
+    - ARGV[4...]: set members / hash field-value pairs
+    - return: 1 (written), 0 (condition not met)
+- Strings don't need a script: `SET key value NX|XX EX ttl` is already atomic
+'''
+
+LUA_WRITE_SET = """
+local exists = redis.call('EXISTS', KEYS[1])
+if (ARGV[1] == 'NX' and exists == 1) or (ARGV[1] == 'XX' and exists == 0) then
+    return 0
+end
+if ARGV[1] == 'XX' then
+    redis.call('DEL', KEYS[1])
+end
+local batch_size = tonumber(ARGV[3])
+for i = 4, #ARGV, batch_size do
+    redis.call('SADD', KEYS[1], unpack(ARGV, i, math.min(i + batch_size - 1, #ARGV)))
+end
+if tonumber(ARGV[2]) > 0 then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 1
+"""
+
+LUA_WRITE_HASH = """
+local exists = redis.call('EXISTS', KEYS[1])
+if (ARGV[1] == 'NX' and exists == 1) or (ARGV[1] == 'XX' and exists == 0) then
+    return 0
+end
+if ARGV[1] == 'XX' then
+    redis.call('DEL', KEYS[1])
+end
+local batch_size = tonumber(ARGV[3]) * 2
+for i = 4, #ARGV, batch_size do
+    redis.call('HSET', KEYS[1], unpack(ARGV, i, math.min(i + batch_size - 1, #ARGV)))
+end
+if tonumber(ARGV[2]) > 0 then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 1
+"""
+
+class RedisWriteMode(Enum):
+    CREATE = "NX"
+    REPLACE = "XX"
+
+async def write_set(redis_client: aioredis.Redis, actual_key: str, members: list, ttl: Optional[int], mode: RedisWriteMode) -> bool:
+    script = get_redis_script(redis_client, LUA_WRITE_SET)
+    result = await script(keys=[actual_key], args=[mode.value, ttl or 0, LUA_BATCH_SIZE, *members])
+    return result == 1
+
+async def write_hash(redis_client: aioredis.Redis, actual_key: str, fields: dict, ttl: Optional[int], mode: RedisWriteMode) -> bool:
+    script = get_redis_script(redis_client, LUA_WRITE_HASH)
+    args = [mode.value, ttl or 0, LUA_BATCH_SIZE]
+    for field, value in fields.items():
+        args.extend((field, value))
+    result = await script(keys=[actual_key], args=args)
+    return result == 1
 
 
 # =========================================================
@@ -44,7 +118,7 @@ class RedisValueType(Enum):
 # =========================================================
 
 class RedisRequest(BaseModel):
-    ttl: Optional[int] = Field(None)
+    ttl: Optional[int] = Field(None, ge=1) # Seconds (None: no expiration)
 
 class RedisStringRequest(RedisRequest):
     value: str = Field(...)
@@ -55,10 +129,38 @@ class RedisSetRequest(RedisRequest):
 class RedisHashRequest(RedisRequest):
     fields: dict = Field(...)
 
+class RedisBatchGetRequest(BaseModel):
+    strings: list[constr(min_length=1)] = Field(default=[], max_items=BATCH_MAX_KEYS)
+    sets: list[constr(min_length=1)] = Field(default=[], max_items=BATCH_MAX_KEYS)
+    hashes: list[constr(min_length=1)] = Field(default=[], max_items=BATCH_MAX_KEYS)
+
+class RedisBatchStringRequest(RedisRequest):
+    values: dict[constr(min_length=1), str] = Field(...)
+
+    @validator("values")
+    def validate_values(cls, values):
+        if not values or len(values) > BATCH_MAX_KEYS:
+            raise ValueError(f"values must have 1 to {BATCH_MAX_KEYS} keys")
+        return values
+
+class RedisScanRequest(BaseModel):
+    cursor: Optional[str] = Field(None)
+    count: int = Field(default=SCAN_COUNT, ge=1, le=SCAN_MAX_COUNT)
+
+class RedisCollectionScanRequest(RedisScanRequest):
+    match: Optional[str] = Field(None, min_length=1) # Glob-style pattern of members/fields
+
+class RedisSetMembershipRequest(BaseModel):
+    members: list[str] = Field(..., min_items=1, max_items=BATCH_MAX_KEYS)
+
 class PubSubMessage(BaseModel):
     channel: str = Field(...)
     message: str = Field(...)
 
+class PubSubMessagesRequest(BaseModel):
+    cursor: int = Field(default=0, ge=0)
+    limit: int = Field(default=RedisPubSubConfig.READ_LIMIT.value, ge=1, le=RedisPubSubConfig.BUFFER_SIZE.value)
+
 
 # =========================================================
 # API Response
@@ -77,20 +179,64 @@ class RedisSetResponse(RedisResponse):
 class RedisHashResponse(RedisResponse):
     fields: Optional[dict] = Field(None)
 
+class RedisBatchStringResponse(RedisStringResponse):
+    hit: bool = Field(...)
+
+class RedisBatchSetResponse(RedisSetResponse):
+    hit: bool = Field(...)
+
+class RedisBatchHashResponse(RedisHashResponse):
+    hit: bool = Field(...)
+
+class RedisBatchGetResponse(BaseModel):
+    status: str = Field(...)
+    strings: list[RedisBatchStringResponse] = Field(default=[])
+    sets: list[RedisBatchSetResponse] = Field(default=[])
+    hashes: list[RedisBatchHashResponse] = Field(default=[])
+
+class RedisBatchWriteResponse(RedisResponse):
+    written: bool = Field(...)
+
+class RedisSetScanResponse(RedisSetResponse):
+    next_cursor: Optional[str] = Field(None) # None: the scan is complete
+
+class RedisHashScanResponse(RedisHashResponse):
+    next_cursor: Optional[str] = Field(None) # None: the scan is complete
+
+class RedisCountResponse(RedisResponse):
+    count: int = Field(...)
+
+class RedisSetMembershipResponse(RedisResponse):
+    members: dict[str, bool] = Field(...)
+
+class RedisKeysResponse(BaseModel):
+    status: str = Field(...)
+    value_type: RedisValueType = Field(...)
+    keys: list[str] = Field(...)
+    next_cursor: Optional[str] = Field(None) # None: the scan is complete
+
 class PubSubResponse(BaseModel):
     status: str = Field(...)
     channel: str = Field(...)
     message: str = Field(...)
 
+class PubSubMessagesResponse(BaseModel):
+    status: str = Field(...)
+    channel: str = Field(...)
+    messages: list = Field(...)
+    next_cursor: int = Field(...)
+    dropped: int = Field(...) # Messages evicted from the buffer since the cursor (missed)
+
 
 # =========================================================
 # Redis String API
 # =========================================================
 
 @router.get("/string/{key}", response_model=RedisStringResponse)
-async def get_string(key: str = Path(..., min_length=1)):
+async def get_string(key: str = Path(..., min_length=1), redis_client: aioredis.Redis = Depends(get_redis_client)):
     actual_key = RedisValueType.STRING.key_prefix + key
-    value = redis_client.get(actual_key)
+    # Near cache (opt-in): See `services/redis_near_cache_service.py`, Value codec: See `services/redis_codec_service.py`
+    value = await read_through(redis_client, actual_key, 'GET', decode_value, **RAW_READ)
     if value is not None:
         return RedisStringResponse (
             status="success",
@@ -103,24 +249,14 @@ async def get_string(key: str = Path(..., min_length=1)):
 @router.post("/string/{key}", response_model=RedisStringResponse)
 async def add_string(
     request: RedisStringRequest,
-    key: str = Path(..., min_length=1)
+    key: str = Path(..., min_length=1),
+    redis_client: aioredis.Redis = Depends(get_redis_client)
 ):
     actual_key = RedisValueType.STRING.key_prefix + key
-    if redis_client.exists(actual_key):
+    # SET NX EX: existence check, write and TTL in one atomic command
+    if not await redis_client.set(actual_key, encode_value(request.value), nx=True, ex=request.ttl or None):
         raise HTTPException(status_code=400, detail="Key already exists")
-    
-    lock_key = RedisValueType.STRING.lock_prefix + key
-    lock = redis_client.lock(lock_key, timeout=LOCK_TIMEOUT)
-    if lock.acquire(blocking=True): # blocking=True means it will wait for the turn (But unlike Reddison in Java, it doesn't use queuing system, just all the process competes to acquire the lock)
-        try:
-            redis_client.set(actual_key, request.value)
-
-            if request.ttl:
-                redis_client.expire(actual_key, request.ttl)
-        finally:
-            lock.release()
-    else:
-        raise HTTPException(status_code=429, detail="Could not acquire lock, try again later")
+    near_cache.invalidate(actual_key)
 
     return RedisStringResponse(
         status="success",
@@ -132,23 +268,14 @@ async def add_string(
 @router.put("/string/{key}", response_model=RedisStringResponse)
 async def update_string(
     request: RedisStringRequest,
-    key: str = Path(..., min_length=1)
+    key: str = Path(..., min_length=1),
+    redis_client: aioredis.Redis = Depends(get_redis_client)
 ):
     actual_key = RedisValueType.STRING.key_prefix + key
-    if not redis_client.exists(actual_key):
+    # SET XX EX: only overwrites an existing key, in one atomic command
+    if not await redis_client.set(actual_key, encode_value(request.value), xx=True, ex=request.ttl or None):
         raise HTTPException(status_code=404, detail="Key not found")
-    
-    lock_key = RedisValueType.STRING.lock_prefix + key
-    lock = redis_client.lock(lock_key, timeout=LOCK_TIMEOUT)
-    if lock.acquire(blocking=True): # blocking=True means it will wait for the turn (But unlike Reddison in Java, it doesn't use queuing system, just all the process competes to acquire the lock)
-        try:
-            redis_client.set(actual_key, request.value)
-            if request.ttl:
-                redis_client.expire(actual_key, request.ttl)
-        finally:
-            lock.release()
-    else:
-        raise HTTPException(status_code=429, detail="Could not acquire lock, try again later")
+    near_cache.invalidate(actual_key)
     
     return RedisStringResponse(
         status="success",
@@ -158,19 +285,12 @@ async def update_string(
 
 
 @router.delete("/string/{key}", response_model=RedisStringResponse)
-async def delete_string(key: str = Path(..., min_length=1)):
+async def delete_string(key: str = Path(..., min_length=1), redis_client: aioredis.Redis = Depends(get_redis_client)):
     actual_key = RedisValueType.STRING.key_prefix + key
-    
-    lock_key = RedisValueType.STRING.lock_prefix + key
-
-    lock = redis_client.lock(lock_key, timeout=LOCK_TIMEOUT)
-    if lock.acquire(blocking=True): # blocking=True means it will wait for the turn (But unlike Reddison in Java, it doesn't use queuing system, just all the process competes to acquire the lock)
-        try:
-            result = redis_client.delete(actual_key)
-        finally:
-            lock.release()
-    else:
-        raise HTTPException(status_code=429, detail="Could not acquire lock, try again later")
+
+    # DEL is atomic: no lock needed (writes are single commands / Lua scripts as well)
+    result = await redis_client.delete(actual_key)
+    near_cache.invalidate(actual_key)
     
     if result > 0:
         return RedisStringResponse(
@@ -185,9 +305,9 @@ async def delete_string(key: str = Path(..., min_length=1)):
 # =========================================================
 
 @router.get("/set/{key}", response_model=RedisSetResponse)
-async def get_set(key: str = Path(..., min_length=1)):
+async def get_set(key: str = Path(..., min_length=1), redis_client: aioredis.Redis = Depends(get_redis_client)):
     actual_key = RedisValueType.SET.key_prefix + key
-    members = redis_client.smembers(actual_key)
+    members = await read_through(redis_client, actual_key, 'SMEMBERS')
     if members:
         return RedisSetResponse(
             status="success",
@@ -200,25 +320,13 @@ async def get_set(key: str = Path(..., min_length=1)):
 @router.post("/set/{key}", response_model=RedisSetResponse)
 async def add_set(
     request: RedisSetRequest,
-    key: str = Path(..., min_length=1)
+    key: str = Path(..., min_length=1),
+    redis_client: aioredis.Redis = Depends(get_redis_client)
 ):
     actual_key = RedisValueType.SET.key_prefix + key
-    if redis_client.exists(actual_key):
+    if not await write_set(redis_client, actual_key, request.members, request.ttl, RedisWriteMode.CREATE):
         raise HTTPException(status_code=400, detail="Key already exists")
-
-    lock_key = RedisValueType.SET.lock_prefix + key
-    lock = redis_client.lock(lock_key, timeout=LOCK_TIMEOUT)
-    if lock.acquire(blocking=True): # blocking=True means it will wait for the turn (But unlike Reddison in Java, it doesn't use queuing system, just all the process competes to acquire the lock)
-        try:
-            for member in request.members:
-                redis_client.sadd(actual_key, member)
-
-            if request.ttl:
-                redis_client.expire(actual_key, request.ttl)
-        finally:
-            lock.release()
-    else:
-        raise HTTPException(status_code=429, detail="Could not acquire lock, try again later")
+    near_cache.invalidate(actual_key)
 
     return RedisSetResponse(
         status="success",
@@ -230,25 +338,13 @@ async def add_set(
 @router.put("/set/{key}", response_model=RedisSetResponse)
 async def update_set(
     request: RedisSetRequest,
-    key: str = Path(..., min_length=1)
+    key: str = Path(..., min_length=1),
+    redis_client: aioredis.Redis = Depends(get_redis_client)
 ):
     actual_key = RedisValueType.SET.key_prefix + key
-    if not redis_client.exists(actual_key):
+    if not await write_set(redis_client, actual_key, request.members, request.ttl, RedisWriteMode.REPLACE):
         raise HTTPException(status_code=404, detail="Key not found")
-    
-    lock_key = RedisValueType.SET.lock_prefix + key
-    lock = redis_client.lock(lock_key, timeout=LOCK_TIMEOUT)
-    if lock.acquire(blocking=True): # blocking=True means it will wait for the turn (But unlike Reddison in Java, it doesn't use queuing system, just all the process competes to acquire the lock)
-        try:
-            redis_client.delete(actual_key)
-            redis_client.sadd(actual_key, *request.members)
-
-            if request.ttl:
-                redis_client.expire(actual_key, request.ttl)
-        finally:
-            lock.release()
-    else:
-        raise HTTPException(status_code=429, detail="Could not acquire lock, try again later")
+    near_cache.invalidate(actual_key)
 
     return RedisSetResponse(
         status="success",
@@ -258,18 +354,12 @@ async def update_set(
 
 
 @router.delete("/set/{key}", response_model=RedisSetResponse)
-async def delete_set(key: str = Path(..., min_length=1)):
+async def delete_set(key: str = Path(..., min_length=1), redis_client: aioredis.Redis = Depends(get_redis_client)):
     actual_key = RedisValueType.SET.key_prefix + key
-    
-    lock_key = RedisValueType.SET.lock_prefix + key
-    lock = redis_client.lock(lock_key, timeout=LOCK_TIMEOUT)
-    if lock.acquire(blocking=True): # blocking=True means it will wait for the turn (But unlike Reddison in Java, it doesn't use queuing system, just all the process competes to acquire the lock)
-        try:
-            result = redis_client.delete(actual_key)
-        finally:
-            lock.release()
-    else:
-        raise HTTPException(status_code=429, detail="Could not acquire lock, try again later")
+
+    # DEL is atomic: no lock needed (writes are single commands / Lua scripts as well)
+    result = await redis_client.delete(actual_key)
+    near_cache.invalidate(actual_key)
     
     if result > 0:
         return RedisSetResponse(
@@ -279,15 +369,55 @@ async def delete_set(key: str = Path(..., min_length=1)):
     raise HTTPException(status_code=404, detail="Key not found")
 
 
+# --------------
+# Large Sets (read incrementally instead of SMEMBERS, which returns the whole set at once)
+@router.get("/set/{key}/scan", response_model=RedisSetScanResponse)
+async def scan_set(key: str = Path(..., min_length=1), query: RedisCollectionScanRequest = Depends(), redis_client: aioredis.Redis = Depends(get_redis_client)):
+    actual_key = RedisValueType.SET.key_prefix + key
+    cursor = decode_cursor(query.cursor)
+    next_cursor, members = await redis_client.sscan(actual_key, cursor=cursor, match=query.match, count=query.count)
+    if not cursor and not next_cursor and not members and not await redis_client.exists(actual_key):
+        raise HTTPException(status_code=404, detail="Key not found")
+    return RedisSetScanResponse(
+        status="success",
+        key=key,
+        members=members,
+        next_cursor=encode_cursor(next_cursor) if next_cursor else None
+    )
+
+
+@router.get("/set/{key}/count", response_model=RedisCountResponse)
+async def count_set(key: str = Path(..., min_length=1), redis_client: aioredis.Redis = Depends(get_redis_client)):
+    count = await redis_client.scard(RedisValueType.SET.key_prefix + key)
+    if not count:
+        raise HTTPException(status_code=404, detail="Key not found")
+    return RedisCountResponse(status="success", key=key, count=count)
+
+
+# Membership check of many members in one round trip (SMISMEMBER, Redis 6.2+)
+@router.post("/set/{key}/is-member", response_model=RedisSetMembershipResponse)
+async def check_set_members(
+    request: RedisSetMembershipRequest,
+    key: str = Path(..., min_length=1),
+    redis_client: aioredis.Redis = Depends(get_redis_client)
+):
+    results = await redis_client.smismember(RedisValueType.SET.key_prefix + key, request.members)
+    return RedisSetMembershipResponse(
+        status="success",
+        key=key,
+        members={member: bool(result) for member, result in zip(request.members, results)}
+    )
+
+
 
 # =========================================================
 # Redis Hash API
 # =========================================================
 
 @router.get("/hash/{key}", response_model=RedisHashResponse)
-async def get_hash(key: str = Path(..., min_length=1)):
+async def get_hash(key: str = Path(..., min_length=1), redis_client: aioredis.Redis = Depends(get_redis_client)):
     actual_key = RedisValueType.HASH.key_prefix + key
-    fields = redis_client.hgetall(actual_key)
+    fields = await read_through(redis_client, actual_key, 'HGETALL')
     if fields:
         return RedisHashResponse(
             status="success",
@@ -300,24 +430,13 @@ async def get_hash(key: str = Path(..., min_length=1)):
 @router.post("/hash/{key}", response_model=RedisHashResponse)
 async def add_hash(
     request: RedisHashRequest,
-    key: str = Path(..., min_length=1)
+    key: str = Path(..., min_length=1),
+    redis_client: aioredis.Redis = Depends(get_redis_client)
 ):
     actual_key = RedisValueType.HASH.key_prefix + key
-    if redis_client.exists(actual_key):
+    if not await write_hash(redis_client, actual_key, request.fields, request.ttl, RedisWriteMode.CREATE):
         raise HTTPException(status_code=400, detail="Key already exists")
-    
-    lock_key = RedisValueType.HASH.lock_prefix + key
-    lock = redis_client.lock(lock_key, timeout=LOCK_TIMEOUT)
-    if lock.acquire(blocking=True): # blocking=True means it will wait for the turn (But unlike Reddison in Java, it doesn't use queuing system, just all the process competes to acquire the lock)
-        try:
-            redis_client.hmset(actual_key,request.fields)
-            
-            if request.ttl:
-                redis_client.expire(actual_key, request.ttl)
-        finally:
-            lock.release()
-    else:
-        raise HTTPException(status_code=429, detail="Could not acquire lock, try again later")
+    near_cache.invalidate(actual_key)
 
     return RedisHashResponse(
         status="success",
@@ -329,25 +448,13 @@ async def add_hash(
 @router.put("/hash/{key}", response_model=RedisHashResponse)
 async def update_hash(
     request: RedisHashRequest,
-    key: str = Path(..., min_length=1)
+    key: str = Path(..., min_length=1),
+    redis_client: aioredis.Redis = Depends(get_redis_client)
 ):
     actual_key = RedisValueType.HASH.key_prefix + key
-    if not redis_client.exists(actual_key):
+    if not await write_hash(redis_client, actual_key, request.fields, request.ttl, RedisWriteMode.REPLACE):
         raise HTTPException(status_code=404, detail="Key not found")
-    
-    lock_key = RedisValueType.HASH.lock_prefix + key
-    lock = redis_client.lock(lock_key, timeout=LOCK_TIMEOUT)
-    if lock.acquire(blocking=True): # blocking=True means it will wait for the turn (But unlike Reddison in Java, it doesn't use queuing system, just all the process competes to acquire the lock)
-        try:
-            redis_client.delete(actual_key)
-            redis_client.hmset(actual_key, request.fields)
-
-            if request.ttl:
-                redis_client.expire(actual_key, request.ttl)
-        finally:
-            lock.release()
-    else:
-        raise HTTPException(status_code=429, detail="Could not acquire lock, try again later")
+    near_cache.invalidate(actual_key)
 
     return RedisHashResponse(
         status="success",
@@ -357,18 +464,12 @@ async def update_hash(
     
 
 @router.delete("/hash/{key}", response_model=RedisHashResponse)
-async def delete_hash(key: str = Path(..., min_length=1)):
+async def delete_hash(key: str = Path(..., min_length=1), redis_client: aioredis.Redis = Depends(get_redis_client)):
     actual_key = RedisValueType.HASH.key_prefix + key
-    
-    lock_key = RedisValueType.HASH.lock_prefix + key
-    lock = redis_client.lock(lock_key, timeout=LOCK_TIMEOUT)
-    if lock.acquire(blocking=True): # blocking=True means it will wait for the turn (But unlike Reddison in Java, it doesn't use queuing system, just all the process competes to acquire the lock)
-        try:
-            result = redis_client.delete(actual_key)
-        finally:
-            lock.release()
-    else:
-        raise HTTPException(status_code=429, detail="Could not acquire lock, try again later")
+
+    # DEL is atomic: no lock needed (writes are single commands / Lua scripts as well)
+    result = await redis_client.delete(actual_key)
+    near_cache.invalidate(actual_key)
     
     if result > 0:
         return RedisHashResponse(
@@ -377,37 +478,262 @@ async def delete_hash(key: str = Path(..., min_length=1)):
         )
     raise HTTPException(status_code=404, detail="Key not found")
 
+# --------------
+# Large Hashes (read incrementally or only the needed fields instead of HGETALL)
+@router.get("/hash/{key}/scan", response_model=RedisHashScanResponse)
+async def scan_hash(key: str = Path(..., min_length=1), query: RedisCollectionScanRequest = Depends(), redis_client: aioredis.Redis = Depends(get_redis_client)):
+    actual_key = RedisValueType.HASH.key_prefix + key
+    cursor = decode_cursor(query.cursor)
+    next_cursor, fields = await redis_client.hscan(actual_key, cursor=cursor, match=query.match, count=query.count)
+    if not cursor and not next_cursor and not fields and not await redis_client.exists(actual_key):
+        raise HTTPException(status_code=404, detail="Key not found")
+    return RedisHashScanResponse(
+        status="success",
+        key=key,
+        fields=fields,
+        next_cursor=encode_cursor(next_cursor) if next_cursor else None
+    )
+
+
+@router.get("/hash/{key}/count", response_model=RedisCountResponse)
+async def count_hash(key: str = Path(..., min_length=1), redis_client: aioredis.Redis = Depends(get_redis_client)):
+    count = await redis_client.hlen(RedisValueType.HASH.key_prefix + key)
+    if not count:
+        raise HTTPException(status_code=404, detail="Key not found")
+    return RedisCountResponse(status="success", key=key, count=count)
+
+
+# Field projection (HMGET): missing fields are returned as null, 404 only when the hash itself doesn't exist
+@router.get("/hash/{key}/fields", response_model=RedisHashResponse)
+async def get_hash_fields(
+    key: str = Path(..., min_length=1),
+    fields: list[str] = Query(..., min_items=1, max_items=BATCH_MAX_KEYS),
+    redis_client: aioredis.Redis = Depends(get_redis_client)
+):
+    actual_key = RedisValueType.HASH.key_prefix + key
+    values = await redis_client.hmget(actual_key, fields)
+    # HMGET can't tell a missing key from missing fields: EXISTS only in that case (one round trip otherwise)
+    if all(value is None for value in values) and not await redis_client.exists(actual_key):
+        raise HTTPException(status_code=404, detail="Key not found")
+    return RedisHashResponse(
+        status="success",
+        key=key,
+        fields=dict(zip(fields, values))
+    )
+
+
+
+# =========================================================
+# Redis Batch API
+# =========================================================
+'''
+- Resolves many keys of each value type in ONE pipelined round trip (instead of one HTTP + one Redis round trip per key)
+    - strings: a single MGET
+    - sets/hashes: SMEMBERS/HGETALL per key, queued in the same pipeline
+- Keys are given without the value type prefix (`RedisValueType.key_prefix` is applied here), and each key reports `hit`
+'''
+
+@router.post("/batch/get", response_model=RedisBatchGetResponse)
+async def batch_get(request: RedisBatchGetRequest, redis_client: aioredis.Redis = Depends(get_redis_client)):
+    async with redis_client.pipeline(transaction=False) as pipe:
+        if request.strings:
+            pipe.execute_command("MGET", *[RedisValueType.STRING.key_prefix + key for key in request.strings], **RAW_READ)
+        for key in request.sets:
+            pipe.smembers(RedisValueType.SET.key_prefix + key)
+        for key in request.hashes:
+            pipe.hgetall(RedisValueType.HASH.key_prefix + key)
+        results = await pipe.execute() if len(pipe) else []
+
+    values = [decode_value(value) for value in results.pop(0)] if request.strings else []
+    set_results, hash_results = results[:len(request.sets)], results[len(request.sets):]
+    return RedisBatchGetResponse(
+        status="success",
+        strings=[
+            RedisBatchStringResponse(status="success", key=key, value=value, hit=value is not None)
+            for key, value in zip(request.strings, values)
+        ],
+        sets=[
+            RedisBatchSetResponse(status="success", key=key, members=list(members) if members else None, hit=bool(members))
+            for key, members in zip(request.sets, set_results)
+        ],
+        hashes=[
+            RedisBatchHashResponse(status="success", key=key, fields=fields or None, hit=bool(fields))
+            for key, fields in zip(request.hashes, hash_results)
+        ]
+    )
+
+
+# Create strings (only the keys that don't exist yet: SET NX EX per key, in one pipeline)
+@router.post("/batch/string", response_model=list[RedisBatchWriteResponse])
+async def batch_add_string(request: RedisBatchStringRequest, redis_client: aioredis.Redis = Depends(get_redis_client)):
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for key, value in request.values.items():
+            pipe.set(RedisValueType.STRING.key_prefix + key, encode_value(value), nx=True, ex=request.ttl or None)
+        results = await pipe.execute()
+
+    return [
+        RedisBatchWriteResponse(status="success", key=key, written=bool(result))
+        for key, result in zip(request.values, results)
+    ]
+
+
+# Create or overwrite strings (MSET + EXPIRE per key, atomically in one MULTI/EXEC round trip)
+@router.put("/batch/string", response_model=list[RedisBatchWriteResponse])
+async def batch_set_string(request: RedisBatchStringRequest, redis_client: aioredis.Redis = Depends(get_redis_client)):
+    actual_values = {RedisValueType.STRING.key_prefix + key: encode_value(value) for key, value in request.values.items()}
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.mset(actual_values)
+        if request.ttl:
+            for actual_key in actual_values:
+                pipe.expire(actual_key, request.ttl)
+        await pipe.execute()
+    for actual_key in actual_values:
+        near_cache.invalidate(actual_key)
+
+    return [
+        RedisBatchWriteResponse(status="success", key=key, written=True)
+        for key in request.values
+    ]
+
+
+# =========================================================
+# Redis Key Listing/Export API (SCAN)
+# =========================================================
+'''
+- `KEYS` blocks Redis while it walks the whole keyspace, so listing uses `SCAN ... MATCH <key_prefix>*` instead
+    - A page may hold fewer (even zero) keys than `count` while `next_cursor` is not null; keep reading until it is null
+    - Keys may appear more than once across pages (SCAN guarantee), and keys changed during the scan may or may not appear
+- The export streams NDJSON (one `{"key", "value"}` per line): one SCAN batch + one pipelined value fetch at a time (constant memory)
+'''
+
+@router.get("/keys/{value_type}", response_model=RedisKeysResponse)
+async def list_keys(value_type: RedisValueType, query: RedisScanRequest = Depends(), redis_client: aioredis.Redis = Depends(get_redis_client)):
+    cursor, actual_keys = await redis_client.scan(cursor=decode_cursor(query.cursor), match=value_type.key_prefix + "*", count=query.count)
+    return RedisKeysResponse(
+        status="success",
+        value_type=value_type,
+        keys=[actual_key[len(value_type.key_prefix):] for actual_key in actual_keys],
+        next_cursor=encode_cursor(cursor) if cursor else None
+    )
+
+
+@router.get("/export/{value_type}")
+async def export_keys(value_type: RedisValueType, redis_client: aioredis.Redis = Depends(get_redis_client)):
+    async def iter_lines():
+        cursor = None
+        while cursor != 0:
+            cursor, actual_keys = await redis_client.scan(cursor=cursor or 0, match=value_type.key_prefix + "*", count=EXPORT_SCAN_COUNT)
+            if not actual_keys:
+                continue
+            # Keys deleted between SCAN and the fetch are left out
+            lines = [
+                json.dumps({
+                    "key": actual_key[len(value_type.key_prefix):],
+                    "value": list(value) if isinstance(value, set) else value
+                }, ensure_ascii=False) + "\n"
+                for actual_key, value in await read_values(redis_client, value_type, actual_keys)
+            ]
+            if lines:
+                yield "".join(lines)
+
+    return StreamingResponse(iter_lines(), media_type="application/x-ndjson")
+
+
+# =========================================================
+# Redis Near Cache API
+# =========================================================
+
+@router.get("/near-cache/metrics", response_model=dict)
+async def get_near_cache_metrics():
+    return near_cache.get_metrics()
+
+
+# =========================================================
+# Redis Lock API
+# =========================================================
+
+@router.get("/lock/metrics", response_model=dict)
+async def get_lock_contention_metrics():
+    return get_lock_metrics()
+
+
+# =========================================================
+# Rate Limit API
+# =========================================================
+
+# Counters of this worker (the limits themselves are shared through Redis, See `middleware/rate_limit_middleware.py`)
+@router.get("/rate-limit/metrics", response_model=dict)
+async def get_rate_limit_check_metrics():
+    return get_rate_limit_metrics()
+
 
 # =========================================================
 # Redis PUB/SUB API
 # =========================================================
 
 @router.post("/pubsub/publish", response_model=PubSubResponse)
-async def publish_message(payload: PubSubMessage):
+async def publish_message(payload: PubSubMessage, redis_client: aioredis.Redis = Depends(get_redis_client)):
     print(f"{log_prefix} Redis Pub/Sub - Publish - channel: '{payload.channel}', message: '{payload.message}'")
-    redis_client.publish(payload.channel, payload.message)
+    await redis_client.publish(payload.channel, payload.message)
     return PubSubResponse(status="published", channel=payload.channel, message=payload.message)
 
-subscribed_messages = []
-
-def listen_to_channel(channel_name: str):
-    pubsub = redis_client.pubsub()
-    pubsub.subscribe(channel_name)
-    for message in pubsub.listen():
-        print(f"{log_prefix} Redis Pub/Sub - Succeeded in subscribing - channel: '{channel_name}'")
-        if message['type'] == 'message':
-            subscribed_messages.append({
-                'channel': channel_name,
-                'message': message['data']
-            })
-
+# Subscriptions are multiplexed on one connection per worker (See `services/redis_pubsub_service.py`)
 @router.post("/pubsub/subscribe/{channel}", response_model=dict)
 async def subscribe_channel(channel: str):
     print(f"{log_prefix} Redis Pub/Sub - Subscribe - channel: {channel}")
-    threading.Thread(target=listen_to_channel, args=(channel,), daemon=True).start()
-    return {"status": "subscribed", "channel": channel}
+    subscribed = await redis_subscriber.subscribe(channel)
+    return {"status": "subscribed" if subscribed else "already subscribed", "channel": channel}
+
+@router.delete("/pubsub/subscribe/{channel}", response_model=dict)
+async def unsubscribe_channel(channel: str):
+    print(f"{log_prefix} Redis Pub/Sub - Unsubscribe - channel: {channel}")
+    if not await redis_subscriber.unsubscribe(channel):
+        raise HTTPException(status_code=404, detail="Channel not subscribed")
+    return {"status": "unsubscribed", "channel": channel}
+
+# Cursor-based read: messages after `cursor` (the `next_cursor` of the previous read)
+@router.get("/pubsub/messages/{channel}", response_model=PubSubMessagesResponse)
+async def get_subscribed_messages(channel: str, query: PubSubMessagesRequest = Depends()):
+    buffer = redis_subscriber.get_buffer(channel)
+    if buffer is None:
+        raise HTTPException(status_code=404, detail="Channel not subscribed")
+    messages, next_cursor, dropped = buffer.read(query.cursor, query.limit)
+    return PubSubMessagesResponse(
+        status="success",
+        channel=channel,
+        messages=messages,
+        next_cursor=next_cursor,
+        dropped=dropped
+    )
 
-@router.get("/pubsub/messages", response_model=list)
-async def get_subscribed_messages():
-    print(f"{log_prefix} Redis Pub/Sub - All Messages - messages: '{subscribed_messages}'")
-    return subscribed_messages
\ No newline at end of file
+# Streaming (Server-Sent Events): messages are pushed as they arrive, resumable with `cursor` or the `Last-Event-ID` header
+# The channel must be subscribed (`/pubsub/subscribe/{channel}`); the stream ends with an `unsubscribed` event when it's unsubscribed
+@router.get("/pubsub/stream/{channel}")
+async def stream_subscribed_messages(channel: str, cursor: int = Query(default=0, ge=0), last_event_id: Optional[int] = Header(default=None)):
+    buffer = redis_subscriber.get_buffer(channel)
+    if buffer is None:
+        raise HTTPException(status_code=404, detail="Channel not subscribed")
+    cursor = last_event_id if last_event_id is not None else cursor
+
+    async def iter_events():
+        nonlocal cursor
+        while True:
+            messages, cursor, dropped = buffer.read(cursor, RedisPubSubConfig.READ_LIMIT.value)
+            if dropped:
+                yield f"event: dropped\ndata: {dropped}\n\n"
+            for message in messages:
+                data = "\n".join(f"data: {line}" for line in str(message["message"]).split("\n"))
+                yield f"id: {message['seq']}\n{data}\n\n"
+            if messages:
+                continue
+            if buffer.closed:
+                yield f"event: unsubscribed\ndata: {channel}\n\n"
+                return
+            if not await buffer.wait(cursor, timeout=PUBSUB_KEEPALIVE_INTERVAL):
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(
+        iter_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
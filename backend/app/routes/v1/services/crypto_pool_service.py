@@ -0,0 +1,170 @@
+import asyncio
+import importlib
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from enum import Enum
+from functools import partial
+from typing import Callable
+
+log_prefix = "[CRYPTO POOL]"
+
+'''
+**Process Pool for CPU-heavy crypto (bcrypt, RSA)**
+- bcrypt and RSA private key operations hold the CPU for milliseconds (bcrypt: tens of ms at the default cost)
+    - run inline in an `async def` route, they freeze every other request of the worker meanwhile
+- `run_crypto` sends the call to a dedicated process pool (`WORKERS` processes) and awaits it without blocking the event loop
+    - processes, not threads: the work runs in parallel on other cores
+    - the processes are started with `spawn` (a fork of a process running threads/event loops isn't safe)
+    - started and warmed up on app startup (`start_crypto_executor`): a spawned process starts a new interpreter and imports the app
+        - otherwise the first crypto requests would pay for that (about 0.5s)
+- Bounded queue: at most `WORKERS + MAX_QUEUE` calls are in the pool at once
+    - over that, `CryptoPoolFullError` is raised right away (503) instead of queueing without limit
+- Metrics: queue depth, rejections, latency (total / queue wait / run time)
+'''
+
+
+# =========================================================
+# Settings
+# =========================================================
+
+class CryptoPoolConfig(Enum):
+    WORKERS = int(os.getenv('CRYPTO_POOL_WORKERS', min(4, os.cpu_count() or 1)))  # Processes per app worker
+    MAX_QUEUE = int(os.getenv('CRYPTO_POOL_MAX_QUEUE', 64))  # Calls waiting for a process (over it: 503)
+    RETRY_AFTER = 1  # Seconds (Retry-After of the 503 response)
+
+
+class CryptoPoolFullError(Exception):
+    pass
+
+
+# =========================================================
+# Metrics
+# =========================================================
+
+crypto_pool_metrics = {
+    "submitted": 0,
+    "completed": 0,
+    "failed": 0,
+    "rejected": 0,  # Queue full (503)
+    "in_flight": 0,  # Running + queued calls
+    "queue_depth_max": 0,
+    "latency_total": 0.0,  # Seconds from submit to result (completed calls)
+    "latency_max": 0.0,
+    "queue_wait_total": 0.0,
+    "run_time_total": 0.0,
+}
+
+def get_crypto_pool_metrics() -> dict:
+    completed = crypto_pool_metrics["completed"]
+    return {
+        **crypto_pool_metrics,
+        "workers": CryptoPoolConfig.WORKERS.value,
+        "max_queue": CryptoPoolConfig.MAX_QUEUE.value,
+        "queue_depth": max(0, crypto_pool_metrics["in_flight"] - CryptoPoolConfig.WORKERS.value),
+        "latency_avg": crypto_pool_metrics["latency_total"] / completed if completed else 0.0,
+        "queue_wait_avg": crypto_pool_metrics["queue_wait_total"] / completed if completed else 0.0,
+        "run_time_avg": crypto_pool_metrics["run_time_total"] / completed if completed else 0.0,
+    }
+
+
+# =========================================================
+# Pool
+# =========================================================
+
+crypto_executor: ProcessPoolExecutor = None
+
+def get_crypto_executor() -> ProcessPoolExecutor:
+    global crypto_executor
+    if crypto_executor is None:
+        crypto_executor = ProcessPoolExecutor(
+            max_workers=CryptoPoolConfig.WORKERS.value,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        print(f"{log_prefix} Process pool started - workers: {CryptoPoolConfig.WORKERS.value}")
+    return crypto_executor
+
+
+def warm_up(module_name: str) -> int:
+    # Runs in a pool process: imports the module of the crypto functions ahead of the first call / return: pid
+    importlib.import_module(module_name)
+    return os.getpid()
+
+
+async def start_crypto_executor(module_name: str):
+    # One warm-up call per worker: the pool spawns a process for each call submitted while none is idle
+    executor = get_crypto_executor()
+    loop = asyncio.get_running_loop()
+    started_at = time.perf_counter()
+    try:
+        pids = await asyncio.gather(*(
+            loop.run_in_executor(executor, warm_up, module_name) for _ in range(CryptoPoolConfig.WORKERS.value)
+        ))
+    except Exception as e:
+        # The pool is started again on the first call
+        shutdown_crypto_executor(executor)
+        print(f"{log_prefix} Warm-up failed - error: {e}")
+        return
+    print(f"{log_prefix} Process pool warmed up - processes: {len(set(pids))}, time: {time.perf_counter() - started_at:.2f}s")
+
+
+def timed_call(func: Callable, *args, **kwargs):
+    # Runs in a pool process / return: result, run time (seconds)
+    started_at = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - started_at
+
+
+async def run_crypto(func: Callable, *args, **kwargs):
+    # Runs `func` (a module-level function: it's pickled to the process) in the crypto pool
+    if crypto_pool_metrics["in_flight"] >= CryptoPoolConfig.WORKERS.value + CryptoPoolConfig.MAX_QUEUE.value:
+        crypto_pool_metrics["rejected"] += 1
+        raise CryptoPoolFullError("Crypto pool is busy. Try again later.")
+
+    started_at = time.perf_counter()
+    executor = get_crypto_executor()
+    try:
+        future = asyncio.get_running_loop().run_in_executor(executor, partial(timed_call, func, *args, **kwargs))
+    except BrokenProcessPool:
+        shutdown_crypto_executor(executor)  # A process died: a new pool is started on the next call
+        raise
+    crypto_pool_metrics["submitted"] += 1
+    crypto_pool_metrics["in_flight"] += 1
+    crypto_pool_metrics["queue_depth_max"] = max(
+        crypto_pool_metrics["queue_depth_max"],
+        crypto_pool_metrics["in_flight"] - CryptoPoolConfig.WORKERS.value
+    )
+    future.add_done_callback(lambda done: record_crypto_call(done, started_at, executor))
+
+    # Shielded: a call already sent to a process can't be taken back, so a cancelled request leaves it running (and counted)
+    result, _ = await asyncio.shield(future)
+    return result
+
+
+def record_crypto_call(future: asyncio.Future, started_at: float, executor: ProcessPoolExecutor):
+    crypto_pool_metrics["in_flight"] -= 1
+    if future.cancelled():
+        crypto_pool_metrics["failed"] += 1
+        return
+    if future.exception() is not None:
+        crypto_pool_metrics["failed"] += 1
+        if isinstance(future.exception(), BrokenProcessPool):
+            shutdown_crypto_executor(executor)
+        return
+    _, run_time = future.result()
+    latency = time.perf_counter() - started_at
+    crypto_pool_metrics["completed"] += 1
+    crypto_pool_metrics["latency_total"] += latency
+    crypto_pool_metrics["latency_max"] = max(crypto_pool_metrics["latency_max"], latency)
+    crypto_pool_metrics["queue_wait_total"] += max(0.0, latency - run_time)
+    crypto_pool_metrics["run_time_total"] += run_time
+
+def shutdown_crypto_executor(executor: ProcessPoolExecutor = None):
+    # executor: shut down only if it's still the current pool
+    global crypto_executor
+    if crypto_executor is not None and executor in (None, crypto_executor):
+        crypto_executor.shutdown(wait=False, cancel_futures=True)
+        crypto_executor = None
+        print(f"{log_prefix} Process pool shut down")
@@ -0,0 +1,197 @@
+import os
+import time
+from collections import OrderedDict
+from enum import Enum
+from typing import BinaryIO, Optional
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+from pymongo.errors import BulkWriteError
+from starlette.concurrency import run_in_threadpool
+from .async_service import TaskStatus
+from .mongodb_service import ItemModel, collection
+
+log_prefix = "[CSV INGEST]"
+
+'''
+**Chunked CSV Ingest into MongoDB (bounded memory)**
+- The upload is spooled to a temporary file (size limited while received), then ingested by a background task
+    - the job takes over the spooled file of the form (no second copy) and closes it when it's done
+- `pandas.read_csv(chunksize=...)` parses `CHUNK_SIZE` rows at a time (read off the event loop), so memory doesn't grow with the file
+- Every chunk is validated at once against the fields of `ItemModel` (column operations, not a model per row)
+    - missing required value / a value that isn't a finite number for a `float` field -> the row is rejected with its error
+    - `float` fields are always stored as doubles (an all-integer column isn't stored as ints)
+    - a line with more fields than the header is rejected too, and the lines after it are still ingested
+        - parsed with the python engine: only it hands bad lines to a callable (`on_bad_lines`), which keeps them as marked rows
+- Valid rows go to the `items` collection with an unordered bulk insert (`insert_many(ordered=False)`)
+    - a failed document doesn't stop the rest of the batch; its error is reported for its row
+- Progress (bytes/rows read, inserted, failed, the first `MAX_ERRORS` row errors) is kept per job
+    - Jobs are in memory of the worker (the `/async` tasks work the same way); the last `MAX_JOBS` finished jobs are kept
+- Row numbers are 1-based data rows (the header isn't counted)
+'''
+
+
+# =========================================================
+# Settings
+# =========================================================
+
+class CsvIngestConfig(Enum):
+    MAX_SIZE = int(os.getenv('CSV_INGEST_MAX_SIZE', 1024 * 1024 * 1024))  # Bytes per file
+    CHUNK_SIZE = int(os.getenv('CSV_INGEST_CHUNK_SIZE', 10_000))  # Rows parsed, validated and inserted at once
+    MAX_ERRORS = int(os.getenv('CSV_INGEST_MAX_ERRORS', 1000))  # Row errors kept per job (all of them are counted)
+    MAX_JOBS = int(os.getenv('CSV_INGEST_MAX_JOBS', 100))  # Finished jobs kept for the progress API
+    BAD_LINE_MARKER = "\x00bad line: "  # First value of a row that stands in for a line with too many fields
+
+
+class CsvIngestJob:
+    def __init__(self, job_id: str, filename: str, file: BinaryIO, size: int):
+        self.job_id = job_id
+        self.filename = filename
+        self.file = file  # Closed when the job is finished
+        self.status = TaskStatus.ACCEPTED
+        self.bytes_total = size
+        self.bytes_read = 0
+        self.rows_read = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors: list[dict] = []
+        self.detail: Optional[str] = None  # Why the whole job failed
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    def add_error(self, row: int, error: str):
+        self.failed += 1
+        if len(self.errors) < CsvIngestConfig.MAX_ERRORS.value:
+            self.errors.append({"row": row, "error": error})
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "filename": self.filename,
+            "status": self.status.value,
+            "bytes_total": self.bytes_total,
+            "bytes_read": self.bytes_read,
+            "progress": self.bytes_read / self.bytes_total if self.bytes_total else 1.0,
+            "rows_read": self.rows_read,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "detail": self.detail,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+
+ingest_jobs: OrderedDict = OrderedDict()  # job_id -> CsvIngestJob
+
+def add_ingest_job(job: CsvIngestJob):
+    ingest_jobs[job.job_id] = job
+    finished = [job_id for job_id, job in ingest_jobs.items() if job.finished_at is not None]
+    for job_id in finished[:max(0, len(finished) - CsvIngestConfig.MAX_JOBS.value)]:
+        ingest_jobs.pop(job_id, None)
+
+
+# =========================================================
+# Validation
+# =========================================================
+
+def validate_chunk(chunk: pd.DataFrame, model: type[BaseModel], first_row: int) -> tuple[list[dict], list[int], list[tuple[int, str]]]:
+    '''
+    Vectorized validation of a chunk (read with `dtype=str`) against the fields of a model
+    - first_row: row number of the first row of the chunk
+    - return: documents, their row numbers, errors (row number, message)
+    '''
+    rows = np.arange(first_row, first_row + len(chunk))
+    errors = pd.Series("", index=chunk.index)
+    columns = {}
+    for name, field in model.__fields__.items():
+        if name in chunk.columns:
+            values = chunk[name].str.strip() if field.outer_type_ is str else chunk[name]
+        else:
+            values = pd.Series(np.nan, index=chunk.index, dtype=object)
+        missing = values.isna()
+        if field.outer_type_ is float:
+            numbers = pd.to_numeric(values, errors="coerce").astype(float)
+            errors[~missing & ~np.isfinite(numbers)] += f"{name}: value is not a valid float; "
+            values = numbers.astype(object)
+        if field.required:
+            errors[missing] += f"{name}: field required; "
+        columns[name] = values.where(~missing, None)
+
+    # Lines with too many fields (See `open_csv_reader`): their own error only, the values are placeholders
+    first_values = chunk.iloc[:, 0]
+    bad_lines = first_values.str.startswith(CsvIngestConfig.BAD_LINE_MARKER.value, na=False)
+    errors[bad_lines] = first_values[bad_lines].str[len(CsvIngestConfig.BAD_LINE_MARKER.value):]
+
+    valid = (errors == "").to_numpy()
+    documents = pd.DataFrame(columns)[valid].to_dict("records")
+    failed = [(int(row), error.rstrip("; ")) for row, error in zip(rows[~valid], errors[~valid])]
+    return documents, rows[valid].tolist(), failed
+
+
+# =========================================================
+# Ingest
+# =========================================================
+
+def open_csv_reader(file: BinaryIO, chunk_size: int):
+    # Every value as a string: the types are checked by `validate_chunk`
+    file.seek(0)
+    columns = len(pd.read_csv(file, nrows=0).columns)
+    file.seek(0)
+
+    def mark_bad_line(values: list[str]) -> list[str]:
+        # A line with more fields than the header stays in the chunk as a marked row (returning None would drop it and shift the row numbers)
+        return [f"{CsvIngestConfig.BAD_LINE_MARKER.value}expected {columns} fields, saw {len(values)}"] + [""] * (columns - 1)
+
+    return pd.read_csv(file, chunksize=chunk_size, dtype=str, skipinitialspace=True, engine="python", on_bad_lines=mark_bad_line)
+
+
+async def insert_documents(job: CsvIngestJob, documents: list[dict], rows: list[int]):
+    if not documents:
+        return
+    try:
+        result = await collection.insert_many(documents, ordered=False)
+        job.inserted += len(result.inserted_ids)
+    except BulkWriteError as e:
+        write_errors = e.details.get("writeErrors", [])
+        job.inserted += e.details.get("nInserted", len(documents) - len(write_errors))
+        for write_error in write_errors:
+            job.add_error(rows[write_error["index"]], write_error.get("errmsg", "insert failed"))
+
+
+async def ingest_csv(job: CsvIngestJob, model: type[BaseModel] = ItemModel, chunk_size: int = CsvIngestConfig.CHUNK_SIZE.value):
+    job.status = TaskStatus.IN_PROGRESS
+    print(f"{log_prefix} Ingest started - job: {job.job_id}, file: '{job.filename}', size: {job.bytes_total}")
+    reader = None
+    try:
+        reader = await run_in_threadpool(open_csv_reader, job.file, chunk_size)
+        required = [name for name, field in model.__fields__.items() if field.required]
+        while True:
+            chunk = await run_in_threadpool(next, reader, None)
+            if chunk is None:
+                break
+            if job.rows_read == 0:
+                missing_columns = [name for name in required if name not in chunk.columns]
+                if missing_columns:
+                    raise ValueError(f"Missing required columns: {', '.join(missing_columns)}")
+            documents, rows, failed = await run_in_threadpool(validate_chunk, chunk, model, job.rows_read + 1)
+            job.rows_read += len(chunk)
+            for row, error in failed:
+                job.add_error(row, error)
+            await insert_documents(job, documents, rows)
+            job.bytes_read = min(job.bytes_total, job.file.tell())  # The parser reads ahead in blocks
+        job.bytes_read = job.bytes_total
+        job.status = TaskStatus.COMPLETED
+    except pd.errors.EmptyDataError:
+        job.detail = "The file is empty."
+        job.status = TaskStatus.FAILED
+    except Exception as e:
+        job.detail = str(e)
+        job.status = TaskStatus.FAILED
+    finally:
+        if reader is not None:
+            reader.close()
+        job.finished_at = time.time()
+        job.file.close()
+        print(f"{log_prefix} Ingest {job.status.value} - job: {job.job_id}, rows: {job.rows_read}, inserted: {job.inserted}, failed: {job.failed}")
@@ -0,0 +1,280 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from enum import Enum
+from itertools import islice, cycle
+from typing import AsyncIterator
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from openpyxl import Workbook
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from app.routes.v1.services.redis_service import get_redis_client, read_values, RedisValueType
+from app.routes.v1.services.mongodb_service import collection
+
+log_prefix = "[EXPORT]"
+
+'''
+**Export Engine (source -> encoder -> sink, bounded memory)**
+- Source: yields rows in batches of `BATCH_SIZE` (never the whole dataset)
+    - DEMO: generated rows / MONGODB: a cursor over the `items` collection / REDIS: SCAN over the keys of a value type
+- Encoder: turns each batch into bytes at once (not row by row), off the event loop
+    - CSV: `csv.writer` or `DataFrame.to_csv` per batch (UTF-8 with BOM so Excel opens non-ASCII text correctly)
+    - XLSX: `openpyxl` write-only workbook (rows are flushed to a temporary file as they come, constant memory)
+        - XLSX is a zip archive that can only be finished at the end, so the file is written to a temporary file and then streamed
+    - PARQUET / ARROW (IPC file): columnar, typed by the source's Arrow schema, with a choice of compression
+        - batches are gathered into row groups of `ROW_GROUP_SIZE` rows, each written to an in-memory sink that is drained right away
+        - memory is bounded by one row group, whatever the number of rows
+- Sink: the HTTP response (streamed), or S3 through a concurrent multipart upload (`StreamReader` feeds the parts)
+'''
+
+
+# =========================================================
+# Settings
+# =========================================================
+
+class ExportConfig(Enum):
+    BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 5000))  # Rows read and encoded at once
+    CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 1024 * 1024))  # Bytes per chunk read back from temporary files
+    S3_PART_SIZE = int(os.getenv('EXPORT_S3_PART_SIZE', 8 * 1024 * 1024))  # Bytes per part of the S3 sink (at least 5MiB)
+    ROW_GROUP_SIZE = int(os.getenv('EXPORT_ROW_GROUP_SIZE', 100_000))  # Rows per Parquet row group / Arrow record batch
+
+class ExportSource(Enum):
+    DEMO = "DEMO"
+    MONGODB = "MONGODB"
+    REDIS = "REDIS"
+
+# Columnar Compression (ARROW supports only LZ4 and ZSTD)
+class ExportCompression(Enum):
+    NONE        = ("NONE",      "none",     None)
+    SNAPPY      = ("SNAPPY",    "snappy",   None)
+    GZIP        = ("GZIP",      "gzip",     None)
+    LZ4         = ("LZ4",       "lz4",      "lz4")
+    ZSTD        = ("ZSTD",      "zstd",     "zstd")
+
+    def __new__(cls, key, parquet_codec, arrow_codec):
+        obj = object.__new__(cls)
+        obj._value_ = key  # Use _value_ for the key
+        obj.key = key
+        obj.parquet_codec = parquet_codec
+        obj.arrow_codec = arrow_codec
+        return obj
+
+
+# =========================================================
+# Sources
+# =========================================================
+
+class ExportData:
+    # Batches of rows: every row is a list in the order of the columns
+    def __init__(self, columns: list[str], types: list[pa.DataType], batches: AsyncIterator[list[list]]):
+        self.columns = columns
+        self.schema = pa.schema(list(zip(columns, types)))  # Columnar formats
+        self.batches = batches
+
+
+def demo_source(rows: int) -> ExportData:
+    columns = ["이름", "Age", "City"]  # "이름" means "Name" to see if the utf-8 character works "WHEN YOU OPEN THE FILE USING EXCEL"
+    types = [pa.string(), pa.int64(), pa.string()]
+    samples = [["A", 30, "Los Angeles"], ["B", 24, "Seoul"], ["C", 40, "Paris"]]
+
+    async def iter_batches():
+        generated = islice(cycle(samples), rows)
+        while batch := list(islice(generated, ExportConfig.BATCH_SIZE.value)):
+            yield batch
+
+    return ExportData(columns, types, iter_batches())
+
+
+def mongodb_source() -> ExportData:
+    columns = ["id", "name", "description", "price"]
+    types = [pa.string(), pa.string(), pa.string(), pa.float64()]
+
+    async def iter_batches():
+        batch = []
+        # The driver fetches `batch_size` documents per round trip
+        async for item in collection.find({}).batch_size(ExportConfig.BATCH_SIZE.value):
+            batch.append([str(item["_id"]), item.get("name"), item.get("description"), item.get("price")])
+            if len(batch) >= ExportConfig.BATCH_SIZE.value:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    return ExportData(columns, types, iter_batches())
+
+
+def redis_source(value_type: RedisValueType) -> ExportData:
+    columns = ["key", "value"]
+    types = [pa.string(), pa.string()]
+
+    async def iter_batches():
+        redis_client = await get_redis_client()
+        cursor = None
+        while cursor != 0:
+            cursor, actual_keys = await redis_client.scan(cursor=cursor or 0, match=value_type.key_prefix + "*", count=ExportConfig.BATCH_SIZE.value)
+            if not actual_keys:
+                continue
+            # Keys deleted between SCAN and the fetch are left out
+            batch = [
+                [
+                    actual_key[len(value_type.key_prefix):],
+                    value if value_type == RedisValueType.STRING else json.dumps(
+                        sorted(value) if isinstance(value, set) else value, ensure_ascii=False
+                    )
+                ]
+                for actual_key, value in await read_values(redis_client, value_type, actual_keys)
+            ]
+            if batch:
+                yield batch
+
+    return ExportData(columns, types, iter_batches())
+
+
+# =========================================================
+# Encoders
+# =========================================================
+
+def encode_csv_batch(columns: list[str], batch: list[list], header: bool, use_pandas: bool) -> bytes:
+    if use_pandas:
+        text = pd.DataFrame(batch, columns=columns).to_csv(index=False, header=header)
+    else:
+        output = io.StringIO()
+        writer = csv.writer(output)
+        if header:
+            writer.writerow(columns)
+        writer.writerows(batch)
+        text = output.getvalue()
+    # The BOM only once, at the beginning of the file
+    return text.encode("utf-8-sig" if header else "utf-8")
+
+
+async def encode_csv(data: ExportData, use_pandas: bool = False) -> AsyncIterator[bytes]:
+    print(f"{log_prefix} encoding csv with {'pandas' if use_pandas else 'csv'} lib ...")
+    header = True
+    async for batch in data.batches:
+        yield await run_in_threadpool(encode_csv_batch, data.columns, batch, header, use_pandas)
+        header = False
+    if header:  # No rows
+        yield await run_in_threadpool(encode_csv_batch, data.columns, [], header, use_pandas)
+
+
+def append_rows(worksheet, batch: list[list]):
+    for row in batch:
+        worksheet.append(row)
+
+
+async def encode_xlsx(data: ExportData, chunk_size: int = ExportConfig.CHUNK_SIZE.value) -> AsyncIterator[bytes]:
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet()
+    worksheet.append(data.columns)
+    async for batch in data.batches:
+        await run_in_threadpool(append_rows, worksheet, batch)
+
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        await run_in_threadpool(workbook.save, path)
+        async for chunk in iterate_in_threadpool(iter_file(path, chunk_size)):
+            yield chunk
+    finally:
+        os.unlink(path)
+
+
+def iter_file(path: str, chunk_size: int):
+    with open(path, "rb") as file:
+        while chunk := file.read(chunk_size):
+            yield chunk
+
+
+class BufferSink:
+    # Write-only file object for the Arrow/Parquet writers; what was written is taken out with `drain`
+    def __init__(self):
+        self.buffer = bytearray()
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.buffer += data
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+
+def to_arrow_table(data: ExportData, rows: list[list]) -> pa.Table:
+    return pa.Table.from_arrays(
+        [pa.array([row[index] for row in rows], type=field.type) for index, field in enumerate(data.schema)],
+        schema=data.schema
+    )
+
+
+async def iter_row_groups(data: ExportData) -> AsyncIterator[pa.Table]:
+    rows = []
+    async for batch in data.batches:
+        rows.extend(batch)
+        if len(rows) >= ExportConfig.ROW_GROUP_SIZE.value:
+            yield await run_in_threadpool(to_arrow_table, data, rows)
+            rows = []
+    if rows:
+        yield await run_in_threadpool(to_arrow_table, data, rows)
+
+
+async def encode_parquet(data: ExportData, compression: ExportCompression = ExportCompression.SNAPPY) -> AsyncIterator[bytes]:
+    sink = BufferSink()
+    writer = pq.ParquetWriter(sink, data.schema, compression=compression.parquet_codec)
+    try:
+        async for table in iter_row_groups(data):
+            await run_in_threadpool(writer.write_table, table, row_group_size=table.num_rows)
+            yield sink.drain()
+    finally:
+        writer.close()  # Footer
+    yield sink.drain()
+
+
+async def encode_arrow(data: ExportData, compression: ExportCompression = ExportCompression.NONE) -> AsyncIterator[bytes]:
+    sink = BufferSink()
+    writer = pa.ipc.new_file(sink, data.schema, options=pa.ipc.IpcWriteOptions(compression=compression.arrow_codec))
+    try:
+        async for table in iter_row_groups(data):
+            await run_in_threadpool(writer.write_table, table, max_chunksize=table.num_rows)
+            yield sink.drain()
+    finally:
+        writer.close()  # Footer
+    yield sink.drain()
+
+
+# =========================================================
+# Sinks
+# =========================================================
+
+class StreamReader:
+    # `read(size)` over an async byte stream (e.g. an encoder feeding `upload_multipart`)
+    def __init__(self, stream: AsyncIterator[bytes]):
+        self.stream = stream
+        self.buffer = bytearray()
+        self.done = False
+
+    async def read(self, size: int) -> bytes:
+        while len(self.buffer) < size and not self.done:
+            try:
+                self.buffer += await self.stream.__anext__()
+            except StopAsyncIteration:
+                self.done = True
+        chunk = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return chunk
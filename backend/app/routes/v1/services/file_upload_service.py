@@ -0,0 +1,124 @@
+import hashlib
+import os
+import tempfile
+from enum import Enum
+from typing import AsyncGenerator, BinaryIO, Optional
+from fastapi import HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import FormData, UploadFile
+from starlette.formparsers import MultiPartParser, MultiPartException
+
+'''
+**Streaming Disk Upload (constant memory per upload)**
+- The request body is limited as it arrives
+    - `Content-Length` over the limit: 413 before a single byte is read
+    - without `Content-Length` (chunked): 413 as soon as the received bytes pass the limit
+- The multipart parser spools the file part to a temporary file (at most 1MB of it stays in memory)
+- The spooled file is copied in `CHUNK_SIZE` chunks in a thread (never on the event loop) and SHA-256 is computed in the same pass
+- The copy goes to a temporary file next to the target, which is renamed over the target (`os.replace`) only when complete
+    - readers never see a half written file, and a failed upload leaves nothing behind
+'''
+
+
+# =========================================================
+# Settings
+# =========================================================
+
+class FileUploadConfig(Enum):
+    MAX_SIZE = int(os.getenv('FILE_UPLOAD_MAX_SIZE', 100 * 1024 * 1024))  # Bytes per file
+    CHUNK_SIZE = int(os.getenv('FILE_UPLOAD_CHUNK_SIZE', 1024 * 1024))  # Bytes per read/write
+    DIRECTORY = os.getenv('FILE_UPLOAD_DIRECTORY', '.')  # Where uploaded files are saved (downloads read the working directory)
+    MULTIPART_OVERHEAD = 64 * 1024  # Allowance for the multipart boundaries/headers on top of `MAX_SIZE`
+
+
+class UploadTooLargeError(Exception):
+    pass
+
+
+# =========================================================
+# Receive
+# =========================================================
+
+def sanitize_filename(filename: Optional[str]) -> str:
+    # Keeps only the last path component, so a client can't write outside the upload directory
+    name = os.path.basename((filename or "").replace("\\", "/")).strip()
+    if not name or name in (".", "..") or "\x00" in name:
+        raise HTTPException(status_code=400, detail="Invalid filename.")
+    return name
+
+
+async def limit_request_stream(request: Request, max_size: int) -> AsyncGenerator[bytes, None]:
+    max_body_size = max_size + FileUploadConfig.MULTIPART_OVERHEAD.value
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > max_body_size:
+            raise HTTPException(status_code=413, detail=f"Request body too large. The limit is {max_size} bytes.")
+        yield chunk
+
+
+async def receive_form(request: Request, max_size: int = FileUploadConfig.MAX_SIZE.value) -> FormData:
+    # Parses a multipart body (files are spooled to temporary files) with the size limit enforced as bytes arrive
+    max_body_size = max_size + FileUploadConfig.MULTIPART_OVERHEAD.value
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > max_body_size:
+        raise HTTPException(status_code=413, detail=f"Request body too large. The limit is {max_size} bytes.")
+    if not request.headers.get("content-type", "").startswith("multipart/form-data"):
+        raise HTTPException(status_code=400, detail="multipart/form-data is required.")
+    try:
+        return await MultiPartParser(request.headers, limit_request_stream(request, max_size)).parse()
+    except MultiPartException as e:
+        raise HTTPException(status_code=400, detail=e.message)
+
+
+async def close_form(form: FormData, keep: Optional[UploadFile] = None):
+    # Closes the spooled files of a form, except `keep` (taken over by a background task, which closes it)
+    for _, value in form.multi_items():
+        if isinstance(value, UploadFile) and value is not keep:
+            await value.close()
+
+
+# =========================================================
+# Save
+# =========================================================
+
+def save_file(
+    source: BinaryIO,
+    filename: str,
+    directory: str = FileUploadConfig.DIRECTORY.value,
+    max_size: int = FileUploadConfig.MAX_SIZE.value,
+    chunk_size: int = FileUploadConfig.CHUNK_SIZE.value
+) -> tuple[int, str]:
+    # Blocking (run it in a thread) / return: size, SHA-256 hex digest
+    # Fixed length name (not derived from `filename`): a long but valid filename plus a prefix/suffix could exceed NAME_MAX
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".upload-", suffix=".part")
+    try:
+        size = 0
+        digest = hashlib.sha256()
+        with os.fdopen(fd, "wb") as target:
+            while chunk := source.read(chunk_size):
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLargeError()
+                digest.update(chunk)
+                target.write(chunk)
+            target.flush()
+            os.fsync(target.fileno())
+        os.replace(temp_path, os.path.join(directory, filename))
+        return size, digest.hexdigest()
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+async def save_upload(
+    source: BinaryIO,
+    filename: str,
+    max_size: int = FileUploadConfig.MAX_SIZE.value,
+    directory: str = FileUploadConfig.DIRECTORY.value
+) -> tuple[int, str]:
+    try:
+        return await run_in_threadpool(save_file, source, filename, directory, max_size)
+    except UploadTooLargeError:
+        raise HTTPException(status_code=413, detail=f"File too large. The limit is {max_size} bytes.")
@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+from enum import Enum
+from typing import Optional
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+log_prefix = "[KEY REGISTRY]"
+
+'''
+**RSA Key Registry (parsed once, shared by RS256 crypto and JWT)**
+- Parsing a PEM private key is expensive: keys are deserialized once and the key objects are reused by every request
+- Keys are identified by a key ID (`kid`) and read from `DIRECTORY`
+    - `private.pem` / `public.pem`: the default key (`DEFAULT_KID`)
+    - `<kid>.private.pem` / `<kid>.public.pem`: additional keys (e.g. for key rotation)
+    - the public key is derived from the private key when only the private key file exists
+- Files are checked for changes (mtime/size) at most every `RELOAD_INTERVAL` seconds
+    - a changed file is parsed again / a removed file removes its key
+    - a file that can't be parsed (e.g. being written) keeps the previous key until the next check
+'''
+
+
+# =========================================================
+# Settings
+# =========================================================
+
+class KeyRegistryConfig(Enum):
+    DIRECTORY = os.getenv('RSA_KEYS_DIRECTORY', 'keys')
+    DEFAULT_KID = os.getenv('RSA_DEFAULT_KID', 'default')
+    RELOAD_INTERVAL = float(os.getenv('RSA_KEYS_RELOAD_INTERVAL', 1))  # Seconds between checks for changed key files
+    PRIVATE_KEY_PASSWORD = os.getenv('RSA_PRIVATE_KEY_PASSWORD') or None  # Only for password-protected private keys
+
+PRIVATE_KEY_SUFFIX = "private.pem"
+PUBLIC_KEY_SUFFIX = "public.pem"
+
+
+class UnknownKeyIdError(Exception):
+    pass
+
+
+# =========================================================
+# Registry
+# =========================================================
+
+class RsaKey:
+    def __init__(self, kid: str, private_key: Optional[rsa.RSAPrivateKey], public_key: rsa.RSAPublicKey):
+        self.kid = kid
+        self.private_key = private_key  # None for a public key only
+        # Unencrypted PKCS8 PEM (also for password-protected key files), for libraries that take PEM (e.g. python-jose signing keys)
+        self.private_pem = private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption()
+        ) if private_key is not None else None
+        self.public_key = public_key
+        self.public_pem = public_key.public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo
+        ).decode()
+
+
+def parse_key_filename(filename: str) -> Optional[tuple[str, str]]:
+    # return: kid, suffix (None if it isn't a key file)
+    for suffix in (PRIVATE_KEY_SUFFIX, PUBLIC_KEY_SUFFIX):
+        if filename == suffix:
+            return KeyRegistryConfig.DEFAULT_KID.value, suffix
+        if filename.endswith(f".{suffix}") and len(filename) > len(suffix) + 1:
+            return filename[:-len(suffix) - 1], suffix
+    return None
+
+
+def load_key(kid: str, files: dict[str, str]) -> RsaKey:
+    # files: suffix -> path
+    private_key = None
+    if PRIVATE_KEY_SUFFIX in files:
+        with open(files[PRIVATE_KEY_SUFFIX], "rb") as key_file:
+            password = KeyRegistryConfig.PRIVATE_KEY_PASSWORD.value
+            private_key = serialization.load_pem_private_key(key_file.read(), password=password.encode() if password else None)
+    if PUBLIC_KEY_SUFFIX in files:
+        with open(files[PUBLIC_KEY_SUFFIX], "rb") as key_file:
+            public_key = serialization.load_pem_public_key(key_file.read())
+    else:
+        public_key = private_key.public_key()
+    return RsaKey(kid, private_key, public_key)
+
+
+class KeyRegistry:
+    def __init__(self, directory: str = KeyRegistryConfig.DIRECTORY.value):
+        self.directory = directory
+        self.keys: dict[str, RsaKey] = {}
+        self.versions: dict[str, tuple] = {}  # kid -> (suffix, mtime, size) of its files
+        self.checked_at = None
+        self.lock = threading.Lock()
+
+    def scan(self) -> dict[str, dict[str, os.DirEntry]]:
+        # return: kid -> suffix -> file
+        found: dict[str, dict[str, os.DirEntry]] = {}
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return found
+        for entry in entries:
+            parsed = parse_key_filename(entry.name)
+            if parsed is not None and entry.is_file():
+                kid, suffix = parsed
+                found.setdefault(kid, {})[suffix] = entry
+        return found
+
+    def refresh(self):
+        now = time.monotonic()
+        if self.checked_at is not None and now - self.checked_at < KeyRegistryConfig.RELOAD_INTERVAL.value:
+            return
+        with self.lock:
+            if self.checked_at is not None and now - self.checked_at < KeyRegistryConfig.RELOAD_INTERVAL.value:
+                return
+            found = self.scan()
+            for kid in [kid for kid in self.keys if kid not in found]:
+                self.keys.pop(kid, None)
+                self.versions.pop(kid, None)
+                print(f"{log_prefix} Key removed - kid: '{kid}'")
+            for kid, files in found.items():
+                version = tuple(sorted((suffix, entry.stat().st_mtime_ns, entry.stat().st_size) for suffix, entry in files.items()))
+                if self.versions.get(kid) == version:
+                    continue
+                try:
+                    self.keys[kid] = load_key(kid, {suffix: entry.path for suffix, entry in files.items()})
+                    self.versions[kid] = version
+                    print(f"{log_prefix} Key loaded - kid: '{kid}'")
+                except Exception as e:
+                    print(f"{log_prefix} Failed to load key - kid: '{kid}', error: {e}")
+            self.checked_at = time.monotonic()
+
+    def get(self, kid: Optional[str] = None) -> RsaKey:
+        self.refresh()
+        key = self.keys.get(kid or KeyRegistryConfig.DEFAULT_KID.value)
+        if key is None:
+            raise UnknownKeyIdError(f"Unknown key ID: '{kid or KeyRegistryConfig.DEFAULT_KID.value}'")
+        return key
+
+    def get_private_key(self, kid: Optional[str] = None) -> rsa.RSAPrivateKey:
+        key = self.get(kid)
+        if key.private_key is None:
+            raise UnknownKeyIdError(f"No private key for key ID: '{key.kid}'")
+        return key.private_key
+
+    def get_public_key(self, kid: Optional[str] = None) -> rsa.RSAPublicKey:
+        return self.get(kid).public_key
+
+    def kids(self) -> list[str]:
+        self.refresh()
+        return sorted(self.keys)
+
+
+key_registry = KeyRegistry()
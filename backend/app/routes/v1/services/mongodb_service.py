@@ -0,0 +1,24 @@
+import os
+from typing import Optional
+from motor.motor_asyncio import AsyncIOMotorClient
+from pydantic import BaseModel, Field
+
+
+# =========================================================
+# MongoDB Settings
+# =========================================================
+
+MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017')
+client = AsyncIOMotorClient(MONGO_URI)
+db = client["jonas-fastapi-master"]  # Replace with your DB name
+collection = db["items"]  # Replace with your collection name
+
+
+# =========================================================
+# Pydantic Models
+# =========================================================
+
+class ItemModel(BaseModel):
+    name: str = Field(...)
+    description: Optional[str] = Field(None)
+    price: float = Field(...)
@@ -0,0 +1,113 @@
+import json
+import os
+import zlib
+from enum import Enum
+from typing import Optional, Union
+import msgpack
+import zstandard
+from redis.client import NEVER_DECODE
+
+'''
+**Value Codec (string values of the Redis router)**
+- Large values (e.g. JSON documents) are stored encoded to cut Redis memory and network bytes
+    - raw: UTF-8 as is
+    - msgpack: compact JSON documents re-encoded as MessagePack
+        - only when the document reads back as exactly the same string (no whitespace, duplicate keys, `1.0e2`, ...)
+        - any other value is stored raw
+    - zlib / zstd: compressed UTF-8
+- Only values of at least `THRESHOLD` bytes (UTF-8) are encoded, and only when the result is actually smaller
+- Encoded values start with a header: MAGIC (2 bytes) + codec tag (1 byte)
+    - 0xC1 can never appear in UTF-8, so raw values (including the ones written before this codec layer) are told apart safely
+    - Reads decode by the tag, so the codec can be changed at any time without migrating stored values
+- Encoded values are binary: read them with `RAW_READ` options (bytes even when the client decodes responses) and `decode_value`
+'''
+
+
+# =========================================================
+# Settings
+# =========================================================
+
+class RedisCodecConfig(Enum):
+    CODEC = os.getenv('REDIS_CODEC', 'raw').lower()  # raw | msgpack | zlib | zstd
+    THRESHOLD = int(os.getenv('REDIS_CODEC_THRESHOLD', 1024))  # Bytes
+    ZLIB_LEVEL = int(os.getenv('REDIS_CODEC_ZLIB_LEVEL', 6))
+    ZSTD_LEVEL = int(os.getenv('REDIS_CODEC_ZSTD_LEVEL', 3))
+
+# Codec Type
+class RedisCodec(Enum):
+    RAW         = ("raw",       0)
+    MSGPACK     = ("msgpack",   1)
+    ZLIB        = ("zlib",      2)
+    ZSTD        = ("zstd",      3)
+
+    def __new__(cls, key, tag):
+        obj = object.__new__(cls)
+        obj._value_ = key  # Use _value_ for the key
+        obj.key = key
+        obj.tag = tag
+        return obj
+
+MAGIC = b"\xc1\xde"
+HEADER_SIZE = len(MAGIC) + 1
+RAW_READ = {NEVER_DECODE: []}  # execute_command options to read bytes as they are stored
+
+codecs_by_tag = {codec.tag: codec for codec in RedisCodec}
+zstd_compressor = zstandard.ZstdCompressor(level=RedisCodecConfig.ZSTD_LEVEL.value)
+zstd_decompressor = zstandard.ZstdDecompressor()
+
+
+# =========================================================
+# Encode / Decode
+# =========================================================
+
+def dump_json(document) -> str:
+    # The JSON a msgpack value is read back as
+    return json.dumps(document, ensure_ascii=False, separators=(",", ":"))
+
+
+def encode_payload(codec: RedisCodec, value: str, data: bytes) -> Optional[bytes]:
+    # data: the value as UTF-8 / return: None when the value can't be encoded with the codec
+    if codec == RedisCodec.MSGPACK:
+        if not value.startswith(("{", "[")):
+            return None
+        try:
+            document = json.loads(value)
+            if dump_json(document) != value:
+                return None  # Wouldn't read back as the same string
+            return msgpack.packb(document)
+        except (ValueError, OverflowError, TypeError):
+            return None  # Not JSON, or not representable in MessagePack (e.g. integers over 64 bits)
+    if codec == RedisCodec.ZLIB:
+        return zlib.compress(data, RedisCodecConfig.ZLIB_LEVEL.value)
+    if codec == RedisCodec.ZSTD:
+        return zstd_compressor.compress(data)
+    return None
+
+
+def encode_value(value: str, codec: RedisCodec = None) -> Union[str, bytes]:
+    codec = codec or RedisCodec(RedisCodecConfig.CODEC.value)
+    if codec == RedisCodec.RAW:
+        return value
+    data = value.encode()
+    if len(data) < RedisCodecConfig.THRESHOLD.value:
+        return value
+    payload = encode_payload(codec, value, data)
+    if payload is None or len(payload) + HEADER_SIZE >= len(data):
+        return value
+    return MAGIC + bytes([codec.tag]) + payload
+
+
+def decode_value(value: Optional[Union[str, bytes]]) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    if not value.startswith(MAGIC) or len(value) < HEADER_SIZE:
+        return value.decode(errors="replace")
+    codec = codecs_by_tag.get(value[len(MAGIC)])
+    payload = value[HEADER_SIZE:]
+    if codec == RedisCodec.MSGPACK:
+        return dump_json(msgpack.unpackb(payload))
+    if codec == RedisCodec.ZLIB:
+        return zlib.decompress(payload).decode()
+    if codec == RedisCodec.ZSTD:
+        return zstd_decompressor.decompress(payload).decode()
+    return value.decode(errors="replace")
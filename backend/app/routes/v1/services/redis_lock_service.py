@@ -0,0 +1,262 @@
+import asyncio
+import os
+import time
+import uuid
+from enum import Enum
+import redis.asyncio as aioredis
+from .redis_service import get_redis_script
+from .redis_pubsub_service import redis_subscriber
+
+log_prefix = "[REDIS LOCK]"
+
+'''
+**Fair Distributed Lock (Redisson `RedissonFairLock` style)**
+- `redis_client.lock(...).acquire(blocking=True)` spins: every contender sleeps and retries `SET NX` in a loop
+    - no ordering (some requests starve under contention), wasted Redis CPU, and the sync version blocks the event loop
+- This lock keeps a FIFO queue of waiters in Redis and only the head of the queue may take the lock
+    - `<lock_key>:queue` (LIST): waiter tokens in arrival order
+    - `<lock_key>:timeouts` (ZSET): token -> deadline (ms) of each waiter; a waiter that stops refreshing its entry (crashed worker) is dropped from the queue
+    - `redis_lock_channel:<lock_key>` (PUB/SUB): on release, the token of the next waiter is published to wake it up (no polling)
+- Acquire is async with a timeout; the lease is renewed by a watchdog task while the lock is held
+- For multi-step read-modify-write sections that can't be a single command or a Lua script
+    - e.g. read a value, compute or call another service, write the result back (see `benchmarks/bench_redis_lock.py`)
+    - single commands and Lua scripts already run atomically in Redis: the Redis router's writes and deletes take no lock
+'''
+
+
+# =========================================================
+# Settings
+# =========================================================
+
+class RedisLockConfig(Enum):
+    LEASE_TIME = float(os.getenv('REDIS_LOCK_LEASE_TIME', 10))  # Seconds (Renewed by the watchdog while the lock is held)
+    WAIT_TIMEOUT = float(os.getenv('REDIS_LOCK_WAIT_TIMEOUT', 10))  # Seconds to wait in the queue before giving up
+    QUEUE_ENTRY_TIMEOUT = float(os.getenv('REDIS_LOCK_QUEUE_ENTRY_TIMEOUT', 5))  # Seconds without a refresh before a waiter is treated as dead
+    CHANNEL_PREFIX = os.getenv('REDIS_LOCK_CHANNEL_PREFIX', 'redis_lock_channel:')
+
+
+# =========================================================
+# Lua Scripts
+# =========================================================
+
+# KEYS: lock, queue, timeouts, channel / ARGV: token, lease_ms, queue_entry_timeout_ms, now_ms
+# return: -1 (acquired), otherwise the remaining lease of the current holder in ms (-2: free, but another waiter is first)
+LUA_ACQUIRE = """
+local purged = false
+while true do
+    local head = redis.call('LINDEX', KEYS[2], 0)
+    if not head then break end
+    local deadline = tonumber(redis.call('ZSCORE', KEYS[3], head))
+    if deadline and deadline > tonumber(ARGV[4]) then break end
+    redis.call('LPOP', KEYS[2])
+    redis.call('ZREM', KEYS[3], head)
+    purged = true
+end
+
+local head = redis.call('LINDEX', KEYS[2], 0)
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    if (not head) or head == ARGV[1] then
+        if head then
+            redis.call('LPOP', KEYS[2])
+        end
+        redis.call('ZREM', KEYS[3], ARGV[1])
+        redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+        return -1
+    end
+    if purged then
+        redis.call('PUBLISH', KEYS[4], head)
+    end
+end
+
+if not redis.call('ZSCORE', KEYS[3], ARGV[1]) then
+    redis.call('RPUSH', KEYS[2], ARGV[1])
+end
+redis.call('ZADD', KEYS[3], tonumber(ARGV[4]) + tonumber(ARGV[3]), ARGV[1])
+redis.call('PEXPIRE', KEYS[2], tonumber(ARGV[3]) * 2)
+redis.call('PEXPIRE', KEYS[3], tonumber(ARGV[3]) * 2)
+local ttl = redis.call('PTTL', KEYS[1])
+if ttl == -1 then
+    return 0
+end
+return ttl
+"""
+
+# KEYS: lock, queue, channel / ARGV: token
+LUA_RELEASE = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+local head = redis.call('LINDEX', KEYS[2], 0)
+if head then
+    redis.call('PUBLISH', KEYS[3], head)
+end
+return 1
+"""
+
+# KEYS: lock, queue, timeouts, channel / ARGV: token
+# Also releases the lock if the waiter got it (e.g. cancelled while the reply of the acquire was on its way)
+LUA_CANCEL = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+end
+redis.call('LREM', KEYS[2], 0, ARGV[1])
+redis.call('ZREM', KEYS[3], ARGV[1])
+local head = redis.call('LINDEX', KEYS[2], 0)
+if head and redis.call('EXISTS', KEYS[1]) == 0 then
+    redis.call('PUBLISH', KEYS[4], head)
+end
+return 1
+"""
+
+# KEYS: lock / ARGV: token, lease_ms
+LUA_RENEW = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+# =========================================================
+# Metrics
+# =========================================================
+
+lock_metrics = {
+    "acquired": 0,
+    "released": 0,
+    "timeouts": 0,
+    "lost": 0,  # Lease expired before release (e.g. the watchdog couldn't reach Redis)
+    "renewals": 0,
+    "notifications": 0,  # Wake-ups received through PUB/SUB
+    "waiting": 0,  # Current waiters in this worker
+    "wait_time_total": 0.0,
+    "wait_time_max": 0.0,
+}
+
+def get_lock_metrics() -> dict:
+    acquired = lock_metrics["acquired"]
+    return {
+        **lock_metrics,
+        "wait_time_avg": lock_metrics["wait_time_total"] / acquired if acquired else 0.0,
+    }
+
+
+# =========================================================
+# Wake-up Notifier (shared PUB/SUB connection of the worker)
+# =========================================================
+
+lock_waiters: dict[str, asyncio.Event] = {}  # token -> event of a waiter in this worker
+
+def handle_lock_notification(message: dict):
+    token = message['data'].decode() if isinstance(message['data'], bytes) else message['data']
+    event = lock_waiters.get(token)
+    if event is not None:
+        lock_metrics["notifications"] += 1
+        event.set()
+
+async def start_lock_notifier():
+    await redis_subscriber.psubscribe(RedisLockConfig.CHANNEL_PREFIX.value + "*", handle_lock_notification)
+    print(f"{log_prefix} Lock notifier started")
+
+async def stop_lock_notifier():
+    await redis_subscriber.punsubscribe(RedisLockConfig.CHANNEL_PREFIX.value + "*")
+    print(f"{log_prefix} Lock notifier stopped")
+
+
+# =========================================================
+# Fair Lock
+# =========================================================
+
+class FairLock:
+    def __init__(self, redis_client: aioredis.Redis, name: str, lease_time: float = RedisLockConfig.LEASE_TIME.value):
+        self.redis_client = redis_client
+        self.name = name
+        self.queue_key = f"{name}:queue"
+        self.timeouts_key = f"{name}:timeouts"
+        self.channel = RedisLockConfig.CHANNEL_PREFIX.value + name
+        self.lease_ms = int(lease_time * 1000)
+        self.token = uuid.uuid4().hex
+        self.watchdog_task: asyncio.Task = None
+
+    async def acquire(self, timeout: float = RedisLockConfig.WAIT_TIMEOUT.value) -> bool:
+        queue_entry_timeout_ms = int(RedisLockConfig.QUEUE_ENTRY_TIMEOUT.value * 1000)
+        script = get_redis_script(self.redis_client, LUA_ACQUIRE)
+        started_at = time.monotonic()
+        deadline = started_at + timeout
+        event = asyncio.Event()
+        lock_waiters[self.token] = event
+        lock_metrics["waiting"] += 1
+        try:
+            while True:
+                event.clear()
+                result = await script(
+                    keys=[self.name, self.queue_key, self.timeouts_key, self.channel],
+                    args=[self.token, self.lease_ms, queue_entry_timeout_ms, int(time.time() * 1000)]
+                )
+                if result == -1:
+                    waited = time.monotonic() - started_at
+                    lock_metrics["acquired"] += 1
+                    lock_metrics["wait_time_total"] += waited
+                    lock_metrics["wait_time_max"] = max(lock_metrics["wait_time_max"], waited)
+                    self.watchdog_task = asyncio.create_task(self.watchdog())
+                    return True
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    await self.cancel()
+                    lock_metrics["timeouts"] += 1
+                    return False
+
+                # Sleep until notified; the timed wake-up only refreshes the queue entry or covers an expired holder
+                wait = min(remaining, RedisLockConfig.QUEUE_ENTRY_TIMEOUT.value / 2)
+                if result > 0:
+                    wait = min(wait, result / 1000)
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            # Cancelled (e.g. the client disconnected) or Redis failed: leave the queue right away
+            # Otherwise the next waiter stalls behind this entry until it times out (`QUEUE_ENTRY_TIMEOUT`)
+            try:
+                await asyncio.shield(self.cancel())
+            except Exception as e:
+                print(f"{log_prefix} Failed to leave the queue - name: '{self.name}', error: {e}")
+            raise
+        finally:
+            lock_waiters.pop(self.token, None)
+            lock_metrics["waiting"] -= 1
+
+    async def cancel(self):
+        await get_redis_script(self.redis_client, LUA_CANCEL)(
+            keys=[self.name, self.queue_key, self.timeouts_key, self.channel],
+            args=[self.token]
+        )
+
+    async def release(self) -> bool:
+        if self.watchdog_task is not None:
+            self.watchdog_task.cancel()
+            self.watchdog_task = None
+        released = await get_redis_script(self.redis_client, LUA_RELEASE)(
+            keys=[self.name, self.queue_key, self.channel],
+            args=[self.token]
+        )
+        if released:
+            lock_metrics["released"] += 1
+        else:
+            lock_metrics["lost"] += 1
+            print(f"{log_prefix} Lock was lost before release - name: '{self.name}'")
+        return bool(released)
+
+    async def watchdog(self):
+        # Renews the lease at 1/3 of the lease time while the lock is held
+        script = get_redis_script(self.redis_client, LUA_RENEW)
+        while True:
+            await asyncio.sleep(self.lease_ms / 3000)
+            try:
+                if not await script(keys=[self.name], args=[self.token, self.lease_ms]):
+                    return
+                lock_metrics["renewals"] += 1
+            except Exception as e:
+                print(f"{log_prefix} Lease renewal failed - name: '{self.name}', error: {e}")
@@ -0,0 +1,181 @@
+import os
+import time
+from collections import OrderedDict
+from enum import Enum
+from typing import Any, Callable
+import redis.asyncio as aioredis
+from .redis_service import RedisConfig
+from .redis_pubsub_service import redis_subscriber
+
+log_prefix = "[REDIS NEAR CACHE]"
+
+'''
+**Near Cache (in-process LRU in front of Redis reads, opt-in)**
+- Hot read-mostly keys are served from the worker's memory instead of a Redis round trip
+- Bounded by the estimated size of the cached values in bytes (LRU eviction)
+- An entry expires together with its Redis key (PTTL is read in the same round trip as the value)
+    - Keys without a TTL are kept at most `MAX_AGE` seconds, which also bounds staleness if a notification is ever missed
+- Invalidation
+    - Writes of this worker invalidate the entry immediately
+    - Writes of other workers/clients arrive as keyspace notifications (`__keyspace@<db>__:<key>`) on the shared subscriber
+    - When the subscriber connection drops, the whole cache is flushed (notifications may have been missed)
+'''
+
+
+# =========================================================
+# Settings
+# =========================================================
+
+class RedisNearCacheConfig(Enum):
+    ON = True if os.getenv('REDIS_NEAR_CACHE_ON', 'False').lower() == 'true' else False
+    MAX_BYTES = int(os.getenv('REDIS_NEAR_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    MAX_AGE = float(os.getenv('REDIS_NEAR_CACHE_MAX_AGE', 60))  # Seconds, for keys without a TTL
+    ENTRY_OVERHEAD = 64  # Estimated bytes of bookkeeping per entry
+    # Set `notify-keyspace-events` on startup (Disable it where CONFIG is not allowed, e.g. managed Redis, and configure it there)
+    CONFIGURE_NOTIFICATIONS = True if os.getenv('REDIS_NEAR_CACHE_CONFIGURE_NOTIFICATIONS', 'True').lower() == 'true' else False
+    NOTIFICATION_FLAGS = "Kg$shxe"  # Keyspace events: generic, string, set, hash, expired, evicted
+
+
+# =========================================================
+# Near Cache
+# =========================================================
+
+def estimate_size(value: Any) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(len(str(field)) + len(str(item)) for field, item in value.items())
+    if isinstance(value, (set, list, tuple)):
+        return sum(len(str(member)) for member in value)
+    return len(str(value))
+
+
+class NearCache:
+    def __init__(self, max_bytes: int = RedisNearCacheConfig.MAX_BYTES.value):
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict = OrderedDict()  # actual key -> (value, size, expires_at)
+        self.size = 0
+        self.loaders: dict[str, int] = {}  # actual key -> loads in progress
+        self.generations: dict[str, int] = {}  # actual key -> invalidations while it is being loaded
+        self.metrics = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0, "flushes": 0}
+
+    async def read(self, redis_client: aioredis.Redis, actual_key: str, command: str, decode: Callable = None, **options):
+        '''
+        - command: read command of the key (e.g. 'GET', 'SMEMBERS', 'HGETALL')
+        - decode: applied to the value before it's cached (e.g. `decode_value` of the codec layer)
+        - options: `execute_command` options (e.g. `RAW_READ`)
+        - return: the (decoded) value
+        '''
+        entry = self.entries.get(actual_key)
+        if entry is not None:
+            value, size, expires_at = entry
+            if expires_at > time.monotonic():
+                self.entries.move_to_end(actual_key)
+                self.metrics["hits"] += 1
+                return value
+            self.remove(actual_key)
+            self.metrics["expirations"] += 1
+
+        self.metrics["misses"] += 1
+        self.loaders[actual_key] = self.loaders.get(actual_key, 0) + 1
+        generation = self.generations.setdefault(actual_key, 0)
+        try:
+            # Not MULTI/EXEC: the EXEC reply is decoded as a whole, which ignores `RAW_READ` (binary codec values)
+            # A write between the two commands only skews the TTL: its invalidation bumps the generation checked below
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.execute_command(command, actual_key, **options)
+                pipe.pttl(actual_key)
+                value, pttl = await pipe.execute()
+            if decode is not None:
+                value = decode(value)
+            # Don't cache missing keys, or a value that was overwritten while it was being loaded
+            if pttl != -2 and self.generations[actual_key] == generation:
+                ttl = pttl / 1000 if pttl > 0 else RedisNearCacheConfig.MAX_AGE.value
+                self.put(actual_key, value, min(ttl, RedisNearCacheConfig.MAX_AGE.value))
+        finally:
+            self.loaders[actual_key] -= 1
+            if self.loaders[actual_key] == 0:
+                del self.loaders[actual_key]
+                del self.generations[actual_key]
+        return value
+
+    def put(self, actual_key: str, value: Any, ttl: float):
+        size = estimate_size(value) + len(actual_key) + RedisNearCacheConfig.ENTRY_OVERHEAD.value
+        if size > self.max_bytes:
+            return
+        self.remove(actual_key)
+        self.entries[actual_key] = (value, size, time.monotonic() + ttl)
+        self.size += size
+        while self.size > self.max_bytes:
+            evicted_key, _ = next(iter(self.entries.items()))
+            self.remove(evicted_key)
+            self.metrics["evictions"] += 1
+
+    def remove(self, actual_key: str):
+        entry = self.entries.pop(actual_key, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+    def invalidate(self, actual_key: str):
+        if actual_key in self.generations:
+            self.generations[actual_key] += 1
+        if actual_key in self.entries:
+            self.remove(actual_key)
+            self.metrics["invalidations"] += 1
+
+    def flush(self):
+        for actual_key in self.generations:
+            self.generations[actual_key] += 1
+        self.entries.clear()
+        self.size = 0
+        self.metrics["flushes"] += 1
+
+    def get_metrics(self) -> dict:
+        lookups = self.metrics["hits"] + self.metrics["misses"]
+        return {
+            **self.metrics,
+            "on": RedisNearCacheConfig.ON.value,
+            "hit_ratio": self.metrics["hits"] / lookups if lookups else 0.0,
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+        }
+
+
+near_cache = NearCache()
+
+
+# =========================================================
+# Keyspace Notifications
+# =========================================================
+
+keyspace_channel_prefix = f"__keyspace@{RedisConfig.DB_INDEX.value}__:"
+
+def handle_keyspace_notification(message: dict):
+    channel = message['channel'].decode() if isinstance(message['channel'], bytes) else message['channel']
+    near_cache.invalidate(channel[len(keyspace_channel_prefix):])
+
+async def start_near_cache(redis_client: aioredis.Redis, key_prefixes: list[str]):
+    if not RedisNearCacheConfig.ON.value:
+        return
+    if RedisNearCacheConfig.CONFIGURE_NOTIFICATIONS.value:
+        try:
+            current_flags = (await redis_client.config_get("notify-keyspace-events")).get("notify-keyspace-events", "")
+            flags = "".join(sorted(set(current_flags) | set(RedisNearCacheConfig.NOTIFICATION_FLAGS.value)))
+            await redis_client.config_set("notify-keyspace-events", flags)
+        except Exception as e:
+            print(f"{log_prefix} Failed to configure keyspace notifications - error: {e}")
+    for key_prefix in key_prefixes:
+        await redis_subscriber.psubscribe(keyspace_channel_prefix + key_prefix + "*", handle_keyspace_notification)
+    redis_subscriber.reconnect_handlers.append(near_cache.flush)
+    print(f"{log_prefix} Near cache started - max_bytes: {near_cache.max_bytes}")
+
+
+async def read_through(redis_client: aioredis.Redis, actual_key: str, command: str, decode: Callable = None, **options):
+    # Reads from the near cache when it's on, otherwise straight from Redis
+    if RedisNearCacheConfig.ON.value:
+        return await near_cache.read(redis_client, actual_key, command, decode, **options)
+    value = await redis_client.execute_command(command, actual_key, **options)
+    return decode(value) if decode is not None else value
@@ -0,0 +1,170 @@
+import asyncio
+import os
+from collections import deque
+from itertools import islice
+from enum import Enum
+from typing import Callable, Optional
+import redis.asyncio as aioredis
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+from .redis_service import get_redis_client
+
+log_prefix = "[REDIS PUBSUB]"
+
+'''
+**Multiplexed Subscriber (one PUB/SUB connection per worker)**
+- Every channel (and pattern, e.g. the lock wake-ups) is subscribed on the SAME connection and read by ONE asyncio task
+    - Subscribing twice to the same channel is a no-op
+- Messages of each channel go to a bounded ring buffer (`deque(maxlen=BUFFER_SIZE)`)
+    - Every message gets a sequence number per channel, used as the cursor of reads and streams
+    - When the buffer is full, the oldest messages are dropped (readers with an old cursor are told how many they missed)
+- Unsubscribing closes the buffer: streams waiting on it end
+'''
+
+
+# =========================================================
+# Settings
+# =========================================================
+
+class RedisPubSubConfig(Enum):
+    BUFFER_SIZE = int(os.getenv('REDIS_PUBSUB_BUFFER_SIZE', 1000))  # Messages kept per channel
+    READ_LIMIT = int(os.getenv('REDIS_PUBSUB_READ_LIMIT', 100))  # Default max messages per read
+    GET_MESSAGE_TIMEOUT = float(os.getenv('REDIS_PUBSUB_GET_MESSAGE_TIMEOUT', 1))
+    RECONNECT_DELAY = float(os.getenv('REDIS_PUBSUB_RECONNECT_DELAY', 1))
+
+
+# =========================================================
+# Channel Buffer
+# =========================================================
+
+class ChannelBuffer:
+    def __init__(self, channel: str, size: int = RedisPubSubConfig.BUFFER_SIZE.value):
+        self.channel = channel
+        self.messages: deque = deque(maxlen=size)  # (seq, message)
+        self.last_seq = 0
+        self.closed = False  # Unsubscribed: no more messages will arrive
+        self.condition = asyncio.Condition()
+
+    async def append(self, message: str):
+        self.last_seq += 1
+        self.messages.append((self.last_seq, message))
+        async with self.condition:
+            self.condition.notify_all()
+
+    def read(self, cursor: int, limit: int) -> tuple[list, int, int]:
+        # return: messages after the cursor, next cursor, number of messages dropped since the cursor
+        first_seq = self.messages[0][0] if self.messages else self.last_seq + 1
+        dropped = max(0, first_seq - cursor - 1)
+        start = max(0, cursor - first_seq + 1)  # Sequence numbers are contiguous in the buffer
+        messages = [
+            {"seq": seq, "message": message}
+            for seq, message in islice(self.messages, start, start + limit)
+        ]
+        next_cursor = messages[-1]["seq"] if messages else max(cursor, first_seq - 1)
+        return messages, next_cursor, dropped
+
+    async def close(self):
+        self.closed = True
+        async with self.condition:
+            self.condition.notify_all()
+
+    async def wait(self, cursor: int, timeout: float) -> bool:
+        # Wait until a message newer than the cursor arrives or the buffer is closed (False on timeout)
+        async with self.condition:
+            try:
+                await asyncio.wait_for(self.condition.wait_for(lambda: self.last_seq > cursor or self.closed), timeout=timeout)
+                return True
+            except asyncio.TimeoutError:
+                return False
+
+
+# =========================================================
+# Subscriber
+# =========================================================
+
+class RedisSubscriber:
+    def __init__(self):
+        self.pubsub: aioredis.client.PubSub = None
+        self.task: asyncio.Task = None
+        self.running = False
+        self.buffers: dict[str, ChannelBuffer] = {}
+        self.subscribed = asyncio.Event()
+        self.reconnect_handlers: list[Callable] = []  # Called after the connection was lost (messages may have been missed)
+
+    async def start(self):
+        if self.task is None:
+            redis_client = await get_redis_client()
+            self.pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            self.running = True
+            self.task = asyncio.create_task(self.listen())
+            print(f"{log_prefix} Subscriber started")
+
+    async def stop(self):
+        if self.task is not None:
+            # The flag is needed as well: a cancellation racing with the read timeout can be swallowed inside `get_message`
+            self.running = False
+            self.subscribed.set()
+            self.task.cancel()
+            await asyncio.wait([self.task], timeout=RedisPubSubConfig.GET_MESSAGE_TIMEOUT.value * 2)
+            await self.pubsub.aclose()
+            self.task = None
+            self.pubsub = None
+            for buffer in self.buffers.values():
+                await buffer.close()
+            self.buffers.clear()
+            self.subscribed.clear()
+            print(f"{log_prefix} Subscriber stopped")
+
+    async def listen(self):
+        while self.running:
+            if not self.pubsub.subscribed:
+                self.subscribed.clear()
+                await self.subscribed.wait()
+                continue
+            try:
+                # Handlers registered on subscribe are called inside `get_message`
+                await self.pubsub.get_message(timeout=RedisPubSubConfig.GET_MESSAGE_TIMEOUT.value)
+            except (RedisConnectionError, RedisTimeoutError) as e:
+                print(f"{log_prefix} Connection lost, reconnecting - error: {e}")
+                for handler in self.reconnect_handlers:
+                    handler()
+                await asyncio.sleep(RedisPubSubConfig.RECONNECT_DELAY.value)
+            except Exception as e:
+                print(f"{log_prefix} Failed to handle a message - error: {e}")
+
+    async def subscribe(self, channel: str) -> bool:
+        # return: False if the channel was already subscribed
+        await self.start()
+        if channel in self.buffers:
+            return False
+        buffer = ChannelBuffer(channel)
+        self.buffers[channel] = buffer
+
+        async def handle_message(message: dict):
+            await buffer.append(message['data'])
+
+        await self.pubsub.subscribe(**{channel: handle_message})
+        self.subscribed.set()
+        return True
+
+    async def unsubscribe(self, channel: str) -> bool:
+        buffer = self.buffers.pop(channel, None)
+        if buffer is None:
+            return False
+        await self.pubsub.unsubscribe(channel)
+        await buffer.close()
+        return True
+
+    async def psubscribe(self, pattern: str, handler: Callable):
+        await self.start()
+        await self.pubsub.psubscribe(**{pattern: handler})
+        self.subscribed.set()
+
+    async def punsubscribe(self, pattern: str):
+        if self.pubsub is not None:
+            await self.pubsub.punsubscribe(pattern)
+
+    def get_buffer(self, channel: str) -> Optional[ChannelBuffer]:
+        return self.buffers.get(channel)
+
+
+redis_subscriber = RedisSubscriber()
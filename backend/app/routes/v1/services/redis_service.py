@@ -0,0 +1,129 @@
+import os
+from enum import Enum
+import redis.asyncio as aioredis
+from redis.commands.core import AsyncScript
+from .redis_codec_service import RAW_READ, decode_value
+
+log_prefix = "[REDIS]"
+
+
+# =========================================================
+# Settings
+# =========================================================
+
+class RedisConfig(Enum):
+    HOST = os.getenv('REDIS_HOST', 'host.docker.internal')  # replace to the host of Redis service ('127.0.0.1' if it's local)
+    PORT = int(os.getenv('REDIS_PORT', 6379))
+    DB_INDEX = int(os.getenv('REDIS_DB_INDEX', 0))  # db index (up to 15)
+    DECODE_RESPONSES = True if os.getenv('REDIS_DECODE_RESPONSES', 'True') == 'True' else False  # True: string to UTF-8 (str type in python)
+    MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 50))  # Upper bound of connections per worker
+    POOL_TIMEOUT = float(os.getenv('REDIS_POOL_TIMEOUT', 5))  # Seconds to wait for a free connection when the pool is exhausted
+    SOCKET_TIMEOUT = float(os.getenv('REDIS_SOCKET_TIMEOUT', 5))
+    SOCKET_CONNECT_TIMEOUT = float(os.getenv('REDIS_SOCKET_CONNECT_TIMEOUT', 5))
+    HEALTH_CHECK_INTERVAL = int(os.getenv('REDIS_HEALTH_CHECK_INTERVAL', 30))
+
+# Redis Value Type
+class RedisValueType(Enum):
+    STRING      = ("STRING",    "string:")
+    SET         = ("SET",       "set:")
+    HASH        = ("HASH",      "hash:")
+
+    def __new__(cls, key, key_prefix):
+        obj = object.__new__(cls)
+        obj._value_ = key  # Use _value_ for the key
+        obj.key = key
+        obj.key_prefix = key_prefix
+        return obj
+
+# Read command of each value type
+READ_COMMANDS = {
+    RedisValueType.STRING: "GET",
+    RedisValueType.SET: "SMEMBERS",
+    RedisValueType.HASH: "HGETALL",
+}
+
+
+# =========================================================
+# Connection Pool (asyncio)
+# =========================================================
+'''
+- Every handler in the Redis router is `async def`, so it must never call a blocking (sync) client.
+- One bounded `BlockingConnectionPool` per worker:
+    - When all connections are busy, callers wait (up to `POOL_TIMEOUT`) for a free one instead of opening unlimited sockets.
+- The pool is created on app startup and closed on app shutdown (See `app/main.py`).
+'''
+
+redis_pool: aioredis.BlockingConnectionPool = None
+redis_client: aioredis.Redis = None
+redis_scripts: dict = {} # Lua source -> registered script (EVALSHA, falls back to EVAL on NOSCRIPT)
+
+
+async def init_redis():
+    global redis_pool, redis_client
+    if redis_client is None:
+        redis_pool = aioredis.BlockingConnectionPool(
+            host=RedisConfig.HOST.value,
+            port=RedisConfig.PORT.value,
+            db=RedisConfig.DB_INDEX.value,
+            decode_responses=RedisConfig.DECODE_RESPONSES.value,
+            max_connections=RedisConfig.MAX_CONNECTIONS.value,
+            timeout=RedisConfig.POOL_TIMEOUT.value,
+            socket_timeout=RedisConfig.SOCKET_TIMEOUT.value,
+            socket_connect_timeout=RedisConfig.SOCKET_CONNECT_TIMEOUT.value,
+            health_check_interval=RedisConfig.HEALTH_CHECK_INTERVAL.value,
+        )
+        redis_client = aioredis.Redis(connection_pool=redis_pool)
+        print(f"{log_prefix} Redis connection pool created - max_connections: {RedisConfig.MAX_CONNECTIONS.value}")
+    return redis_client
+
+
+async def close_redis():
+    global redis_pool, redis_client
+    if redis_client is not None:
+        await redis_client.aclose()
+        await redis_pool.disconnect()
+        redis_client = None
+        redis_pool = None
+        redis_scripts.clear()
+        print(f"{log_prefix} Redis connection pool closed")
+
+
+async def get_redis_client() -> aioredis.Redis:
+    # Lazily created if the app lifecycle hasn't run (e.g. scripts)
+    if redis_client is None:
+        return await init_redis()
+    return redis_client
+
+
+# =========================================================
+# Lua Scripts
+# =========================================================
+
+def get_redis_script(redis_client: aioredis.Redis, source: str) -> AsyncScript:
+    # The SHA1 of each script is computed once per worker, so every call is a single EVALSHA round trip
+    script = redis_scripts.get(source)
+    if script is None:
+        script = redis_client.register_script(source)
+        redis_scripts[source] = script
+    return script
+
+
+# =========================================================
+# Value Reads (listing / export)
+# =========================================================
+
+async def read_values(redis_client: aioredis.Redis, value_type: RedisValueType, actual_keys: list[str]) -> list[tuple]:
+    # One pipelined read of the values of `actual_keys` / return: (actual key, value) of the keys that still exist (strings decoded)
+    read_command = READ_COMMANDS[value_type]
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for actual_key in actual_keys:
+            if value_type == RedisValueType.STRING:
+                pipe.execute_command(read_command, actual_key, **RAW_READ)
+            else:
+                pipe.execute_command(read_command, actual_key)
+        values = await pipe.execute()
+    if value_type == RedisValueType.STRING:
+        # A deleted key reads as None; an empty string is a value
+        return [(actual_key, decode_value(value)) for actual_key, value in zip(actual_keys, values) if value is not None]
+    # A deleted set/hash reads as empty (Redis never keeps an empty one)
+    return [(actual_key, value) for actual_key, value in zip(actual_keys, values) if value]
@@ -0,0 +1,202 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+from collections import OrderedDict
+from enum import Enum
+from typing import BinaryIO, Optional
+from .s3_service import s3_client, bucket_name, run_s3, is_s3_not_found
+
+log_prefix = "[S3 CACHE]"
+
+'''
+**Local Disk Cache in front of S3 downloads (opt-in)**
+- Hot objects are kept as files on the local disk of the worker and served from there (`FileRangeResponse`)
+- Bounded by `MAX_BYTES` (LRU eviction); objects over `MAX_OBJECT_SIZE` aren't cached
+    - their ETag is remembered, so they're revalidated with `head_object` instead of a `get_object` that's thrown away
+- Revalidation: a cached object is served without asking S3 for `FRESH_FOR` seconds after it was (re)validated
+    - after that, `head_object` checks the ETag: unchanged -> served from the cache / changed -> fetched again
+- Single-flight fill: concurrent misses of the same key wait for ONE `get_object` instead of each downloading the object
+- Every fill writes a file of its own (unique name), into a directory owned by the worker (removed on shutdown)
+    - `open_entry` hands out the entry with its file already open: a refill or an eviction unlinks the old file,
+      but a response in flight keeps reading the bytes that match its ETag and Content-Length
+'''
+
+
+# =========================================================
+# Settings
+# =========================================================
+
+class S3CacheConfig(Enum):
+    ON = True if os.getenv('S3_CACHE_ON', 'False').lower() == 'true' else False
+    DIRECTORY = os.getenv('S3_CACHE_DIRECTORY', tempfile.gettempdir())  # A directory per worker is created inside
+    MAX_BYTES = int(os.getenv('S3_CACHE_MAX_BYTES', 1024 * 1024 * 1024))
+    MAX_OBJECT_SIZE = int(os.getenv('S3_CACHE_MAX_OBJECT_SIZE', 100 * 1024 * 1024))
+    FRESH_FOR = float(os.getenv('S3_CACHE_FRESH_FOR', 5))  # Seconds a validated object is served without revalidation
+    COPY_CHUNK_SIZE = 1024 * 1024
+    MAX_OVERSIZE_KEYS = 10_000  # Objects known to be too large (their ETags are kept)
+
+
+# =========================================================
+# Disk Cache
+# =========================================================
+
+class S3CacheEntry:
+    def __init__(self, path: str, etag: str, size: int):
+        self.path = path
+        self.etag = etag
+        self.size = size
+        self.validated_at = time.monotonic()
+
+
+def download_to_file(key: str, path: str, max_size: int) -> tuple[str, int]:
+    # Blocking (run it on the S3 executor) / return: ETag, size (the file isn't written if the size is over `max_size`)
+    response = s3_client.get_object(Bucket=bucket_name, Key=key)
+    with response['Body'] as body:
+        if response['ContentLength'] > max_size:
+            return response['ETag'], response['ContentLength']
+        with open(path, "wb") as file:
+            shutil.copyfileobj(body, file, S3CacheConfig.COPY_CHUNK_SIZE.value)
+    return response['ETag'], response['ContentLength']
+
+
+class S3DiskCache:
+    def __init__(self, max_bytes: int = S3CacheConfig.MAX_BYTES.value):
+        self.max_bytes = max_bytes
+        self.directory: str = None
+        self.entries: OrderedDict = OrderedDict()  # key -> S3CacheEntry
+        self.size = 0
+        self.fills: dict[str, asyncio.Task] = {}  # key -> fill in progress
+        self.oversize: OrderedDict = OrderedDict()  # key -> S3CacheEntry without a file (too large to be cached)
+        self.metrics = {"hits": 0, "misses": 0, "revalidations": 0, "invalidations": 0, "evictions": 0, "bypasses": 0, "bytes_saved": 0}
+
+    async def open_entry(self, key: str) -> Optional[tuple[S3CacheEntry, BinaryIO, bool]]:
+        # return: the cached object, its file opened (the caller closes it) and whether it was a hit, None if it can't be served from the cache
+        entry, hit = await self.get(key)
+        if entry is None:
+            return None
+        try:
+            return entry, open(entry.path, "rb"), hit
+        except FileNotFoundError:
+            return None  # Evicted or refilled after the fill this request waited for
+
+    def record_served(self, size: int):
+        # Body bytes of a response served by a hit (a 304 or a small range saves only those bytes of S3 transfer)
+        self.metrics["bytes_saved"] += size
+
+    async def get(self, key: str) -> tuple[Optional[S3CacheEntry], bool]:
+        # return: the cached object (filled on a miss), None if it can't be cached / whether it was a hit
+        oversize = self.oversize.get(key)
+        if oversize is not None and await self.validate(key, oversize):
+            self.metrics["bypasses"] += 1
+            return None, False
+
+        entry = self.entries.get(key)
+        if entry is not None and await self.validate(key, entry):
+            self.entries.move_to_end(key)
+            self.metrics["hits"] += 1
+            return entry, True
+
+        self.metrics["misses"] += 1
+        fill = self.fills.get(key)
+        if fill is None:
+            # A task of its own: a client that disconnects doesn't cancel the fill the others are waiting for
+            fill = asyncio.ensure_future(self.fill(key))
+            self.fills[key] = fill
+            fill.add_done_callback(lambda task: self.fills.pop(key) if self.fills.get(key) is task else None)
+        return await asyncio.shield(fill), False
+
+    async def validate(self, key: str, entry: S3CacheEntry) -> bool:
+        if time.monotonic() - entry.validated_at < S3CacheConfig.FRESH_FOR.value:
+            return True
+        self.metrics["revalidations"] += 1
+        try:
+            head_response = await run_s3(s3_client.head_object, Bucket=bucket_name, Key=key)
+        except Exception as e:
+            if is_s3_not_found(e):
+                self.remove(key)  # Deleted from S3
+            raise
+        if head_response['ETag'] == entry.etag:
+            entry.validated_at = time.monotonic()
+            return True
+        self.remove(key)
+        self.metrics["invalidations"] += 1
+        return False
+
+    async def fill(self, key: str) -> Optional[S3CacheEntry]:
+        if self.directory is None:
+            os.makedirs(S3CacheConfig.DIRECTORY.value, exist_ok=True)
+            self.directory = tempfile.mkdtemp(prefix="s3-cache-", dir=S3CacheConfig.DIRECTORY.value)
+        # A new file per fill: the file of the previous entry may still be read by a response
+        fd, path = tempfile.mkstemp(dir=self.directory)
+        os.close(fd)
+        max_object_size = min(S3CacheConfig.MAX_OBJECT_SIZE.value, self.max_bytes)
+        try:
+            etag, size = await run_s3(download_to_file, key, path, max_object_size)
+        except BaseException:
+            os.unlink(path)
+            raise
+        if self.fills.get(key) is not asyncio.current_task():
+            # Invalidated while downloading: the file may hold the content from before the write (the waiters go to S3)
+            os.unlink(path)
+            return None
+        self.remove(key)
+        if size > max_object_size:
+            os.unlink(path)
+            self.oversize[key] = S3CacheEntry(None, etag, size)
+            if len(self.oversize) > S3CacheConfig.MAX_OVERSIZE_KEYS.value:
+                self.oversize.popitem(last=False)
+            self.metrics["bypasses"] += 1
+            return None
+
+        entry = S3CacheEntry(path, etag, size)
+        self.entries[key] = entry
+        self.size += size
+        while self.size > self.max_bytes:
+            evicted_key = next(iter(self.entries))
+            self.remove(evicted_key)
+            self.metrics["evictions"] += 1
+        return entry
+
+    def invalidate(self, key: str):
+        # The object was written through this worker: drop the local copy, and don't cache a fill already in progress
+        self.fills.pop(key, None)
+        self.remove(key)
+
+    def remove(self, key: str):
+        # Open files of the entry stay readable until they're closed
+        self.oversize.pop(key, None)
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry.size
+            try:
+                os.unlink(entry.path)
+            except FileNotFoundError:
+                pass
+
+    def close(self):
+        if self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+        self.entries.clear()
+        self.oversize.clear()
+        self.size = 0
+        self.directory = None
+
+    def get_metrics(self) -> dict:
+        lookups = self.metrics["hits"] + self.metrics["misses"]
+        return {
+            **self.metrics,
+            "on": S3CacheConfig.ON.value,
+            "hit_ratio": self.metrics["hits"] / lookups if lookups else 0.0,
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+        }
+
+
+s3_cache = S3DiskCache()
+
+def close_s3_cache():
+    s3_cache.close()
+    print(f"{log_prefix} Cache closed")
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+from enum import Enum
+from typing import Awaitable, BinaryIO, Callable, Optional
+from starlette.concurrency import run_in_threadpool
+from .redis_service import get_redis_client
+from .s3_service import s3_client, bucket_name, run_s3, is_s3_not_found
+
+log_prefix = "[S3 DEDUP]"
+
+'''
+**Content-Addressed Dedup for S3 uploads**
+- The upload (already spooled by the multipart parser) is hashed first (SHA-256, in chunks, off the event loop)
+- Redis keeps a content index: `s3_content:<sha256>` -> the S3 key holding that content
+- Duplicate: the bytes are NOT uploaded again
+    - same key: nothing to do / another key: server-side copy inside S3 (`copy`, multipart copy for large objects)
+- New content: uploaded as usual with the digest as object metadata (`x-amz-meta-sha256`), then indexed
+- An index entry is trusted only if the object still exists with the same size and digest metadata (deleted/overwritten objects are dropped from the index)
+- Redis errors only disable dedup for the request (the upload goes on as usual)
+'''
+
+
+# =========================================================
+# Settings
+# =========================================================
+
+class S3DedupConfig(Enum):
+    ON = True if os.getenv('S3_DEDUP_ON', 'True').lower() == 'true' else False
+    KEY_PREFIX = "s3_content:"
+    HASH_CHUNK_SIZE = int(os.getenv('S3_DEDUP_HASH_CHUNK_SIZE', 1024 * 1024))
+
+
+# =========================================================
+# Content Index
+# =========================================================
+
+def hash_file(source: BinaryIO, chunk_size: int = S3DedupConfig.HASH_CHUNK_SIZE.value) -> tuple[int, str]:
+    # Blocking (run it in a thread) / return: size, SHA-256 hex digest (the source is rewound)
+    source.seek(0)
+    size = 0
+    digest = hashlib.sha256()
+    while chunk := source.read(chunk_size):
+        size += len(chunk)
+        digest.update(chunk)
+    source.seek(0)
+    return size, digest.hexdigest()
+
+
+async def find_content(sha256: str, size: int) -> Optional[tuple[str, dict]]:
+    # return: S3 key of an object with the same content, its `head_object` response
+    index_key = S3DedupConfig.KEY_PREFIX.value + sha256
+    try:
+        redis_client = await get_redis_client()
+        entry = await redis_client.get(index_key)
+        if not entry:
+            return None
+        s3_path = json.loads(entry)["s3_path"]
+        try:
+            head_response = await run_s3(s3_client.head_object, Bucket=bucket_name, Key=s3_path)
+        except Exception as e:
+            if not is_s3_not_found(e):
+                raise
+            head_response = None
+        if head_response is None or head_response['ContentLength'] != size or head_response.get('Metadata', {}).get('sha256') != sha256:
+            await redis_client.delete(index_key)  # Deleted or overwritten since it was indexed
+            return None
+        return s3_path, head_response
+    except Exception as e:
+        print(f"{log_prefix} Content lookup failed, uploading as usual - sha256: {sha256}, error: {e}")
+        return None
+
+
+async def record_content(sha256: str, size: int, s3_path: str):
+    try:
+        redis_client = await get_redis_client()
+        await redis_client.set(S3DedupConfig.KEY_PREFIX.value + sha256, json.dumps({"s3_path": s3_path, "size": size}))
+    except Exception as e:
+        print(f"{log_prefix} Failed to index content - sha256: {sha256}, error: {e}")
+
+
+# =========================================================
+# Upload
+# =========================================================
+
+async def upload_deduplicated(source: BinaryIO, s3_path: str, upload: Callable[[dict], Awaitable]) -> tuple[bool, str]:
+    '''
+    - source: seekable file of the upload (e.g. `UploadFile.file`)
+    - upload: uploads the source to `s3_path` with the given object metadata (called only for new content)
+    - return: deduplicated, SHA-256 hex digest
+    '''
+    size, sha256 = await run_in_threadpool(hash_file, source)
+    metadata = {"sha256": sha256}
+    if S3DedupConfig.ON.value:
+        existing = await find_content(sha256, size)
+        if existing is not None:
+            existing_path, head_response = existing
+            if existing_path != s3_path:
+                # Server-side copy: no bytes go through this worker
+                # The metadata and content type are set explicitly: REPLACE drops those of the source, and a large object is copied as multipart, which doesn't carry them over
+                extra_args = {"Metadata": metadata, "MetadataDirective": "REPLACE"}
+                if head_response.get('ContentType'):
+                    extra_args["ContentType"] = head_response['ContentType']
+                await run_s3(
+                    s3_client.copy,
+                    {"Bucket": bucket_name, "Key": existing_path},
+                    bucket_name,
+                    s3_path,
+                    ExtraArgs=extra_args
+                )
+            return True, sha256
+
+    await upload(metadata)
+    if S3DedupConfig.ON.value:
+        await record_content(sha256, size, s3_path)
+    return False, sha256
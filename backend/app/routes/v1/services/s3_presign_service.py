@@ -0,0 +1,129 @@
+import json
+import math
+import os
+import time
+from enum import Enum
+from typing import Optional
+from .redis_service import get_redis_client
+from .s3_service import s3_client, bucket_name, run_s3
+
+log_prefix = "[S3 PRESIGN]"
+
+'''
+**Presigned Direct-to-S3 Transfers (the app handles control traffic only)**
+- The app signs URLs; clients PUT/GET the bytes to/from S3 directly, so bulk data never goes through the workers
+    - PUT: single request upload (up to 5GB) / GET: download (Range requests are handled by S3)
+    - Multipart: the app starts the upload and signs one URL per part; the client PUTs the parts (in parallel) and keeps their ETags
+- Completion callback: the client reports the upload when it's done
+    - multipart uploads are completed with the reported part ETags (or aborted by the client)
+    - the object is verified with `head_object` and recorded in Redis (`s3_object:<key>`) with its size, ETag and content type
+- URLs expire after `EXPIRES_IN` seconds; signing is local (no S3 round trip), but many part URLs are signed off the event loop
+'''
+
+
+# =========================================================
+# Settings
+# =========================================================
+
+class S3PresignConfig(Enum):
+    EXPIRES_IN = int(os.getenv('S3_PRESIGN_EXPIRES_IN', 3600))  # Seconds a presigned URL is valid
+    MAX_EXPIRES_IN = 7 * 24 * 3600  # SigV4 maximum
+    RECORD_KEY_PREFIX = "s3_object:"
+
+
+# =========================================================
+# Presigned URLs
+# =========================================================
+
+def presign_put(key: str, content_type: Optional[str] = None, expires_in: int = S3PresignConfig.EXPIRES_IN.value) -> str:
+    # The client has to send the same `Content-Type` header (it's part of the signature)
+    params = {"Bucket": bucket_name, "Key": key}
+    if content_type:
+        params["ContentType"] = content_type
+    return s3_client.generate_presigned_url("put_object", Params=params, ExpiresIn=expires_in)
+
+
+def presign_get(key: str, download_name: Optional[str] = None, expires_in: int = S3PresignConfig.EXPIRES_IN.value) -> str:
+    params = {"Bucket": bucket_name, "Key": key}
+    if download_name:
+        download_name = download_name.replace('"', '')  # Quoted in the header
+        params["ResponseContentDisposition"] = f'attachment; filename="{download_name}"'
+    return s3_client.generate_presigned_url("get_object", Params=params, ExpiresIn=expires_in)
+
+
+def presign_parts(key: str, upload_id: str, part_count: int, expires_in: int) -> list[dict]:
+    # Blocking (CPU): up to `MULTIPART_MAX_PARTS` signatures
+    return [
+        {
+            "part_number": part_number,
+            "url": s3_client.generate_presigned_url(
+                "upload_part",
+                Params={"Bucket": bucket_name, "Key": key, "UploadId": upload_id, "PartNumber": part_number},
+                ExpiresIn=expires_in
+            )
+        }
+        for part_number in range(1, part_count + 1)
+    ]
+
+
+async def create_presigned_multipart(
+    key: str,
+    size: int,
+    part_size: int,
+    content_type: Optional[str] = None,
+    expires_in: int = S3PresignConfig.EXPIRES_IN.value
+) -> tuple[str, list[dict]]:
+    '''
+    - size: bytes of the whole object (decides the number of parts)
+    - part_size: bytes per part (at least `MULTIPART_MIN_PART_SIZE`, except the last part)
+    - return: upload ID, a presigned URL per part (`part_number`, `url`)
+    '''
+    part_count = max(1, math.ceil(size / part_size))
+    params = {"Bucket": bucket_name, "Key": key}
+    if content_type:
+        params["ContentType"] = content_type
+    response = await run_s3(s3_client.create_multipart_upload, **params)
+    upload_id = response["UploadId"]
+    parts = await run_s3(presign_parts, key, upload_id, part_count, expires_in)
+    return upload_id, parts
+
+
+async def complete_presigned_multipart(key: str, upload_id: str, parts: list[dict]):
+    # parts: `part_number`, `etag` reported by the client (the ETag header of each part upload)
+    await run_s3(
+        s3_client.complete_multipart_upload,
+        Bucket=bucket_name,
+        Key=key,
+        UploadId=upload_id,
+        MultipartUpload={"Parts": [
+            {"PartNumber": part["part_number"], "ETag": part["etag"]}
+            for part in sorted(parts, key=lambda part: part["part_number"])
+        ]}
+    )
+
+
+# =========================================================
+# Object Record
+# =========================================================
+
+async def record_object(key: str) -> dict:
+    # Verifies the object was uploaded (`head_object` raises 404 otherwise) and records it
+    head_response = await run_s3(s3_client.head_object, Bucket=bucket_name, Key=key)
+    record = {
+        "s3_path": key,
+        "size": head_response["ContentLength"],
+        "etag": head_response["ETag"],
+        "content_type": head_response.get("ContentType"),
+        "recorded_at": time.time()
+    }
+    redis_client = await get_redis_client()
+    await redis_client.set(S3PresignConfig.RECORD_KEY_PREFIX.value + key, json.dumps(record))
+    print(f"{log_prefix} Object recorded - key: '{key}', size: {record['size']}")
+    return record
+
+
+async def get_object_record(key: str) -> Optional[dict]:
+    redis_client = await get_redis_client()
+    record = await redis_client.get(S3PresignConfig.RECORD_KEY_PREFIX.value + key)
+    return json.loads(record) if record else None
+
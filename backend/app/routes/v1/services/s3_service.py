@@ -0,0 +1,243 @@
+import asyncio
+import io
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from functools import partial
+from typing import AsyncIterator, Awaitable, Callable
+import boto3
+from botocore.config import Config as BotoConfig
+from botocore.exceptions import ClientError
+
+log_prefix = "[S3]"
+
+'''
+**S3 Transfer Layer (boto3 off the event loop)**
+- boto3 is synchronous: calling it in an `async def` route blocks the event loop (and every other request) for the whole network transfer
+- Every blocking S3 call runs on a dedicated, bounded thread pool through `run_s3`
+    - `MAX_WORKERS` bounds the concurrent S3 calls per worker; the HTTP connection pool of the client is sized to match
+    - It's separate from the default executor, so S3 transfers can't starve other `run_in_executor` users (and vice versa)
+- Response bodies (`StreamingBody`) are read chunk by chunk on the same pool with `iter_s3_body`, so downloads stream without stalling other requests
+- Ranged downloads read ahead (`iter_s3_ranges`): up to `READ_AHEAD` ranged `get_object` calls are in flight
+    - Chunks are yielded in order as soon as the next one is ready, so the client isn't waiting a full S3 round trip per chunk
+    - Buffered memory is bounded by `READ_AHEAD_MAX_BYTES`; every range is pinned to the ETag read up front (`IfMatch`)
+- Multipart uploads send up to `MULTIPART_CONCURRENCY` parts at once (`upload_multipart`)
+    - Parts in flight are also capped by `MULTIPART_MAX_IN_FLIGHT_BYTES`, so memory stays bounded whatever the file size
+    - A failed part is retried; if it still fails, the upload is aborted so the uploaded parts aren't left behind (and billed)
+- `AWS_S3_ENDPOINT_URL` points the client to an S3 compatible stand-in (e.g. MinIO, LocalStack, moto server) for local testing
+'''
+
+
+# =========================================================
+# Settings
+# =========================================================
+
+class S3Config(Enum):
+    BUCKET_NAME = os.getenv("AWS_S3_BUCKET_NAME", 'jonas-fastapi-master')  # Replace it to your real bucket
+    ENDPOINT_URL = os.getenv("AWS_S3_ENDPOINT_URL") or None  # e.g. http://localhost:9000 (Local S3 stand-in)
+    MAX_WORKERS = int(os.getenv("S3_MAX_WORKERS", 16))  # Concurrent blocking S3 calls per worker
+    READ_CHUNK_SIZE = int(os.getenv("S3_READ_CHUNK_SIZE", 1024 * 1024))  # Bytes per body read
+    READ_AHEAD = int(os.getenv("S3_READ_AHEAD", 4))  # Ranged `get_object` calls in flight per download
+    READ_AHEAD_MAX_BYTES = int(os.getenv("S3_READ_AHEAD_MAX_BYTES", 64 * 1024 * 1024))  # Memory cap of the ranges in flight per download
+    MULTIPART_CONCURRENCY = int(os.getenv("S3_MULTIPART_CONCURRENCY", 4))  # Parts uploaded at once per upload
+    MULTIPART_MAX_IN_FLIGHT_BYTES = int(os.getenv("S3_MULTIPART_MAX_IN_FLIGHT_BYTES", 64 * 1024 * 1024))  # Memory cap of the parts in flight per upload
+    MULTIPART_RETRIES = int(os.getenv("S3_MULTIPART_RETRIES", 3))  # Attempts per part (and per abort)
+    MULTIPART_RETRY_DELAY = float(os.getenv("S3_MULTIPART_RETRY_DELAY", 0.5))  # Seconds, doubled per attempt
+    MULTIPART_MIN_PART_SIZE = 5 * 1024 * 1024  # S3 minimum (except the last part)
+    MULTIPART_MAX_PART_SIZE = 5 * 1024 * 1024 * 1024  # S3 maximum
+    MULTIPART_MAX_PARTS = 10000  # S3 maximum
+
+# S3 Client Setting (boto3 clients are thread-safe)
+s3_client = boto3.client(
+    's3',
+    endpoint_url=S3Config.ENDPOINT_URL.value,
+    config=BotoConfig(max_pool_connections=S3Config.MAX_WORKERS.value)
+)
+bucket_name = S3Config.BUCKET_NAME.value
+
+s3_executor = ThreadPoolExecutor(max_workers=S3Config.MAX_WORKERS.value, thread_name_prefix="s3")
+
+
+# =========================================================
+# Transfer
+# =========================================================
+
+async def run_s3(func: Callable, *args, **kwargs):
+    # Runs a blocking S3 call (e.g. `s3_client.get_object`) on the S3 executor
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(s3_executor, partial(func, *args, **kwargs))
+
+
+async def iter_s3_body(body, chunk_size: int = S3Config.READ_CHUNK_SIZE.value) -> AsyncIterator[bytes]:
+    # Streams a `StreamingBody` without blocking the event loop (the body is closed when the client goes away)
+    try:
+        while chunk := await run_s3(body.read, chunk_size):
+            yield chunk
+    finally:
+        body.close()
+
+
+async def iter_s3_object(key: str, start: int, end: int, chunk_size: int = S3Config.READ_CHUNK_SIZE.value, etag: str = None) -> AsyncIterator[bytes]:
+    # Streams a byte range (inclusive) of the object with one ranged `get_object`
+    options = {"IfMatch": etag} if etag else {}
+    response = await run_s3(s3_client.get_object, Bucket=bucket_name, Key=key, Range=f"bytes={start}-{end}", **options)
+    async for chunk in iter_s3_body(response['Body'], chunk_size):
+        yield chunk
+
+
+async def get_s3_range(key: str, start: int, end: int, etag: str = None) -> bytes:
+    options = {"IfMatch": etag} if etag else {}
+    response = await run_s3(s3_client.get_object, Bucket=bucket_name, Key=key, Range=f"bytes={start}-{end}", **options)
+    body = response['Body']
+    try:
+        return await run_s3(body.read)
+    finally:
+        body.close()
+
+
+async def iter_s3_ranges(
+    key: str,
+    start: int,
+    end: int,
+    chunk_size: int,
+    etag: str = None,
+    read_ahead: int = S3Config.READ_AHEAD.value
+) -> AsyncIterator[bytes]:
+    '''
+    - start / end: byte range of the object to stream (inclusive, e.g. 0 / ContentLength - 1)
+    - etag: ETag of the object (from `head_object`); a range of a changed object fails instead of mixing versions
+    - return: chunks of `chunk_size` bytes, in order
+    '''
+    read_ahead = max(1, min(read_ahead, S3Config.READ_AHEAD_MAX_BYTES.value // chunk_size))
+    offsets = iter(range(start, end + 1, chunk_size))
+    pending: deque = deque()  # Fetch tasks in the order of their ranges
+
+    def schedule():
+        offset = next(offsets, None)
+        if offset is not None:
+            pending.append(asyncio.create_task(get_s3_range(key, offset, min(offset + chunk_size - 1, end), etag)))
+
+    try:
+        for _ in range(read_ahead):
+            schedule()
+        while pending:
+            chunk = await pending[0]  # Completed ranges behind the head simply wait their turn
+            pending.popleft()
+            schedule()
+            yield chunk
+    finally:
+        # Stopped early or a range failed: cancel the read-ahead and collect it (no "Task exception was never retrieved")
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def upload_multipart(
+    read: Callable[[int], Awaitable[bytes]],
+    key: str,
+    part_size: int,
+    concurrency: int = S3Config.MULTIPART_CONCURRENCY.value,
+    max_in_flight_bytes: int = S3Config.MULTIPART_MAX_IN_FLIGHT_BYTES.value,
+    metadata: dict = None
+) -> int:
+    '''
+    - read: async reader of the source (e.g. `UploadFile.read`)
+    - part_size: bytes per part (at least `MULTIPART_MIN_PART_SIZE`, at most `max_in_flight_bytes` and `MULTIPART_MAX_PART_SIZE`)
+    - metadata: user metadata of the object (`x-amz-meta-*`)
+    - return: number of uploaded parts
+    '''
+    if part_size > min(max_in_flight_bytes, S3Config.MULTIPART_MAX_PART_SIZE.value):
+        raise ValueError(f"part_size must be at most {min(max_in_flight_bytes, S3Config.MULTIPART_MAX_PART_SIZE.value)} bytes.")
+    response = await run_s3(s3_client.create_multipart_upload, Bucket=bucket_name, Key=key, Metadata=metadata or {})
+    upload_id = response["UploadId"]
+    slots = asyncio.Semaphore(max(1, min(concurrency, max_in_flight_bytes // part_size)))  # At least one part fits
+    failed = asyncio.Event()
+    tasks: list[asyncio.Task] = []
+
+    async def upload_part(part_number: int, chunk: bytes) -> dict:
+        try:
+            for attempt in range(S3Config.MULTIPART_RETRIES.value):
+                try:
+                    response = await run_s3(
+                        s3_client.upload_part,
+                        Bucket=bucket_name,
+                        Key=key,
+                        PartNumber=part_number,
+                        UploadId=upload_id,
+                        Body=io.BytesIO(chunk)  # A new stream per attempt
+                    )
+                    return {"ETag": response["ETag"], "PartNumber": part_number}
+                except Exception as e:
+                    if failed.is_set() or attempt == S3Config.MULTIPART_RETRIES.value - 1:
+                        failed.set()
+                        raise
+                    print(f"{log_prefix} Part upload failed, retrying - key: '{key}', part: {part_number}, error: {e}")
+                    await asyncio.sleep(S3Config.MULTIPART_RETRY_DELAY.value * 2 ** attempt)
+        finally:
+            slots.release()
+
+    try:
+        part_number = 1
+        while not failed.is_set():
+            await slots.acquire()
+            if failed.is_set():
+                slots.release()
+                break
+            chunk = await read(part_size)
+            if not chunk and part_number > 1:
+                slots.release()
+                break
+            tasks.append(asyncio.create_task(upload_part(part_number, chunk)))  # An empty source is uploaded as one empty part
+            part_number += 1
+            if not chunk:
+                break
+        parts = await asyncio.gather(*tasks)
+
+        await run_s3(
+            s3_client.complete_multipart_upload,
+            Bucket=bucket_name,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": parts}
+        )
+        return len(parts)
+    except BaseException:
+        # Let the parts in flight finish first: a part that completes after the abort would be stored again
+        failed.set()
+        await asyncio.shield(asyncio.gather(*tasks, return_exceptions=True))
+        await asyncio.shield(abort_multipart(key, upload_id))
+        raise
+
+
+async def abort_multipart(key: str, upload_id: str):
+    for attempt in range(S3Config.MULTIPART_RETRIES.value):
+        try:
+            await run_s3(s3_client.abort_multipart_upload, Bucket=bucket_name, Key=key, UploadId=upload_id)
+            print(f"{log_prefix} Multipart upload aborted - key: '{key}'")
+            return
+        except Exception as e:
+            print(f"{log_prefix} Multipart abort failed - key: '{key}', upload_id: '{upload_id}', error: {e}")
+            await asyncio.sleep(S3Config.MULTIPART_RETRY_DELAY.value * 2 ** attempt)
+
+
+def is_s3_not_found(e: Exception) -> bool:
+    # `get_object` raises `NoSuchKey`, `head_object` a plain `ClientError` with a 404 code
+    if isinstance(e, s3_client.exceptions.NoSuchKey):
+        return True
+    return isinstance(e, ClientError) and e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+
+def is_s3_upload_not_found(e: Exception) -> bool:
+    # Unknown (or already completed/aborted) multipart upload ID
+    return isinstance(e, ClientError) and e.response.get("Error", {}).get("Code") == "NoSuchUpload"
+
+
+def is_s3_invalid_part(e: Exception) -> bool:
+    # Completing a multipart upload with a missing part, a wrong part ETag or a too small part
+    return isinstance(e, ClientError) and e.response.get("Error", {}).get("Code") in ("InvalidPart", "InvalidPartOrder", "EntityTooSmall")
+
+
+def shutdown_s3_executor():
+    s3_executor.shutdown(wait=False, cancel_futures=True)
+    print(f"{log_prefix} Executor shut down")
@@ -0,0 +1,289 @@
+import mimetypes
+import os
+import uuid
+from typing import AsyncIterator, BinaryIO, Callable, Optional
+import anyio
+from fastapi import HTTPException
+from starlette.concurrency import iterate_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import Response, StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+'''
+**HTTP Range / Conditional Requests (RFC 9110) for downloads**
+- Every download sends `Content-Length`, `ETag` and `Accept-Ranges: bytes`
+- `If-None-Match` matching the ETag: 304 Not Modified (no body)
+- `Range: bytes=...`
+    - one range: 206 with `Content-Range`
+    - several ranges: 206 `multipart/byteranges` (overlapping/adjacent ranges are coalesced)
+    - unsatisfiable: 416 with `Content-Range: bytes */<size>`
+    - malformed, other units or more than `MAX_RANGES` ranges: ignored (200 with the whole content)
+- `If-Range`: the range is only served if the ETag still matches, otherwise the whole (new) content is sent
+- The content is read through `read_range(start, end)` (inclusive), so a source only streams the bytes asked for
+    - e.g. local file: seek + chunked reads in a thread / S3: ranged `get_object`
+- Local files (the whole file or one range) are sent with `FileRangeResponse`
+    - fixed size chunk reads in a thread (never on the event loop, no newline-split chunks) with an exact `Content-Length`
+    - not zero-copy under uvicorn (the server this app runs on): the bytes still go through Python
+        - the kernel sends the file (sendfile) only on a server offering the ASGI `http.response.zerocopysend` extension
+- The media type is guessed from the file name (`guess_media_type`), so compressible types (e.g. text/csv) can be compressed
+    - unknown types are `application/octet-stream`, which the compression middleware leaves as is
+- A local file that shrinks while it's sent raises `FileTruncatedError` after the headers are out
+    - the server aborts the connection, so the client sees an incomplete response (never a short 200/206 that looks complete)
+'''
+
+MAX_RANGES = 16
+LOCAL_READ_CHUNK_SIZE = 64 * 1024
+
+
+class FileTruncatedError(Exception):
+    pass
+
+
+def guess_media_type(filename: str) -> str:
+    return mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+
+# =========================================================
+# Parse
+# =========================================================
+
+def parse_range_header(range_header: Optional[str], size: int) -> Optional[list[tuple[int, int]]]:
+    # return: sorted and coalesced (start, end) ranges, None to send the whole content
+    if not range_header:
+        return None
+    unit, _, ranges_spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes":
+        return None
+    specs = [spec.strip() for spec in ranges_spec.split(",") if spec.strip()]
+    if not specs or len(specs) > MAX_RANGES:
+        return None
+
+    ranges = []
+    for spec in specs:
+        first, dash, last = spec.partition("-")
+        if not dash:
+            return None
+        try:
+            if first:  # bytes=<first>-[<last>]
+                start = int(first)
+                end = int(last) if last else max(start, size - 1)
+                if start < 0 or end < start:
+                    return None
+            else:  # bytes=-<suffix length>
+                suffix = int(last)
+                if suffix <= 0:
+                    continue
+                start, end = max(0, size - suffix), size - 1
+        except ValueError:
+            return None
+        if start < size:
+            ranges.append((start, min(end, size - 1)))
+
+    if not ranges:
+        raise HTTPException(status_code=416, detail="Range Not Satisfiable", headers={"Content-Range": f"bytes */{size}"})
+
+    ranges.sort()
+    coalesced = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = coalesced[-1]
+        if start <= last_end + 1:
+            coalesced[-1] = (last_start, max(last_end, end))
+        else:
+            coalesced.append((start, end))
+    return coalesced
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    # Weak comparison (If-None-Match)
+    if header.strip() == "*":
+        return True
+    normalize = lambda tag: tag.strip().removeprefix("W/")
+    return normalize(etag) in (normalize(tag) for tag in header.split(","))
+
+
+# =========================================================
+# Response
+# =========================================================
+
+def range_response(
+    headers: Headers,
+    size: int,
+    etag: str,
+    read_range: Callable[[int, int], AsyncIterator[bytes]],
+    media_type: str = "application/octet-stream",
+    file_path: str = None,
+    chunk_size: int = LOCAL_READ_CHUNK_SIZE,
+    file: BinaryIO = None
+) -> Response:
+    '''
+    - headers: request headers
+    - read_range: streams the bytes from `start` to `end` (inclusive) of the content
+    - file_path: local file of the content, sent with `FileRangeResponse` (`read_range` is then only used for multiple ranges)
+    - file: the local file already open, used like `file_path` (e.g. a cache file that can be removed meanwhile: an open file stays readable)
+        - the response closes it (it's closed here when no response reads it) / `read_range` should read the same file (`open_file_range_reader`)
+    '''
+    base_headers = {"ETag": etag, "Accept-Ranges": "bytes"}
+
+    if_none_match = headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, etag):
+        if file is not None:
+            file.close()
+        return Response(status_code=304, headers=base_headers)
+
+    try:
+        ranges = parse_range_header(headers.get("range"), size)
+    except HTTPException:
+        if file is not None:
+            file.close()
+        raise
+    if_range = headers.get("if-range")
+    if ranges is not None and if_range is not None and (if_range.startswith("W/") or if_range.strip() != etag):
+        ranges = None  # Changed since the client's partial copy (or a date validator): send the whole content
+
+    if ranges is None:
+        if size == 0:
+            if file is not None:
+                file.close()
+            return Response(content=b"", media_type=media_type, headers=base_headers)
+        if file_path is not None or file is not None:
+            return FileRangeResponse(file_path, 0, size, media_type=media_type, headers=base_headers, chunk_size=chunk_size, file=file)
+        return StreamingResponse(
+            read_range(0, size - 1),
+            media_type=media_type,
+            headers={**base_headers, "Content-Length": str(size)}
+        )
+
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        if file_path is not None or file is not None:
+            return FileRangeResponse(
+                file_path,
+                start,
+                end - start + 1,
+                status_code=206,
+                media_type=media_type,
+                headers={**base_headers, "Content-Range": f"bytes {start}-{end}/{size}"},
+                chunk_size=chunk_size,
+                file=file
+            )
+        return StreamingResponse(
+            read_range(start, end),
+            status_code=206,
+            media_type=media_type,
+            headers={**base_headers, "Content-Length": str(end - start + 1), "Content-Range": f"bytes {start}-{end}/{size}"}
+        )
+
+    boundary = uuid.uuid4().hex
+    part_headers = [
+        f"--{boundary}\r\nContent-Type: {media_type}\r\nContent-Range: bytes {start}-{end}/{size}\r\n\r\n".encode()
+        for start, end in ranges
+    ]
+    closing = f"--{boundary}--\r\n".encode()
+    content_length = sum(len(part) + end - start + 1 + 2 for part, (start, end) in zip(part_headers, ranges)) + len(closing)
+
+    async def iter_parts():
+        try:
+            for part, (start, end) in zip(part_headers, ranges):
+                yield part
+                async for chunk in read_range(start, end):
+                    yield chunk
+                yield b"\r\n"
+            yield closing
+        finally:
+            if file is not None:
+                file.close()
+
+    return StreamingResponse(
+        iter_parts(),
+        status_code=206,
+        media_type=f"multipart/byteranges; boundary={boundary}",
+        headers={**base_headers, "Content-Length": str(content_length)}
+    )
+
+
+# =========================================================
+# Local File
+# =========================================================
+
+class FileRangeResponse(Response):
+    # Sends `count` bytes of a local file from `offset` (chunked reads; sendfile only where the server offers `zerocopysend`)
+    def __init__(
+        self,
+        path: str,
+        offset: int,
+        count: int,
+        status_code: int = 200,
+        headers: dict = None,
+        media_type: str = "application/octet-stream",
+        chunk_size: int = LOCAL_READ_CHUNK_SIZE,
+        file: BinaryIO = None
+    ):
+        self.path = path
+        self.file = file  # Already open (closed when sent)
+        self.offset = offset
+        self.count = count
+        self.chunk_size = chunk_size
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.init_headers({**(headers or {}), "Content-Length": str(count)})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        zerocopy = "http.response.zerocopysend" in scope.get("extensions", {})
+        # Opened before the response starts, so a file removed in the meantime is still an error response
+        file = anyio.wrap_file(self.file) if self.file is not None else await anyio.open_file(self.path, "rb")
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            if zerocopy:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file.wrapped,
+                    "offset": self.offset,
+                    "count": self.count,
+                    "more_body": False
+                })
+                return
+            await file.seek(self.offset)
+            remaining = self.count
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    raise FileTruncatedError(f"File truncated while being sent - missing: {remaining} bytes")
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        finally:
+            await file.aclose()
+
+
+def file_etag(stat_result: os.stat_result) -> str:
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+
+def file_range_reader(path: str, chunk_size: int = LOCAL_READ_CHUNK_SIZE) -> Callable[[int, int], AsyncIterator[bytes]]:
+    # Reads in fixed size chunks in a thread (never on the event loop)
+    def iter_range(start: int, end: int):
+        with open(path, "rb") as file:
+            file.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = file.read(min(chunk_size, remaining))
+                if not chunk:
+                    raise FileTruncatedError(f"File truncated while being sent - missing: {remaining} bytes")
+                remaining -= len(chunk)
+                yield chunk
+
+    return lambda start, end: iterate_in_threadpool(iter_range(start, end))
+
+
+def open_file_range_reader(file: BinaryIO, chunk_size: int = LOCAL_READ_CHUNK_SIZE) -> Callable[[int, int], AsyncIterator[bytes]]:
+    # `file_range_reader` over an already open file (positioned reads: ranges don't share a file offset)
+    def iter_range(start: int, end: int):
+        position = start
+        while position <= end:
+            chunk = os.pread(file.fileno(), min(chunk_size, end - position + 1), position)
+            if not chunk:
+                raise FileTruncatedError(f"File truncated while being sent - missing: {end - position + 1} bytes")
+            position += len(chunk)
+            yield chunk
+
+    return lambda start, end: iterate_in_threadpool(iter_range(start, end))
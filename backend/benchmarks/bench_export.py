@@ -0,0 +1,87 @@
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+'''
+**Benchmark: CSV export - `csv` module vs. pandas encoder**
+- Streams the DEMO source through `encode_csv` (the `/file/export` CSV path) and discards the bytes
+- Reports rows/s, output size and peak RSS per mode (`csv`, `pandas`)
+    - each mode runs in its own process: peak RSS (`ru_maxrss`) only grows, so a shared process would report the larger mode twice
+    - `import RSS` is the peak right after the imports (pandas, pyarrow, ...), so the difference is what the export itself holds
+- Batch size: `EXPORT_BATCH_SIZE` (the app setting)
+
+Usage (from `backend/`): python benchmarks/bench_export.py [--rows 1000000] [--modes csv,pandas]
+'''
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss: kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# =========================================================
+# One mode (child process)
+# =========================================================
+
+async def run_mode(mode: str, rows: int) -> dict:
+    from app.routes.v1.services.export_service import ExportConfig, demo_source, encode_csv
+
+    import_rss = peak_rss_mb()
+    size = 0
+    started_at = time.perf_counter()
+    async for chunk in encode_csv(demo_source(rows), use_pandas=mode == "pandas"):
+        size += len(chunk)
+    elapsed = time.perf_counter() - started_at
+    return {
+        "mode": mode,
+        "batch_size": ExportConfig.BATCH_SIZE.value,
+        "seconds": elapsed,
+        "rows_per_second": rows / elapsed,
+        "bytes": size,
+        "import_rss": import_rss,
+        "peak_rss": peak_rss_mb(),
+    }
+
+
+# =========================================================
+# Main
+# =========================================================
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Rows exported per mode")
+    parser.add_argument("--modes", default="csv,pandas", help="Comma separated: csv, pandas")
+    parser.add_argument("--run", help=argparse.SUPPRESS)  # Child process: run one mode and print its result as JSON
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(await run_mode(args.run, args.rows)))
+        return
+
+    results = []
+    for mode in args.modes.split(","):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--run", mode, "--rows", str(args.rows)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"rows: {args.rows:,}, batch size: {results[0]['batch_size']:,}")
+    print(f"{'mode':<9}{'time (s)':>10}{'rows/s':>12}{'MB':>9}{'import RSS (MB)':>17}{'peak RSS (MB)':>15}")
+    for result in results:
+        print(
+            f"{result['mode']:<9}{result['seconds']:>10,.2f}{result['rows_per_second']:>12,.0f}{result['bytes'] / 1e6:>9,.1f}"
+            f"{result['import_rss']:>17,.1f}{result['peak_rss']:>15,.1f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
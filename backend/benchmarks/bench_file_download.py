@@ -0,0 +1,117 @@
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+'''
+**Benchmark: local file downloads - `yield from file` generator vs. `FileRangeResponse`**
+- generator: what `file_download` did (`StreamingResponse` over `yield from file`: chunks split at newlines, a thread hop each)
+- chunked: `FileRangeResponse` as it runs under uvicorn (no zero-copy extension: `--chunk-size` reads in a thread)
+- The responses are driven as ASGI apps in process (no sockets): the numbers are the cost of producing the body
+- Reports wall time, throughput, CPU time, body messages and the largest one, and the event loop lag (max) seen by a 5ms ticker
+- `--path` uses an existing file; otherwise a `--size-mb` file of random bytes is written to the temporary directory (and removed)
+
+Usage (from `backend/`): python benchmarks/bench_file_download.py [--size-mb 1024] [--chunk-size 65536] [--modes generator,chunked]
+'''
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from starlette.responses import StreamingResponse
+from app.util.http_range_util import FileRangeResponse, LOCAL_READ_CHUNK_SIZE
+
+
+def write_test_file(size: int) -> str:
+    fd, path = tempfile.mkstemp(prefix="bench-download-")
+    block = os.urandom(1024 * 1024)
+    with os.fdopen(fd, "wb") as file:
+        for _ in range(size // len(block)):
+            file.write(block)
+        file.write(block[:size % len(block)])
+    return path
+
+
+def generator_response(path: str, size: int, chunk_size: int):
+    def iter_file():
+        with open(path, "rb") as file:
+            yield from file
+    return StreamingResponse(iter_file(), media_type="application/octet-stream")
+
+
+def file_range_response(path: str, size: int, chunk_size: int):
+    return FileRangeResponse(path, 0, size, chunk_size=chunk_size)
+
+
+async def drive(response) -> dict:
+    stats = {"bytes": 0, "messages": 0, "largest": 0}
+
+    async def receive():
+        await asyncio.sleep(3600)  # The client never disconnects
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict):
+        if message["type"] == "http.response.body":
+            stats["messages"] += 1
+            stats["bytes"] += len(message.get("body", b""))
+            stats["largest"] = max(stats["largest"], len(message.get("body", b"")))
+
+    await response({"type": "http", "extensions": {}}, receive, send)
+    return stats
+
+
+async def measure(response) -> dict:
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        interval = 0.005
+        while not done.is_set():
+            expected = time.perf_counter() + interval
+            await asyncio.sleep(interval)
+            lags.append(max(0.0, time.perf_counter() - expected))
+
+    ticker_task = asyncio.create_task(ticker())
+    cpu_started_at = time.process_time()
+    started_at = time.perf_counter()
+    stats = await drive(response)
+    stats["time"] = time.perf_counter() - started_at
+    stats["cpu"] = time.process_time() - cpu_started_at
+    done.set()
+    await ticker_task
+    stats["lag_max"] = max(lags, default=0.0)
+    return stats
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=1024, help="Size of the generated file (MB)")
+    parser.add_argument("--path", default=None, help="Existing file to send instead")
+    parser.add_argument("--chunk-size", type=int, default=LOCAL_READ_CHUNK_SIZE, help="Read size of `FileRangeResponse`")
+    parser.add_argument("--modes", default="generator,chunked", help="Comma separated (the generator takes minutes on 1GB)")
+    args = parser.parse_args()
+
+    path = args.path or write_test_file(args.size_mb * 1024 * 1024)
+    try:
+        size = os.path.getsize(path)
+        results = []
+        modes = {"generator": generator_response, "chunked": file_range_response}
+        for mode in args.modes.split(","):
+            stats = await measure(modes[mode](path, size, args.chunk_size))
+            assert stats["bytes"] == size, f"{mode}: sent {stats['bytes']} of {size} bytes"
+            results.append((mode, stats))
+    finally:
+        if args.path is None:
+            os.unlink(path)
+
+    print(f"file: {size / 1024 / 1024:,.0f}MB, chunk size: {args.chunk_size}")
+    print(f"{'mode':<11}{'time (s)':>10}{'MB/s':>10}{'cpu (s)':>10}{'messages':>12}{'largest (KB)':>14}{'loop lag max (ms)':>19}")
+    for mode, stats in results:
+        print(
+            f"{mode:<11}{stats['time']:>10.2f}{size / 1024 / 1024 / stats['time']:>10,.0f}{stats['cpu']:>10.2f}"
+            f"{stats['messages']:>12,}{stats['largest'] / 1024:>14,.0f}{stats['lag_max'] * 1000:>19.1f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+'''
+**Benchmark: lock contention - redis-py spin lock vs. `FairLock`**
+- `--contenders` tasks repeatedly lock the same key and run a read-modify-write section in it (GET, +1, SET)
+    - spin: `redis_client.lock(...).acquire()` (retries `SET NX` every `--spin-sleep` seconds)
+    - fair: `FairLock` (FIFO queue in Redis, woken up by PUB/SUB on release)
+- Reports sections/s, the wait for the lock (p50 / p99 / max: starvation shows in the tail), Redis commands per section
+  (`INFO commandstats`) and lost updates (the counter must equal the number of sections)
+- Runs against the Redis of the app settings (`REDIS_HOST`, `REDIS_PORT`, `REDIS_DB_INDEX`); keys are removed afterwards
+
+Usage (from `backend/`): python benchmarks/bench_redis_lock.py [--contenders 50] [--seconds 5] [--spin-sleep 0.1]
+'''
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.routes.v1.services.redis_service import get_redis_client, close_redis
+from app.routes.v1.services.redis_pubsub_service import redis_subscriber
+from app.routes.v1.services.redis_lock_service import FairLock, start_lock_notifier, stop_lock_notifier
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+async def count_commands(redis_client) -> int:
+    # Total commands processed by Redis (None if `INFO commandstats` isn't available)
+    try:
+        stats = await redis_client.info("commandstats")
+    except Exception:
+        return None
+    return sum(stat["calls"] for stat in stats.values() if isinstance(stat, dict) and "calls" in stat) or None
+
+
+async def run(mode: str, contenders: int, seconds: float, spin_sleep: float) -> dict:
+    redis_client = await get_redis_client()
+    lock_key = f"bench_lock:{uuid.uuid4().hex}"
+    counter_key = f"{lock_key}:counter"
+    waits: list[float] = []
+    sections = 0
+    commands_before = await count_commands(redis_client)
+    deadline = time.monotonic() + seconds
+
+    async def contender():
+        nonlocal sections
+        while time.monotonic() < deadline:
+            started_at = time.monotonic()
+            if mode == "fair":
+                lock = FairLock(redis_client, lock_key)
+                if not await lock.acquire(timeout=seconds):
+                    continue
+            else:
+                lock = redis_client.lock(lock_key, timeout=10, sleep=spin_sleep, blocking_timeout=seconds)
+                if not await lock.acquire():
+                    continue
+            waits.append(time.monotonic() - started_at)
+            try:
+                value = int(await redis_client.get(counter_key) or 0)
+                await redis_client.set(counter_key, value + 1)
+                sections += 1
+            finally:
+                await lock.release()
+
+    started_at = time.monotonic()
+    await asyncio.gather(*[contender() for _ in range(contenders)])
+    elapsed = time.monotonic() - started_at
+    commands_after = await count_commands(redis_client)
+    counter = int(await redis_client.get(counter_key) or 0)
+    await redis_client.delete(lock_key, counter_key, f"{lock_key}:queue", f"{lock_key}:timeouts")
+    return {
+        "mode": mode,
+        "sections_per_second": sections / elapsed,
+        "wait_p50": percentile(waits, 0.50),
+        "wait_p99": percentile(waits, 0.99),
+        "wait_max": max(waits, default=0.0),
+        "commands_per_section": (commands_after - commands_before) / sections if sections and commands_before and commands_after else None,
+        "lost_updates": sections - counter,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--contenders", type=int, default=50, help="Concurrent tasks locking the same key")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duration per mode")
+    parser.add_argument("--spin-sleep", type=float, default=0.1, help="Retry interval of the spin lock (redis-py default: 0.1)")
+    args = parser.parse_args()
+
+    await start_lock_notifier()
+    try:
+        results = [await run(mode, args.contenders, args.seconds, args.spin_sleep) for mode in ("spin", "fair")]
+    finally:
+        await stop_lock_notifier()
+        await redis_subscriber.stop()
+        await close_redis()
+
+    print(f"contenders: {args.contenders}, {args.seconds:g}s per mode")
+    print(f"{'mode':<6}{'sections/s':>12}{'wait p50 (ms)':>15}{'wait p99 (ms)':>15}{'wait max (ms)':>15}{'cmds/section':>14}{'lost':>6}")
+    for result in results:
+        commands = f"{result['commands_per_section']:.1f}" if result["commands_per_section"] is not None else "n/a"
+        print(
+            f"{result['mode']:<6}{result['sections_per_second']:>12,.1f}"
+            f"{result['wait_p50'] * 1000:>15,.1f}{result['wait_p99'] * 1000:>15,.1f}{result['wait_max'] * 1000:>15,.1f}"
+            f"{commands:>14}{result['lost_updates']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
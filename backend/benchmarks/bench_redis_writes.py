@@ -0,0 +1,146 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+'''
+**Benchmark: Redis set writes - client-side lock + per-member SADD vs. one atomic script**
+- before: what `add_set` / `update_set` did (EXISTS -> lock acquire -> SADD per member (create) / DEL + SADD (update) -> EXPIRE -> lock release)
+- after: `write_set` (existence check, write and TTL in one Lua script call)
+- Reports round trips per write (commands sent by the client) and latency p50 / p99 for sets of `--members` members
+- Runs against the Redis of the app settings (`REDIS_HOST`, `REDIS_PORT`, `REDIS_DB_INDEX`); keys are removed afterwards
+
+Usage (from `backend/`): python benchmarks/bench_redis_writes.py [--members 1000] [--iterations 200]
+'''
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.routes.v1.services.redis_service import get_redis_client, close_redis
+from app.routes.v1.routes.redis_routes_v1 import RedisWriteMode, write_set
+
+TTL = 60
+LOCK_TIMEOUT = 5
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+# =========================================================
+# Before: exists -> lock -> write -> expire -> unlock
+# =========================================================
+
+async def add_set_with_lock(redis_client, actual_key: str, members: list) -> bool:
+    if await redis_client.exists(actual_key):
+        return False
+    lock = redis_client.lock(f"lock_{actual_key}", timeout=LOCK_TIMEOUT)
+    await lock.acquire(blocking=True)
+    try:
+        for member in members:
+            await redis_client.sadd(actual_key, member)
+        await redis_client.expire(actual_key, TTL)
+    finally:
+        await lock.release()
+    return True
+
+
+async def update_set_with_lock(redis_client, actual_key: str, members: list) -> bool:
+    if not await redis_client.exists(actual_key):
+        return False
+    lock = redis_client.lock(f"lock_{actual_key}", timeout=LOCK_TIMEOUT)
+    await lock.acquire(blocking=True)
+    try:
+        await redis_client.delete(actual_key)
+        await redis_client.sadd(actual_key, *members)
+        await redis_client.expire(actual_key, TTL)
+    finally:
+        await lock.release()
+    return True
+
+
+# =========================================================
+# After: one script call
+# =========================================================
+
+async def add_set_atomic(redis_client, actual_key: str, members: list) -> bool:
+    return await write_set(redis_client, actual_key, members, TTL, RedisWriteMode.CREATE)
+
+
+async def update_set_atomic(redis_client, actual_key: str, members: list) -> bool:
+    return await write_set(redis_client, actual_key, members, TTL, RedisWriteMode.REPLACE)
+
+
+# =========================================================
+# Run
+# =========================================================
+
+def count_round_trips(redis_client) -> list[int]:
+    # Every command of the client (including EVALSHA of scripts and the lock's own commands) is one round trip
+    counter = [0]
+    execute_command = redis_client.execute_command
+
+    async def counted(*args, **options):
+        counter[0] += 1
+        return await execute_command(*args, **options)
+
+    redis_client.execute_command = counted
+    return counter
+
+
+async def measure(redis_client, counter: list[int], write, members: list, iterations: int, existing: bool) -> dict:
+    latencies = []
+    round_trips = 0
+    key_prefix = f"bench_set:{uuid.uuid4().hex}:"
+    for i in range(iterations):
+        actual_key = key_prefix + str(i)
+        if existing:
+            await redis_client.sadd(actual_key, "seed")
+        round_trips_before = counter[0]
+        started_at = time.perf_counter()
+        if not await write(redis_client, actual_key, members):
+            raise RuntimeError(f"{write.__name__} didn't write '{actual_key}'")
+        latencies.append(time.perf_counter() - started_at)
+        round_trips += counter[0] - round_trips_before
+    assert await redis_client.scard(key_prefix + "0") == len(members)
+    await redis_client.delete(*[key_prefix + str(i) for i in range(iterations)])
+    return {
+        "round_trips": round_trips / iterations,
+        "p50": percentile(latencies, 0.50),
+        "p99": percentile(latencies, 0.99),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--members", type=int, default=1000, help="Members per set")
+    parser.add_argument("--iterations", type=int, default=200, help="Writes per case")
+    args = parser.parse_args()
+
+    redis_client = await get_redis_client()
+    counter = count_round_trips(redis_client)
+    members = [f"member-{i}" for i in range(args.members)]
+    cases = [
+        ("create", "before", add_set_with_lock, False),
+        ("create", "after", add_set_atomic, False),
+        ("update", "before", update_set_with_lock, True),
+        ("update", "after", update_set_atomic, True),
+    ]
+    try:
+        results = [
+            (operation, version, await measure(redis_client, counter, write, members, args.iterations, existing))
+            for operation, version, write, existing in cases
+        ]
+    finally:
+        await close_redis()
+
+    print(f"sets of {args.members} members, {args.iterations} writes per case")
+    print(f"{'operation':<11}{'version':<9}{'round trips':>13}{'p50 (ms)':>11}{'p99 (ms)':>11}")
+    for operation, version, result in results:
+        print(f"{operation:<11}{version:<9}{result['round_trips']:>13,.1f}{result['p50'] * 1000:>11,.2f}{result['p99'] * 1000:>11,.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,113 @@
+import argparse
+import base64
+import os
+import shutil
+import sys
+import tempfile
+import time
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa, padding
+
+'''
+**Benchmark: RSA keys parsed per request vs. the key registry**
+- before: the PEM private key is read and parsed on every call (what the RS256 / JWT routes did)
+- after: `key_registry` parses it once and every call reuses the key object
+- Measures RS256 decryption and RS256 JWT signing (ops/s), in one process, without the HTTP layer
+- A 2048-bit key is generated into a temporary directory (`--password` writes it encrypted, like `RSA_PRIVATE_KEY_PASSWORD`)
+
+Usage (from `backend/`): python benchmarks/bench_rsa_key_registry.py [--seconds 3] [--password secret]
+'''
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--seconds", type=float, default=3.0, help="Duration of each measurement")
+parser.add_argument("--password", default=None, help="Encrypt the generated private key with this password")
+args = parser.parse_args()
+
+# The registry reads its settings on import
+keys_directory = tempfile.mkdtemp(prefix="bench-rsa-keys-")
+os.environ["RSA_KEYS_DIRECTORY"] = keys_directory
+if args.password:
+    os.environ["RSA_PRIVATE_KEY_PASSWORD"] = args.password
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from jose import jwk, jwt
+from app.routes.v1.routes.cryptography_routes_v1 import rs256_encrypt, rs256_decrypt
+from app.routes.v1.routes.jwt_routes_v1 import get_signing_key
+
+
+# =========================================================
+# Key
+# =========================================================
+
+private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+private_key_path = os.path.join(keys_directory, "private.pem")
+with open(private_key_path, "wb") as key_file:
+    key_file.write(private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.BestAvailableEncryption(args.password.encode()) if args.password else serialization.NoEncryption()
+    ))
+with open(os.path.join(keys_directory, "public.pem"), "wb") as key_file:
+    key_file.write(private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo
+    ))
+
+OAEP = padding.OAEP(mgf=padding.MGF1(algorithm=hashes.SHA256()), algorithm=hashes.SHA256(), label=None)
+CLAIMS = {"sub": "bench", "exp": 4102444800}
+
+
+# =========================================================
+# Before: parsed per call
+# =========================================================
+
+def load_private_key():
+    with open(private_key_path, "rb") as key_file:
+        return serialization.load_pem_private_key(key_file.read(), password=args.password.encode() if args.password else None)
+
+def decrypt_parsing_per_call(encrypted_value: str) -> str:
+    return load_private_key().decrypt(base64.b64decode(encrypted_value), OAEP).decode()
+
+def sign_parsing_per_call() -> str:
+    private_pem = load_private_key().private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    )
+    return jwt.encode(CLAIMS, jwk.construct(private_pem, "RS256"), algorithm="RS256")
+
+
+# =========================================================
+# Run
+# =========================================================
+
+def measure(func, *func_args) -> float:
+    # return: ops/s
+    for _ in range(5):
+        func(*func_args)  # Warm up (and the first registry scan)
+    calls = 0
+    started_at = time.perf_counter()
+    deadline = started_at + args.seconds
+    while time.perf_counter() < deadline:
+        func(*func_args)
+        calls += 1
+    return calls / (time.perf_counter() - started_at)
+
+
+def sign_with_registry() -> str:
+    return jwt.encode(CLAIMS, get_signing_key(), algorithm="RS256")
+
+
+encrypted_value = rs256_encrypt("benchmark")
+assert decrypt_parsing_per_call(encrypted_value) == rs256_decrypt(encrypted_value) == "benchmark"
+
+results = [
+    ("rs256 decrypt", measure(decrypt_parsing_per_call, encrypted_value), measure(rs256_decrypt, encrypted_value)),
+    ("jwt sign (RS256)", measure(sign_parsing_per_call), measure(sign_with_registry)),
+]
+print(f"key: 2048-bit RSA{' (encrypted PEM)' if args.password else ''}, {args.seconds:g}s per measurement")
+print(f"{'operation':<20}{'before (ops/s)':>16}{'after (ops/s)':>16}{'speedup':>10}")
+for name, before, after in results:
+    print(f"{name:<20}{before:>16,.0f}{after:>16,.0f}{after / before:>9.1f}x")
+
+shutil.rmtree(keys_directory, ignore_errors=True)
@@ -0,0 +1,128 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+'''
+**Benchmark: concurrent S3 transfers per worker - boto3 on the event loop vs. the S3 executor**
+- inline: the blocking boto3 calls run in the `async def` code (what the routes did), so each transfer stalls the event loop
+- executor: the same calls through `run_s3` / `iter_s3_body` (`S3_MAX_WORKERS` threads)
+- `--concurrency` uploads (`put_object`) then as many downloads (`get_object`, body read in `S3_READ_CHUNK_SIZE` chunks) at once
+- Reports the wall time and MB/s of each phase, and the event loop lag (p99 / max) seen by a 5ms ticker meanwhile
+    - the lag is what every other request of the worker waits while the transfers run
+- `--moto` runs against an in-process moto S3 (no network, the transfers are CPU bound in this process);
+  otherwise the S3 of the app settings is used (`AWS_S3_ENDPOINT_URL` for MinIO / LocalStack / moto server, `AWS_S3_BUCKET_NAME`)
+    - `--latency-ms` adds a blocking wait per request, standing in for the network time moto doesn't have
+
+Usage (from `backend/`): python benchmarks/bench_s3_transfers.py --moto --latency-ms 50 [--concurrency 16] [--size-mb 8]
+'''
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--concurrency", type=int, default=16, help="Transfers at once")
+parser.add_argument("--size-mb", type=float, default=8, help="Object size (MB)")
+parser.add_argument("--moto", action="store_true", help="Use an in-process moto S3 (creates the bucket)")
+parser.add_argument("--latency-ms", type=float, default=0, help="Network latency added to every S3 request (blocking sleep, as a socket wait)")
+args = parser.parse_args()
+
+if args.moto:
+    # Before the S3 client of the app is created
+    from moto import mock_aws
+    for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+        os.environ.setdefault(name, "testing")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    mock_aws().start()
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.routes.v1.services.s3_service import S3Config, s3_client, bucket_name, run_s3, iter_s3_body, shutdown_s3_executor
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+# =========================================================
+# Transfers
+# =========================================================
+
+async def upload_inline(key: str, data: bytes):
+    s3_client.put_object(Bucket=bucket_name, Key=key, Body=data)
+
+async def download_inline(key: str) -> int:
+    body = s3_client.get_object(Bucket=bucket_name, Key=key)['Body']
+    size = 0
+    with body:
+        while chunk := body.read(S3Config.READ_CHUNK_SIZE.value):
+            size += len(chunk)
+            await asyncio.sleep(0)  # A streaming response yields between chunks
+    return size
+
+async def upload_executor(key: str, data: bytes):
+    await run_s3(s3_client.put_object, Bucket=bucket_name, Key=key, Body=data)
+
+async def download_executor(key: str) -> int:
+    response = await run_s3(s3_client.get_object, Bucket=bucket_name, Key=key)
+    size = 0
+    async for chunk in iter_s3_body(response['Body']):
+        size += len(chunk)
+    return size
+
+
+# =========================================================
+# Run
+# =========================================================
+
+async def measure(transfers) -> tuple[float, list[float]]:
+    # return: wall time, event loop lags (seconds) seen by a 5ms ticker while the transfers run
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        interval = 0.005
+        while not done.is_set():
+            expected = time.perf_counter() + interval
+            await asyncio.sleep(interval)
+            lags.append(max(0.0, time.perf_counter() - expected))
+
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.01)
+    started_at = time.perf_counter()
+    await asyncio.gather(*transfers)
+    elapsed = time.perf_counter() - started_at
+    done.set()
+    await ticker_task
+    return elapsed, lags
+
+
+async def main():
+    if args.moto:
+        s3_client.create_bucket(Bucket=bucket_name)
+    if args.latency_ms:
+        s3_client.meta.events.register("before-sign.s3", lambda **kwargs: time.sleep(args.latency_ms / 1000))
+    data = os.urandom(int(args.size_mb * 1024 * 1024))
+    total_mb = args.size_mb * args.concurrency
+    results = []
+    for mode, upload, download in (("inline", upload_inline, download_inline), ("executor", upload_executor, download_executor)):
+        keys = [f"bench-s3/{uuid.uuid4().hex}" for _ in range(args.concurrency)]
+        upload_time, upload_lags = await measure([upload(key, data) for key in keys])
+        download_time, download_lags = await measure([download(key) for key in keys])
+        results.append((mode, "upload", upload_time, upload_lags))
+        results.append((mode, "download", download_time, download_lags))
+        for key in keys:
+            await run_s3(s3_client.delete_object, Bucket=bucket_name, Key=key)
+    shutdown_s3_executor()
+
+    print(
+        f"{args.concurrency} concurrent transfers of {args.size_mb:g}MB, S3_MAX_WORKERS: {S3Config.MAX_WORKERS.value}"
+        f"{', moto (in-process)' if args.moto else ''}{f', +{args.latency_ms:g}ms per request' if args.latency_ms else ''}"
+    )
+    print(f"{'mode':<10}{'phase':<10}{'time (s)':>10}{'MB/s':>10}{'loop lag p99 (ms)':>19}{'loop lag max (ms)':>19}")
+    for mode, phase, elapsed, lags in results:
+        print(f"{mode:<10}{phase:<10}{elapsed:>10.2f}{total_mb / elapsed:>10.1f}{percentile(lags, 0.99) * 1000:>19.1f}{max(lags, default=0.0) * 1000:>19.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
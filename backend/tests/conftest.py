@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Imports the app the same way `uvicorn app.main:app` does (from `backend/`)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
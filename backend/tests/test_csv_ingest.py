@@ -0,0 +1,48 @@
+import asyncio
+import io
+from types import SimpleNamespace
+from app.routes.v1.services import csv_ingest_service
+from app.routes.v1.services.async_service import TaskStatus
+from app.routes.v1.services.csv_ingest_service import CsvIngestJob, ingest_csv
+
+
+class FakeCollection:
+    def __init__(self):
+        self.documents = []
+
+    async def insert_many(self, documents: list[dict], ordered: bool = True):
+        self.documents.extend(documents)
+        return SimpleNamespace(inserted_ids=list(range(len(documents))))
+
+
+def run_ingest(monkeypatch, data: bytes, chunk_size: int = 2) -> tuple[CsvIngestJob, FakeCollection]:
+    collection = FakeCollection()
+    monkeypatch.setattr(csv_ingest_service, "collection", collection)
+    job = CsvIngestJob("job", "items.csv", io.BytesIO(data), len(data))
+    asyncio.run(ingest_csv(job, chunk_size=chunk_size))
+    return job, collection
+
+
+def test_ragged_row_is_reported_and_the_rest_is_ingested(monkeypatch):
+    data = b"name,description,price\nA,x,1\nB,x,2,extra\nC,\"multi\nline\",3\nD,y,4\n"
+    job, collection = run_ingest(monkeypatch, data)
+
+    assert job.status == TaskStatus.COMPLETED
+    assert job.rows_read == 4
+    assert job.inserted == 3
+    assert job.errors == [{"row": 2, "error": "expected 3 fields, saw 4"}]
+    assert [document["name"] for document in collection.documents] == ["A", "C", "D"]
+
+
+def test_invalid_values_keep_their_row_numbers(monkeypatch):
+    data = b"name,description,price\nA,x,1\nB,x,2,extra\n,x,3\nD,y,abc\nE,z,5\n"
+    job, collection = run_ingest(monkeypatch, data)
+
+    assert job.status == TaskStatus.COMPLETED
+    assert job.inserted == 2
+    assert job.errors == [
+        {"row": 2, "error": "expected 3 fields, saw 4"},
+        {"row": 3, "error": "name: field required"},
+        {"row": 4, "error": "price: value is not a valid float"},
+    ]
+    assert collection.documents[-1] == {"name": "E", "description": "z", "price": 5.0}